@@ -1,17 +1,186 @@
 import os
+import sys
 import serial
 import csv
 import time
-from normalizeFunction import normalize
+import queue
+import argparse
+import threading
 
-gesture_label = input("What gesture are you recording (e.g., 'Thank_You', 'ILoveYou')? ")
+# calibration profiles (calibration.py) are shared with the interpreters in machine_learning/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "machine_learning"))
+from calibration import capture, save_profile, profile_path
+
+# two ways to record:
+#   python gestureDataCollection.py
+#       the original interactive mode: one gesture, 20 samples, appended to <gesture>_data.csv
+#   python gestureDataCollection.py --session --gestures Dale,ILoveYou,Mom --glove left
+#       high-rate session (sessionRecorder.py): reads whatever the port has,
+#       keeps rows in memory and writes them in blocks to recordings/session_<time>.glv.
+#       press 1-9 to label the frames that follow with that gesture, 0 to pause
+#       labelling, q to stop. export-csv turns a session into the usual CSVs.
+ap = argparse.ArgumentParser(description="Record labelled glove samples")
+ap.add_argument("--session", action="store_true", help="high-rate buffered session instead of 20 samples")
+ap.add_argument("--gestures", help="comma separated labels for keys 1-9 (session mode)")
+ap.add_argument("--glove", help="glove id (calibration profile name)")
+ap.add_argument("--port", default=os.environ.get("GLOVE_PORT", '/dev/cu.usbmodem21101'))
+ap.add_argument("--baud", type=int, default=9600)
+ap.add_argument("--rate", type=float, help="sample rate the firmware is set to (for the drop estimate)")
+ap.add_argument("--block", type=int, default=4096, help="rows per write to disk")
+ap.add_argument("--duration", type=float, help="stop after N seconds (session mode)")
+ap.add_argument("--out", help="folder for the recordings (default ~/Downloads, or "
+                              "~/Downloads/recordings for sessions)")
+args = ap.parse_args()
+
+if args.session:
+    if not args.gestures:
+        args.gestures = input("Gestures for keys 1-9, comma separated (e.g. 'Dale,ILoveYou')? ")
+    gestures = [g.strip() for g in args.gestures.split(",") if g.strip()][:9]
+else:
+    gesture_label = input("What gesture are you recording (e.g., 'Thank_You', 'ILoveYou')? ")
+glove_id = args.glove if args.glove is not None else \
+    input("Which glove is this (calibration profile name, Enter to skip)? ").strip()
 
 # Set up serial connection (make sure COM port is correct guys! You can check this in your arduino IDE)
-ser = serial.Serial('/dev/cu.usbmodem21101', 9600)
+# GLOVE_PORT or --port overrides it, e.g. for the virtual glove (machine_learning/gloveSimulator.py)
+ser = serial.Serial(args.port, args.baud, timeout=0.05 if args.session else None)
 time.sleep(2)
 
+# per-sensor min/max from a few open hand / fist poses, saved as
+# machine_learning/calibrations/<glove>.json (interpreters use it with GLOVE_ID=<glove>)
+if glove_id and sys.stdin.isatty() and \
+        input(f"Calibrate '{glove_id}' now? [y/N] ").strip().lower().startswith("y"):
+    profile = capture(ser, glove_id)
+    print(f"Calibration saved: {save_profile(profile)}")
+    print(f"  min {profile['min']}\n  max {profile['max']}")
+
+
+# ── session mode ──────────────────────────────────────────────────────────────
+def cbreak_stdin():
+    """
+    single key presses without Enter on a POSIX terminal; returns the
+    function that puts the terminal back. called on the main thread: a daemon
+    thread's finally doesn't run when the script exits under it
+    """
+    if os.name == "nt" or not sys.stdin.isatty():
+        return lambda: None
+    import termios
+    import tty
+    fd = sys.stdin.fileno()
+    old = termios.tcgetattr(fd)
+    tty.setcbreak(fd)
+    return lambda: termios.tcsetattr(fd, termios.TCSADRAIN, old)
+
+
+def key_reader(keys, stop):
+    """puts single key presses on `keys` until `stop` is set (the terminal is set up by cbreak_stdin)"""
+    if os.name == "nt":
+        import msvcrt
+        while not stop.is_set():
+            if msvcrt.kbhit():
+                keys.put(msvcrt.getwch())
+            else:
+                time.sleep(0.02)
+    elif sys.stdin.isatty():
+        import select
+        while not stop.is_set():
+            if select.select([sys.stdin], [], [], 0.05)[0]:
+                keys.put(sys.stdin.read(1))
+    else:
+        # piped input: one key per line
+        for line in sys.stdin:
+            for ch in line.strip():
+                keys.put(ch)
+            if stop.is_set():
+                break
+
+
+def record_session():
+    from frameProtocol import FrameDecoder
+    from sessionRecorder import SessionWriter, RateMeter
+
+    out_dir = args.out or os.path.join(os.path.expanduser("~"), "Downloads", "recordings")
+    path = os.path.join(out_dir, time.strftime("session_%Y%m%d_%H%M%S.glv"))
+    calibration = profile_path(glove_id) if glove_id and os.path.exists(profile_path(glove_id)) else None
+    writer = SessionWriter(path, gestures, block=args.block, meta={
+        "glove": glove_id or None, "calibration": calibration,
+        "port": args.port, "baud": args.baud, "expected_rate": args.rate,
+        "host_time": time.time(),
+    })
+    decoder = FrameDecoder()
+    meter = RateMeter(args.rate)
+
+    keys, stop = queue.Queue(), threading.Event()
+    restore_terminal = cbreak_stdin()
+    reader = threading.Thread(target=key_reader, args=(keys, stop), daemon=True)
+    reader.start()
+
+    print(f"\nRecording session to: {path}")
+    for i, g in enumerate(gestures, 1):
+        print(f"  [{i}] {g}")
+    print("  [0] pause labelling   [q] stop\n")
+
+    ser.reset_input_buffer()
+    end = time.perf_counter() + args.duration if args.duration else None
+    next_status = time.perf_counter() + 1.0
+    try:
+        while end is None or time.perf_counter() < end:
+            while not keys.empty():
+                k = keys.get()
+                if k in ("q", "Q"):
+                    end = 0
+                elif k.isdigit() and int(k) <= len(gestures):
+                    writer.set_label(int(k) - 1)
+            # everything the port has buffered in one read
+            data = ser.read(ser.in_waiting or 1)
+            if data:
+                now = time.perf_counter()
+                frames = decoder.feed(data)
+                if len(frames):
+                    seq = decoder.seq if decoder.mode == "binary" else None
+                    writer.append(frames, now, seq)
+                    meter.update(now, len(frames))
+            if time.perf_counter() >= next_status:
+                next_status += 1.0
+                label = gestures[writer.label] if writer.label >= 0 else "(paused)"
+                print(f"\r{label:<14} {writer.rows + writer.n:>8} rows  {meter.measured:7.1f} Hz  "
+                      f"dropped {decoder.dropped or meter.missing}", end="", flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        # the terminal reader notices `stop` within 50 ms; piped stdin can
+        # block in a read, so don't wait on it forever
+        reader.join(timeout=0.5)
+        restore_terminal()
+
+    drops = dict(decoder.counters(), ascii_missing_estimate=meter.missing if decoder.mode != "binary" else None,
+                 missing_seq=list(decoder.missing))
+    writer.close(measured_rate=round(meter.measured, 2), drops=drops,
+                 label_counts=writer.label_counts())
+    print(f"\n\nSaved {writer.rows} rows to {path} ({writer.flushes} block writes, "
+          f"{writer.flush_seconds * 1e3:.1f} ms writing)")
+    for name, n in writer.label_counts().items():
+        print(f"  {name:<16} {n}")
+    if decoder.dropped:
+        print(f"⚠️  {decoder.dropped} frames dropped (sequence gaps), {decoder.crc_errors} CRC errors")
+    elif meter.missing and decoder.mode != "binary":
+        print(f"⚠️  ~{meter.missing} frames missing at {args.rate:g} Hz "
+              f"(measured {meter.measured:.1f} Hz)")
+    print(f"Export to CSVs: python machine_learning/sessionRecorder.py export-csv {path} --out <folder>")
+
+
+if args.session:
+    record_session()
+    ser.close()
+    sys.exit(0)
+
+
+# ── 20 sample mode ────────────────────────────────────────────────────────────
 # Save to local Downloads folder
-filename = f"/Users/srodr679/Downloads/{gesture_label}_data.csv"
+out_dir = args.out or os.path.join(os.path.expanduser("~"), "Downloads")
+os.makedirs(out_dir, exist_ok=True)
+filename = os.path.join(out_dir, f"{gesture_label}_data.csv")
 file_exists = os.path.exists(filename)
 
 
@@ -48,4 +217,4 @@ with open(filename, 'a', newline='') as f:
     except KeyboardInterrupt:
         print("\n Recording interrupted.")
 
-ser.close() 
\ No newline at end of file
+ser.close()
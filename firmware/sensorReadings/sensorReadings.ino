@@ -19,6 +19,58 @@ const int pinkyPin = A5;
 
 
 
+// 0 = ASCII lines (" 801, 802, 0, 795, 881, 2.32, 9.58, -0.60")
+// 1 = compact 19 byte binary frames, decoded by machine_learning/frameProtocol.py
+//     [0xA5][seq][5 x uint16 flex][3 x int16 accel * 100][crc8]
+#define BINARY_FRAMES 0
+
+const uint8_t FRAME_SYNC = 0xA5;
+const uint8_t FRAME_LEN = 19;
+uint8_t frameSeq = 0;
+
+
+
+
+// CRC-8, polynomial 0x07, init 0 (same as crc8() in frameProtocol.py)
+uint8_t crc8(const uint8_t *data, uint8_t len) {
+  uint8_t crc = 0;
+  for (uint8_t i = 0; i < len; i++) {
+    crc ^= data[i];
+    for (uint8_t b = 0; b < 8; b++) {
+      crc = (crc & 0x80) ? (crc << 1) ^ 0x07 : (crc << 1);
+    }
+  }
+  return crc;
+}
+
+
+
+
+void putInt16(uint8_t *dst, int16_t v) {
+  dst[0] = v & 0xFF;         // little endian
+  dst[1] = (v >> 8) & 0xFF;
+}
+
+
+
+
+void sendBinaryFrame(const int flex[5], float ax, float ay, float az) {
+  uint8_t frame[FRAME_LEN];
+  frame[0] = FRAME_SYNC;
+  frame[1] = frameSeq++;
+  for (uint8_t i = 0; i < 5; i++) {
+    putInt16(&frame[2 + 2 * i], flex[i]);
+  }
+  putInt16(&frame[12], (int16_t)round(ax * 100));
+  putInt16(&frame[14], (int16_t)round(ay * 100));
+  putInt16(&frame[16], (int16_t)round(az * 100));
+  frame[18] = crc8(&frame[1], FRAME_LEN - 2);
+  Serial.write(frame, FRAME_LEN);
+}
+
+
+
+
 void setup() {
   Serial.begin(9600);
   while (!Serial);
@@ -78,6 +130,10 @@ void loop() {
 
 
 
+#if BINARY_FRAMES
+  const int flex[5] = {thumbValue, indexValue, middleValue, ringValue, pinkyValue};
+  sendBinaryFrame(flex, accel.acceleration.x, accel.acceleration.y, accel.acceleration.z);
+#else
   Serial.print(" "); Serial.print(thumbValue);
   Serial.print(", "); Serial.print(indexValue);
   Serial.print(", "); Serial.print(middleValue);
@@ -86,6 +142,7 @@ void loop() {
   Serial.print(", "); Serial.print(accel.acceleration.x);
   Serial.print(", "); Serial.print(accel.acceleration.y);
   Serial.print(", "); Serial.println(accel.acceleration.z);
+#endif
 
 //  // Print labeled values to Serial Monitor
 //   Serial.print("Thumb: "); Serial.print(thumbValue);
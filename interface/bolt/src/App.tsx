@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useRef, useState } from 'react';
 
 // Define types for better TypeScript support
 interface GestureInfo {
@@ -18,7 +18,10 @@ interface HistoryItem {
   timestamp: string;
 }
 
-// Mock data for testing - replace with actual Bluetooth connection
+// machine_learning/predictionStream.py (python predictionStream.py --port COM3)
+const PREDICTION_STREAM_URL = 'ws://localhost:8765';
+
+// Mock data for testing, used when the prediction stream isn't running
 const mockGestures = {
   "hello": { image: "hello.png", description: "Hand open, fingers spread" },
   "thanks": { image: "thanks.png", description: "Hand to chest" },
@@ -40,17 +43,66 @@ function App() {
   const [history, setHistory] = useState([]);
   const [showHistory, setShowHistory] = useState(false);
   const [showAbout, setShowAbout] = useState(false);
+  const socketRef = useRef(null);
 
-  // Connect to the Arduino glove via Bluetooth
+  // Connect to the glove through the prediction stream
   const connectToGlove = () => {
     console.log("Connecting to glove...");
-    
-    setTimeout(() => {
+
+    const ws = new WebSocket(PREDICTION_STREAM_URL);
+    socketRef.current = ws;
+    let opened = false;
+    ws.onopen = () => {
+      opened = true;
       setConnected(true);
       console.log("Connected to glove!");
-      
-      startMockDataStream();
-    }, 1500);
+    };
+    ws.onmessage = (event) => handleStreamMessage(JSON.parse(event.data));
+    ws.onerror = () => {
+      if (!opened) {
+        console.log("No prediction stream, using mock data");
+        setConnected(true);
+        startMockDataStream();
+      }
+    };
+    // stream stopped or the glove script exited: back to the connect screen
+    ws.onclose = () => {
+      if (socketRef.current === ws) socketRef.current = null;
+      if (opened) {
+        console.log("Prediction stream closed");
+        setConnected(false);
+      }
+    };
+  };
+
+  // first glove; v = [thumb, index, middle, ring, pinky, X, Y, Z]
+  const showSensors = (glove) => {
+    if (glove) {
+      setSensorData({ index: glove.v[1], middle: glove.v[2], ring: glove.v[3], pinky: glove.v[4] });
+    }
+  };
+
+  const handleStreamMessage = (msg) => {
+    if (msg.type === 'connection') {
+      // the current state comes with the hello, so the first render doesn't wait for a change
+      const glove = Object.values(msg.latest || {})[0];
+      showSensors(glove);
+      if (glove && glove.gesture && glove.gesture !== 'Unknown' && glove.gesture !== 'Error') {
+        setCurrentWord(glove.gesture.trim());
+        setCurrentGesture(mockGestures[glove.gesture.trim()]);
+      }
+      return;
+    }
+    if (msg.type !== 'prediction') return;
+
+    showSensors(Object.values(msg.gloves)[0]);
+
+    // smoothed gesture changes: [glove, gesture, score, time]
+    msg.events.forEach(([, gesture]) => {
+      if (gesture !== 'Unknown' && gesture !== 'Error') {
+        processRecognizedWord(gesture.trim());
+      }
+    });
   };
 
   const startMockDataStream = () => {
@@ -127,6 +179,10 @@ function App() {
   };
 
   const resetConnection = () => {
+    if (socketRef.current) {
+      socketRef.current.close();
+      socketRef.current = null;
+    }
     setConnected(false);
     setShowHistory(false);
     setCurrentWord("");
@@ -1,74 +1,204 @@
 import serial
 import numpy as np
-import pandas as pd 
-import joblib
-from collections import Counter
 import os
+import sys
+import time
 print("Current working directory:", os.getcwd())
 
 #ensures that the pkl files are read without having to specifically declare path
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# shared helpers (forestEngine, ...) live one level up in machine_learning/
+sys.path.insert(0, os.path.dirname(BASE_DIR))
+from forestEngine import load_compiled_forest
+from batchInference import read_batch, predict_confident_batch, BatchStats
+from frameProtocol import FrameDecoder
+from fusedPreprocess import FusedPreprocessor
+from smoothing import make_smoother
+from modelBundle import BUNDLE_NAME, load_current_bundle
+from calibration import apply_calibration, load_reference
+from predictionCache import cache_from_env
+from cascade import cascade_from_env
+from hotReload import reloader_from_env
+# per-frame output is off by default: GLOVE_VERBOSE=1 prints every smoothed
+# gesture, 2 also the raw bytes and predictions. counters / histograms are on
+# http://127.0.0.1:9108/metrics (see metrics.py)
+from metrics import InterpreterMetrics, VERBOSE
+
 model_pkl = os.path.join(BASE_DIR, "gesture_model.pkl")
 scaler_pkl = os.path.join(BASE_DIR, "scaler.pkl")
 encoder_pkl = os.path.join(BASE_DIR, "label_encoder.pkl")
+bundle_path = os.path.join(BASE_DIR, BUNDLE_NAME)
+
+# None without a bundle, or when the pickles were retrained after it was
+# exported (modelBundle.stale_sources): then the pickles below are used
+bundle = load_current_bundle(bundle_path)
+if bundle is not None:
+    # one memory-mapped file from `modelBundle.py export`: compiled forest,
+    # scaler constants and labels, no sklearn or pickles needed
+    model = fast_model = bundle.model
+    encoder, preprocess = bundle.encoder, bundle.preprocess
+else:
+    import joblib
+    # model stays the sklearn forest for the checks below, fast_model is the
+    # compiled copy used per frame (same probabilities, no sklearn overhead)
+    model, fast_model = load_compiled_forest(model_pkl)
+    scaler = joblib.load(scaler_pkl)
+    encoder = joblib.load(encoder_pkl)
+
+    # scaler as a precomputed float32 affine step, no DataFrame needed per frame
+    preprocess = FusedPreprocessor.from_scaler(scaler)
 
-model = joblib.load(model_pkl)
-scaler = joblib.load(scaler_pkl)
-encoder = joblib.load(encoder_pkl)
+# per-glove calibration (calibration.py): GLOVE_ID=<profile> maps this glove's
+# sensor ranges onto the ranges the model was trained with
+preprocess = apply_calibration(preprocess, os.environ.get("GLOVE_ID"), load_reference(BASE_DIR))
+# optional LRU cache of the predictions for repeated frames (predictionCache.py),
+# GLOVE_CACHE=<frames> turns it on
+cache = cache_from_env(BASE_DIR, preprocess)
+# optional cheap first stage (cascade.py fit) that answers the easy frames,
+# the full model only runs on the rest; GLOVE_CASCADE=1 turns it on
+fast_model = cascade_from_env(BASE_DIR, fast_model, preprocess)
+# retrained files in this folder are loaded, checked and swapped in between
+# frames without a restart (hotReload.py); GLOVE_RELOAD=0 turns it off
+reloader = reloader_from_env(BASE_DIR, "rf_scaler", (fast_model, preprocess, encoder), cache)
 
-ser = serial.Serial('COM4', 9600) 
+# GLOVE_PORT overrides the port, e.g. for the virtual glove (gloveSimulator.py)
+ser = serial.Serial(os.environ.get("GLOVE_PORT", 'COM4'), 9600) 
 print("Model input dtype check:")
 print(type(model))
 print("Number of features:", model.n_features_in_)
-print("First tree type check:", type(model.estimators_[0].tree_.threshold))
-print("Tree threshold dtype:", model.estimators_[0].tree_.threshold.dtype)
+if hasattr(model, "estimators_"):
+    print("First tree type check:", type(model.estimators_[0].tree_.threshold))
+    print("Tree threshold dtype:", model.estimators_[0].tree_.threshold.dtype)
+else:
+    print("Tree threshold dtype:", model.threshold.dtype)
 
 
-def predict_confident_gesture(model, scaler, encoder, sensor_input_raw, threshold=0.75):
+def predict_confident_gesture(model, preprocess, encoder, sensor_input_raw, threshold=0.75):
     try:
-        # Convert input to float32
-        sensor_input_array = np.array(sensor_input_raw, dtype=np.float32).reshape(1, -1)
-        print("Input dtype:", sensor_input_array.dtype)
+        t = time.perf_counter()
+        key, probs = cache.lookup(sensor_input_raw) if cache is not None else (None, None)
+        if probs is None:
+            # Copy into the float32 frame buffer and scale it in place
+            scaled_input = preprocess.transform_frame(sensor_input_raw)
+            t = metrics.stage("preprocess", t)
+            if VERBOSE >= 2:
+                print("Input dtype:", scaled_input.dtype)
 
-        # DataFrame for scaler
-        sensor_input_df = pd.DataFrame(sensor_input_array, columns=scaler.feature_names_in_)
-        scaled_input = scaler.transform(sensor_input_df)
-
-        # Predict probabilities
-        probs = model.predict_proba(scaled_input)
+            # Predict probabilities
+            probs = model.predict_proba(scaled_input)
+            if cache is not None:
+                probs = cache.store(key, probs)
+            stage = "predict"
+        else:
+            stage = "cache_hit"
         pred_index = np.argmax(probs)
         confidence = probs[0][pred_index]
-        gesture = encoder.inverse_transform([pred_index])[0]
+        gesture = encoder.classes_[pred_index]
+        metrics.stage(stage, t)
 
-        print(f"Prediction: {gesture} | Confidence: {confidence:.2f}")
+        if VERBOSE >= 2:
+            print(f"Prediction: {gesture} | Confidence: {confidence:.2f}")
 
-        if confidence >= threshold:
-            return gesture
-        else:
-            return "Unknown"
+        if confidence < threshold:
+            gesture = "Unknown"
+        metrics.prediction(gesture, confidence)
+        return gesture, probs[0]
 
     except Exception as e:
+        metrics.errors.inc()
         print("❌ Prediction error:", e)
-        return "Error"
+        return "Error", None
 
-while True:
-    line = ser.readline().decode('utf-8').strip()
-    print(f"Raw line from glove: '{line}'")
-    
-    
-    # Skip any lines that aren't valid sensor data
-    if not any(char.isdigit() for char in line) or "Initializing" in line:
-        print("Ignored:", line)
-        continue
 
-    try:
-        parts = [float(x.strip()) for x in line.split(",")]
-        if len(parts) == 8:
-            gesture = predict_confident_gesture(model, scaler, encoder, parts)
-            print("🖐 Gesture Detected:", gesture)
+# Smoothing of the per-frame predictions (see smoothing.py):
+# "none", "vote", "majority", "prob", "ema", or any of them + "+hysteresis"
+SMOOTHING = "none"
+WINDOW_SIZE = 5
+smoother = make_smoother(SMOOTHING, classes=encoder.classes_, window=WINDOW_SIZE)
+
+
+def report_gesture(gesture, probs=None):
+    t = time.perf_counter()
+    smoothed, _ = smoother.update(gesture, probs)
+    metrics.stage("smooth", t)
+    # only changes by default, every frame at GLOVE_VERBOSE=1
+    if metrics.gesture_changed(smoothed) or VERBOSE >= 1:
+        reason = smoother.describe()
+        if reason:
+            print("🖐 Gesture Detected:", smoothed, reason)
         else:
-            print("⚠️ Invalid data format:", line)
-    except Exception as e:
-        print("❌ Error:", e)
+            print("🖐 Gesture Detected:", smoothed)
+
+
+# everything waiting on the port is read in one call and parsed in one pass
+# (frameProtocol.py): a partial line stays in the decoder until the rest
+# arrives, "Initializing..." / status lines and malformed lines are counted
+decoder = FrameDecoder("ascii")
+
+
+def read_frames():
+    """blocks for the next bytes, returns the complete frames as an (n, 8) float32 array"""
+    data = ser.read(ser.in_waiting or 1)
+    t = time.perf_counter()
+    if VERBOSE >= 2:
+        print(f"Raw bytes from glove: {data!r}")
+    frames = decoder.feed(data)
+    metrics.decoded(decoder, frames)
+    if len(frames):
+        metrics.stage("parse", t)
+    return frames
+
+
+# Micro-batching: every frame already waiting on the port is scored with one
+# predict_proba call (see batchInference.py). Results print in arrival order,
+# same as the one-frame-at-a-time loop.
+BATCH_MODE = False
+BATCH_SIZE = 32        # most frames per predict_proba call
+BATCH_DEADLINE = 0.02  # seconds to keep collecting after the first frame
+
+metrics = InterpreterMetrics().start()
+if cache is not None:
+    metrics.registry.collect("cache", cache.stats)
+# the cascade in use, also after a reload
+metrics.registry.collect("cascade", reloader.cascade_stats)
+metrics.registry.collect("reload", reloader.stats)
+
+if BATCH_MODE:
+    stats = BatchStats()
+    while True:
+        frames, arrivals = read_batch(ser, decoder, BATCH_SIZE, BATCH_DEADLINE)
+        state = reloader.poll()
+        if state is not None:
+            fast_model, preprocess, encoder = state
+            smoother = make_smoother(SMOOTHING, classes=encoder.classes_, window=WINDOW_SIZE)
+        metrics.decoded(decoder, frames)
+
+        t = time.perf_counter()
+        try:
+            gestures, confidences, probs = predict_confident_batch(fast_model, encoder, frames,
+                                                                   transform=preprocess.transform,
+                                                                   return_probs=True)
+        except Exception as e:
+            metrics.errors.inc(len(frames))
+            print("❌ Prediction error:", e)
+            gestures, confidences, probs = ["Error"] * len(frames), None, [None] * len(frames)
+        metrics.stage("predict_batch", t)
+        stats.record(arrivals)
+
+        for i, (gesture, p) in enumerate(zip(gestures, probs)):
+            if confidences is not None:
+                metrics.prediction(gesture, confidences[i])
+            report_gesture(gesture, p)
+        stats.maybe_report()
+
+while True:
+    for parts in read_frames():
+        # a reloaded model goes in between frames; the old votes go with the old model
+        state = reloader.poll()
+        if state is not None:
+            fast_model, preprocess, encoder = state
+            smoother = make_smoother(SMOOTHING, classes=encoder.classes_, window=WINDOW_SIZE)
+        gesture, probs = predict_confident_gesture(fast_model, preprocess, encoder, parts)
+        report_gesture(gesture, probs)
 
 
@@ -1,101 +1,170 @@
 import os
+import sys
 import time
 import serial
 import numpy as np
-import joblib
-from collections import Counter, deque
-
-from normalizeFunction import normalize  # your helper
 
 # -----------------------------------------------------------------------------
-# 1. Load model, scaler, encoder (all in same dir)
+# 1. Load model, scaler, encoder (model.bundle, or the pickles in the same dir)
 # -----------------------------------------------------------------------------
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-model    = joblib.load(os.path.join(BASE_DIR, "gesture_model.pkl"))
-scaler   = joblib.load(os.path.join(BASE_DIR, "scaler.pkl"))
-encoder  = joblib.load(os.path.join(BASE_DIR, "label_encoder.pkl"))
+# shared helpers (fusedPreprocess, ...) live one level up in machine_learning/
+sys.path.insert(0, os.path.dirname(BASE_DIR))
+from fusedPreprocess import mlp_preprocessor
+from serialReader import FrameRing, SerialReader
+from smoothing import make_smoother
+from modelBundle import BUNDLE_NAME, load_current_bundle
+from calibration import apply_calibration, load_reference
+from predictionCache import cache_from_env
+from cascade import cascade_from_env
+from hotReload import reloader_from_env
+# per-frame output is off by default: GLOVE_VERBOSE=1 prints every frame's
+# prediction. counters / histograms are on http://127.0.0.1:9108/metrics
+from metrics import InterpreterMetrics, VERBOSE
+
+bundle_path = os.path.join(BASE_DIR, BUNDLE_NAME)
+# None without a bundle, or when the pickles were retrained after it was
+# exported (modelBundle.stale_sources): then the pickles below are used
+bundle = load_current_bundle(bundle_path)
+if bundle is not None:
+    # one memory-mapped file from `modelBundle.py export`: MLP weights,
+    # normalize + scaler constants, feature order and labels; no sklearn needed
+    model    = bundle.model
+    encoder  = bundle.encoder
+    FEATURE_NAMES = bundle.features
+    preprocess    = bundle.preprocess
+else:
+    import joblib
+    model    = joblib.load(os.path.join(BASE_DIR, "gesture_model.pkl"))
+    scaler   = joblib.load(os.path.join(BASE_DIR, "scaler.pkl"))
+    encoder  = joblib.load(os.path.join(BASE_DIR, "label_encoder.pkl"))
+
+    # Grab the exact feature order from scaler
+    if hasattr(scaler, "feature_names_in_"):
+        FEATURE_NAMES = list(scaler.feature_names_in_)
+    else:
+        # fallback if missing
+        FEATURE_NAMES = [f"F{i+1}" for i in range(model.n_features_in_)]
+
+    # normalize (flex 100/700, IMU -1/2) + scaler folded into one float32 affine step
+    preprocess = mlp_preprocessor(scaler)
+
+# per-glove calibration (calibration.py): GLOVE_ID=<profile> maps this glove's
+# sensor ranges onto the ranges the model was trained with
+preprocess = apply_calibration(preprocess, os.environ.get("GLOVE_ID"), load_reference(BASE_DIR))
+# optional LRU cache of the predictions for repeated frames (predictionCache.py),
+# GLOVE_CACHE=<frames> turns it on
+cache = cache_from_env(BASE_DIR, preprocess)
+# optional cheap first stage (cascade.py fit) that answers the easy frames,
+# the full model only runs on the rest; GLOVE_CASCADE=1 turns it on
+model = cascade_from_env(BASE_DIR, model, preprocess)
+# retrained files in this folder are loaded, checked and swapped in between
+# frames without a restart (hotReload.py); GLOVE_RELOAD=0 turns it off
+reloader = reloader_from_env(BASE_DIR, "mlp", (model, preprocess, encoder), cache)
 
 print("✅ Loaded:", type(model).__name__)
 print("🎯 Expecting", model.n_features_in_, "features")
 print("🧠 Classes:", encoder.classes_)
 
-# Grab the exact feature order from scaler
-if hasattr(scaler, "feature_names_in_"):
-    FEATURE_NAMES = list(scaler.feature_names_in_)
-else:
-    # fallback if missing
-    FEATURE_NAMES = [f"F{i+1}" for i in range(model.n_features_in_)]
+CLASSES    = encoder.classes_
 
 # -----------------------------------------------------------------------------
 # 2. Open serial port
 # -----------------------------------------------------------------------------
-ser = serial.Serial("COM4", 9600, timeout=1)
+# GLOVE_PORT overrides the port, e.g. for the virtual glove (gloveSimulator.py)
+ser = serial.Serial(os.environ.get("GLOVE_PORT", "COM4"), 9600, timeout=1)
 time.sleep(2)
 
+# a reader thread drains the port into a fixed ring of frames; the loop below
+# always scores the newest one instead of sleeping and falling behind
+RING_SIZE       = 256
+OVERFLOW_POLICY = "drop-oldest"   # or "block"
+reader = SerialReader(ser, FrameRing(RING_SIZE, policy=OVERFLOW_POLICY)).start()
+
+# banners / malformed lines are counted by the reader's decoder
+metrics = InterpreterMetrics()
+metrics.registry.collect("reader", reader.counters)
+if cache is not None:
+    metrics.registry.collect("cache", cache.stats)
+# the cascade in use, also after a reload
+metrics.registry.collect("cascade", reloader.cascade_stats)
+metrics.registry.collect("reload", reloader.stats)
+metrics.start()
+
 # -----------------------------------------------------------------------------
 # 3. Prediction function
 # -----------------------------------------------------------------------------
 def predict_gesture(raw, threshold=0.45):
     """
     raw: list of 8 floats [F1..F5, X,Y,Z] (raw sensor values)
-    returns (gesture_string, confidence_float)
+    returns (gesture_string, confidence_float, probabilities)
     """
-    # normalize each portion exactly as during data collection
-    flex_n = normalize(raw[:5], 100, 700)
-    imu_n  = normalize(raw[5:],  -1,   2)
-
-    # build a DataFrame so scaler sees valid feature names
-    arr = np.array(flex_n + imu_n, dtype=np.float32).reshape(1, -1)
-    # wrap in pandas to preserve column names
-    import pandas as pd
-    df = pd.DataFrame(arr, columns=FEATURE_NAMES)
-
-    # scale
-    scaled = scaler.transform(df)
-
-    # predict probabilities
-    probs = model.predict_proba(scaled)[0]
+    t = time.perf_counter()
+    key, probs = cache.lookup(raw) if cache is not None else (None, None)
+    if probs is None:
+        # normalize + scale in one in-place step (same constants as data collection)
+        scaled = preprocess.transform_frame(raw)
+        t = metrics.stage("preprocess", t)
+
+        # predict probabilities
+        probs = model.predict_proba(scaled)[0]
+        if cache is not None:
+            probs = cache.store(key, probs)
+        stage = "predict"
+    else:
+        stage = "cache_hit"
     idx   = int(np.argmax(probs))
     conf  = float(probs[idx])
-    gest  = encoder.inverse_transform([idx])[0]
+    gest  = CLASSES[idx]
+    metrics.stage(stage, t)
 
-    return (gest if conf >= threshold else "Unknown"), conf
+    gest = gest if conf >= threshold else "Unknown"
+    metrics.prediction(gest, conf)
+    return gest, conf, probs
 
 # -----------------------------------------------------------------------------
 # 4. Live loop + smoothing
 # -----------------------------------------------------------------------------
-window = deque(maxlen=5)
+# "vote" = most common of the last 5, needs 3 votes and Unknown never wins.
+# Others (smoothing.py): "none", "majority", "prob", "ema", + "+hysteresis"
+SMOOTHING = "vote"
+smoother  = make_smoother(SMOOTHING, classes=CLASSES, window=5)
 
 print("🕹️  Starting gesture interpreter...")
 
 while True:
     try:
-        line = ser.readline().decode("utf-8", errors="ignore").strip()
-        if not line or "Initializing" in line:
-            continue
-
-        parts = line.split(",")
-        if len(parts) != 8:
-            # ignore malformed
+        # newest complete frame (banners / malformed lines already dropped)
+        frames, _ = reader.ring.latest(1, timeout=1.0)
+        if not len(frames):
             continue
 
-        raw_vals = [float(x) for x in parts]
-        gesture, confidence = predict_gesture(raw_vals, threshold=0.75)
-
-        window.append(gesture)
-        top, freq = Counter(window).most_common(1)[0]
-
-        # print raw + smoothed
-        print(f"Raw Pred: {gesture} ({confidence:.0%})", end=" | ")
-        if freq >= 3 and top != "Unknown":
-            print(f"Smoothed: {top}")
-        else:
-            print("Smoothed: Unknown")
-
-        time.sleep(0.5)
+        raw_vals = frames[-1]
+        metrics.frames.inc()
+        # a reloaded model goes in between frames; the old votes go with the old model
+        state = reloader.poll()
+        if state is not None:
+            model, preprocess, encoder = state
+            CLASSES  = encoder.classes_
+            smoother = make_smoother(SMOOTHING, classes=CLASSES, window=5)
+        try:
+            gesture, confidence, probs = predict_gesture(raw_vals, threshold=0.75)
+        except Exception:
+            metrics.errors.inc()
+            raise
+        t = time.perf_counter()
+        smoothed, _ = smoother.update(gesture, probs)
+        metrics.stage("smooth", t)
+
+        # print raw + smoothed: every frame at GLOVE_VERBOSE=1, otherwise on changes
+        if metrics.gesture_changed(smoothed) or VERBOSE >= 1:
+            print(f"Raw Pred: {gesture} ({confidence:.0%})", end=" | ")
+            print(f"Smoothed: {smoothed}")
 
     except KeyboardInterrupt:
         print("\n🛑 Interrupted by user. Exiting.")
+        print("📊 Reader:", reader.counters())
+        reader.stop()
         break
 
     except Exception as e:
@@ -1,34 +1,94 @@
 import os
+import sys
 import tkinter as tk
 from tkinter import ttk
-import serial, joblib, numpy as np, threading, time
-from collections import deque, Counter
+import serial, numpy as np, threading, time
 from PIL import Image, ImageTk
-from normalizeFunction import normalize
 import colorsys
 
 # ─── 1) Load Model Artifacts ───────────────────────────────────────────────────
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-model    = joblib.load(os.path.join(BASE_DIR, "gesture_model.pkl"))
-scaler   = joblib.load(os.path.join(BASE_DIR, "scaler.pkl"))
-encoder  = joblib.load(os.path.join(BASE_DIR, "label_encoder.pkl"))
+# shared helpers (fusedPreprocess, ...) live one level up in machine_learning/
+sys.path.insert(0, os.path.dirname(BASE_DIR))
+from fusedPreprocess import mlp_preprocessor
+from serialReader import FrameRing, SerialReader
+from smoothing import make_smoother
+from modelBundle import BUNDLE_NAME, load_current_bundle
+from calibration import apply_calibration, load_reference
+from predictionCache import cache_from_env
+from cascade import cascade_from_env
+from hotReload import reloader_from_env
+from tkRender import TkRenderer
+# counters / histograms on http://127.0.0.1:9108/metrics (see metrics.py),
+# GLOVE_VERBOSE=2 prints every smoothed label to the console
+from metrics import InterpreterMetrics, VERBOSE
+
+bundle_path = os.path.join(BASE_DIR, BUNDLE_NAME)
+# None without a bundle, or when the pickles were retrained after it was
+# exported (modelBundle.stale_sources): then the pickles below are used
+bundle = load_current_bundle(bundle_path)
+if bundle is not None:
+    # one memory-mapped file from `modelBundle.py export`, no sklearn needed
+    model      = bundle.model
+    encoder    = bundle.encoder
+    preprocess = bundle.preprocess
+else:
+    import joblib
+    model    = joblib.load(os.path.join(BASE_DIR, "gesture_model.pkl"))
+    scaler   = joblib.load(os.path.join(BASE_DIR, "scaler.pkl"))
+    encoder  = joblib.load(os.path.join(BASE_DIR, "label_encoder.pkl"))
+
+    # normalize (flex 100/700, IMU -1/2) + scaler folded into one float32 affine step
+    preprocess = mlp_preprocessor(scaler)
+
+# per-glove calibration (calibration.py): GLOVE_ID=<profile> maps this glove's
+# sensor ranges onto the ranges the model was trained with
+preprocess = apply_calibration(preprocess, os.environ.get("GLOVE_ID"), load_reference(BASE_DIR))
+# optional LRU cache of the predictions for repeated frames (predictionCache.py),
+# GLOVE_CACHE=<frames> turns it on
+cache = cache_from_env(BASE_DIR, preprocess)
+# optional cheap first stage (cascade.py fit) that answers the easy frames,
+# the full model only runs on the rest; GLOVE_CASCADE=1 turns it on
+model = cascade_from_env(BASE_DIR, model, preprocess)
+# retrained files in this folder are loaded, checked and swapped in between
+# frames without a restart (hotReload.py); GLOVE_RELOAD=0 turns it off
+reloader = reloader_from_env(BASE_DIR, "mlp", (model, preprocess, encoder), cache)
+
+CLASSES    = encoder.classes_
 
 # ─── 2) Serial Port Setup ─────────────────────────────────────────────────────
-ser = serial.Serial("COM4", 9600, timeout=1)
+# GLOVE_PORT overrides the port, e.g. for the virtual glove (gloveSimulator.py)
+ser = serial.Serial(os.environ.get("GLOVE_PORT", "COM4"), 9600, timeout=1)
 time.sleep(2)
 
+# a reader thread drains the port into a fixed ring of frames; the inference
+# loop always scores the newest one, so it never falls behind the glove
+RING_SIZE       = 256
+OVERFLOW_POLICY = "drop-oldest"   # or "block"
+reader = SerialReader(ser, FrameRing(RING_SIZE, policy=OVERFLOW_POLICY)).start()
+
+# banners / malformed lines are counted by the reader's decoder
+metrics = InterpreterMetrics()
+metrics.registry.collect("reader", reader.counters)
+if cache is not None:
+    metrics.registry.collect("cache", cache.stats)
+# the cascade in use, also after a reload
+metrics.registry.collect("cascade", reloader.cascade_stats)
+metrics.registry.collect("reload", reloader.stats)
+
 # ─── 3) Prediction Function ───────────────────────────────────────────────────
 def predict_gesture(raw_values, threshold):
-    flex_n = normalize(raw_values[:5], 100, 700)
-    imu_n  = normalize(raw_values[5:],  -1,   2)
-    arr    = np.array(flex_n + imu_n, dtype=np.float32).reshape(1, -1)
-    arr_scl= scaler.transform(arr)
+    key, probs = cache.lookup(raw_values) if cache is not None else (None, None)
+    if probs is None:
+        arr_scl= preprocess.transform_frame(raw_values)
 
-    probs  = model.predict_proba(arr_scl)[0]
+        probs  = model.predict_proba(arr_scl)[0]
+        if cache is not None:
+            probs = cache.store(key, probs)
     idx    = np.argmax(probs)
     conf   = probs[idx]
-    gest   = encoder.inverse_transform([idx])[0]
-    return (gest, conf) if conf >= threshold else ("Unknown", conf)
+    gest   = CLASSES[idx]
+    return ((gest, conf) if conf >= threshold else ("Unknown", conf)), probs
 
 # ─── 4) Build Main Window ─────────────────────────────────────────────────────
 root = tk.Tk()
@@ -140,59 +200,98 @@ stop_btn.state(["disabled"])
 image_label = ttk.Label(right, text="No Image", font=("Arial",14))
 image_label.pack(expand=True)
 
-# ───12) Pastel Rainbow Background ─────────────────────────────────────────────
-hue = 0.0
-def animate_bg():
-    global hue, bg_color
-    hue = (hue + 0.003) % 1.0
-    r,g,b = colorsys.hsv_to_rgb(hue, 0.4, 0.9)
-    bg_color = f"#{int(r*255):02x}{int(g*255):02x}{int(b*255):02x}"
-    # update colors
+# ───12) Renderer ──────────────────────────────────────────────────────────────
+# the read loop only submits values; Tk redraws at most RENDER_FPS times a
+# second, and only the widgets whose value changed (tkRender.py)
+RENDER_FPS = 30
+renderer   = TkRenderer(root, fps=RENDER_FPS)
+metrics.registry.collect("render", renderer.stats)
+metrics.start()
+
+def show_conf(pct):
+    conf_var.set(pct)
+    conf_lbl.config(text=f"{pct}%")
+
+def show_gesture(sm):
+    smooth_var.set(sm)
+    img = loaded_images.get(sm)
+    if img:
+        image_label.config(image=img, text="")
+        image_label.image = img
+    else:
+        image_label.config(image="", text="No Image\nAvailable")
+
+def paint_bg(color):
+    # restyles the whole ttk theme, so it only runs when the color changes
+    global bg_color
+    bg_color = color
     root.configure(bg=bg_color)
     style.configure("TFrame", background=bg_color)
     style.configure("TLabel", background=bg_color)
     bottom.configure(bg=bg_color)
     logo_lbl.config(bg=bg_color)
-    root.after(50, animate_bg)
 
-animate_bg()
+renderer.bind_var("raw", raw_var).bind("conf", show_conf).bind("gesture", show_gesture)
+renderer.bind("bg", paint_bg).start()
+
+# the worker thread reads this float instead of calling threshold_var.get()
+threshold = threshold_var.get() / 100.0
+def on_threshold(*_):
+    global threshold
+    threshold = threshold_var.get() / 100.0
+threshold_var.trace_add("write", on_threshold)
 
-# ───13) Inference Loop ────────────────────────────────────────────────────────
-window, running = deque(maxlen=5), False
+# ───13) Pastel Rainbow Background ─────────────────────────────────────────────
+BG_FPS = 10    # background steps per second (0 = static), same speed as before
+hue = 0.0
+def animate_bg():
+    global hue
+    hue = (hue + 0.06 / BG_FPS) % 1.0
+    r,g,b = colorsys.hsv_to_rgb(hue, 0.4, 0.9)
+    renderer.submit(bg=f"#{int(r*255):02x}{int(g*255):02x}{int(b*255):02x}")
+    root.after(1000 // BG_FPS, animate_bg)
+
+if BG_FPS:
+    animate_bg()
+
+# ───14) Inference Loop ────────────────────────────────────────────────────────
+# "vote" = most common of the last 5, needs 3 votes and Unknown never wins.
+# Others (smoothing.py): "none", "majority", "prob", "ema", + "+hysteresis"
+SMOOTHING = "vote"
+smoother, running = make_smoother(SMOOTHING, classes=CLASSES, window=5), False
 
 def read_loop():
-    global running
-    window.clear()
+    global running, model, preprocess, encoder, CLASSES, smoother
+    smoother.reset()
     while running:
-        line = ser.readline().decode("utf-8", errors="ignore").strip()
-        if not line or "Initializing" in line:
-            continue
-        parts = line.split(",")
-        if len(parts) != 8: 
+        # newest complete frame (banners / malformed lines already dropped)
+        frames, _ = reader.ring.latest(1, timeout=0.5)
+        if not len(frames):
             continue
+        raw_vals = frames[-1]
+        metrics.frames.inc()
+        # a reloaded model goes in between frames; the old votes go with the old model
+        state = reloader.poll()
+        if state is not None:
+            model, preprocess, encoder = state
+            CLASSES  = encoder.classes_
+            smoother = make_smoother(SMOOTHING, classes=CLASSES, window=5)
+
+        t = time.perf_counter()
         try:
-            raw_vals = [float(x) for x in parts]
-        except:
-            continue
-
-        pred, conf = predict_gesture(raw_vals, threshold_var.get()/100.0)
-        raw_var.set(pred)
-        conf_var.set(conf*100)
-        conf_lbl.config(text=f"{conf*100:.0f}%")
-
-        window.append(pred)
-        top, freq = Counter(window).most_common(1)[0]
-        sm = top if (freq>=3 and top!="Unknown") else "Unknown"
-        smooth_var.set(sm)
-
-        img = loaded_images.get(sm)
-        if img:
-            image_label.config(image=img, text="")
-            image_label.image = img
-        else:
-            image_label.config(image="", text="No Image\nAvailable")
-
-        time.sleep(0.1)
+            (pred, conf), probs = predict_gesture(raw_vals, threshold)
+        except Exception:
+            metrics.errors.inc()
+            raise
+        t = metrics.stage("predict", t)
+        metrics.prediction(pred, conf)
+        sm, _ = smoother.update(pred, probs)
+        metrics.stage("smooth", t)
+        if VERBOSE >= 2:
+            print("🔍 Smoothed label is:", repr(sm))
+
+        # never touch Tk from this thread: hand the values to the renderer
+        renderer.submit(raw=pred, conf=int(round(conf * 100)), gesture=sm)
 
 def start_reading():
     global running
@@ -207,9 +306,11 @@ def stop_reading():
     running = False
     start_btn.state(["!disabled"])
     stop_btn.state(["disabled"])
+    print("📊 Reader:", reader.counters())
+    print("🖥  Render:", renderer.stats())
 
 start_btn.config(command=start_reading)
 stop_btn.config(command=stop_reading)
 
-# ───14) Launch GUI ────────────────────────────────────────────────────────────
+# ───15) Launch GUI ────────────────────────────────────────────────────────────
 root.mainloop()
@@ -4,14 +4,20 @@
 # rangeOfValues = range of whatever sensor (flex sensor = 100-800 = range of 700, etc)
 # example to normalize flex sensor -> (value of sensor - 100) / 700, 100 would be 0, 800 would be 1
 
+# minValue / rangeOfValues can also be one value per channel (see the glove's
+# profile in machine_learning/calibration.py), and values can be one frame or
+# a 2D array of frames; it's computed with numpy, no loop per value
+
 # returns a list with normalized values (all values between 0 and 1)
+# (a numpy array if values was one)
+
+import numpy as np
 
 def normalize(values, minValue, rangeOfValues):
     
-    normalizedValues = []
-    
-    for i in values:
-        # adjust round value as desired, will round to x decimal places
-        normalizedValues.append(round(((i - minValue)/rangeOfValues), 3)) 
+    # adjust round value as desired, will round to x decimal places
+    normalizedValues = np.round((np.asarray(values, dtype=float) - minValue) / rangeOfValues, 3)
         
-    return normalizedValues
\ No newline at end of file
+    if isinstance(values, np.ndarray):
+        return normalizedValues
+    return normalizedValues.tolist()
\ No newline at end of file
@@ -0,0 +1,111 @@
+# micro-batched inference for the serial interpreter loops
+
+# instead of readline -> predict -> readline -> predict, read_batch() pulls every
+# frame that is already waiting on the port (whole chunks through a
+# FrameDecoder, until max_batch frames are in or the deadline runs out) and
+# predict_confident_batch() scores all of them with one predict_proba call.
+# frames come back in the order they arrived, so the per-frame results and the
+# smoothing that runs on them do not change.
+
+import time
+from collections import deque
+
+import numpy as np
+
+
+def read_batch(ser, decoder, max_batch=32, deadline=0.02):
+    """
+    ser      : open serial.Serial (or anything with read() / in_waiting)
+    decoder  : frameProtocol.FrameDecoder, keeps a partial line for the next call
+    max_batch: stop collecting once this many frames are in (one read can bring more)
+    deadline : seconds to keep collecting after the first frame arrived
+    returns ((n, 8) float32 frames, [t_arrival] * n) in arrival order, n >= 1
+    """
+    frames, arrivals, stop_at = [], [], None
+    while len(arrivals) < max_batch:
+        # block for the first frame like the single-frame loop does
+        if stop_at is None or ser.in_waiting:
+            got = decoder.feed(ser.read(ser.in_waiting or 1))
+            if len(got):
+                t = time.perf_counter()
+                frames.append(got)
+                arrivals += [t] * len(got)
+                if stop_at is None:
+                    stop_at = t + deadline
+        elif time.perf_counter() < stop_at:
+            time.sleep(0.0005)
+        else:
+            break
+    return np.concatenate(frames), arrivals
+
+
+def predict_confident_batch(model, encoder, frames, threshold=0.75, transform=None,
+                            return_probs=False):
+    """
+    frames      : list of 8-value frames (or an (n, 8) array)
+    transform   : optional callable applied to the float32 (n, 8) array before
+                  predict_proba (e.g. the scaler)
+    return_probs: also return the (n, n_classes) probabilities (for smoothing.py)
+    returns (gestures, confidences) lists, one entry per frame
+    """
+    X = np.asarray(frames, dtype=np.float32).reshape(-1, 8)
+    if transform is not None:
+        X = transform(X)
+
+    probs = model.predict_proba(X)
+    idx   = np.argmax(probs, axis=1)
+    conf  = probs[np.arange(len(idx)), idx]
+    names = encoder.classes_.take(idx)
+
+    gestures = [str(g) if c >= threshold else "Unknown" for g, c in zip(names, conf)]
+    if return_probs:
+        return gestures, conf.tolist(), probs
+    return gestures, conf.tolist()
+
+
+class BatchStats:
+    """Throughput and tail latency (arrival on the port -> result) of batched scoring."""
+
+    def __init__(self, report_every=5.0, keep=5000):
+        self.report_every = report_every
+        self.latencies = deque(maxlen=keep)   # seconds, most recent frames only
+        self.batch_sizes = deque(maxlen=keep)
+        self.frames = 0
+        self.window_frames = 0
+        self.window_start = time.perf_counter()
+
+    def record(self, arrivals, t_done=None):
+        """arrivals: t_arrival of every frame scored in the batch"""
+        t_done = time.perf_counter() if t_done is None else t_done
+        self.latencies.extend(t_done - t for t in arrivals)
+        self.batch_sizes.append(len(arrivals))
+        self.frames += len(arrivals)
+        self.window_frames += len(arrivals)
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.window_start
+        lat = np.asarray(self.latencies) * 1000.0
+        p50, p95, p99 = np.percentile(lat, [50, 95, 99]) if len(lat) else (0.0, 0.0, 0.0)
+        return {
+            "frames_per_s": self.window_frames / elapsed if elapsed > 0 else 0.0,
+            "latency_ms_p50": float(p50),
+            "latency_ms_p95": float(p95),
+            "latency_ms_p99": float(p99),
+            "mean_batch": float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0,
+            "frames_total": self.frames,
+        }
+
+    def reset_window(self):
+        """starts a new frames_per_s window"""
+        self.window_frames = 0
+        self.window_start = time.perf_counter()
+
+    def maybe_report(self):
+        """Prints a one-line summary every report_every seconds."""
+        if time.perf_counter() - self.window_start < self.report_every:
+            return
+        s = self.summary()
+        print(f"📊 {s['frames_per_s']:.0f} frames/s | latency p50 {s['latency_ms_p50']:.1f} ms "
+              f"p95 {s['latency_ms_p95']:.1f} ms p99 {s['latency_ms_p99']:.1f} ms | "
+              f"avg batch {s['mean_batch']:.1f}")
+        self.reset_window()
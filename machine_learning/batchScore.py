@@ -0,0 +1,365 @@
+# offline batch scoring of recordings through an interpreter's pipeline
+
+# the only way to check a new gesture_model.pkl was to wear the glove and
+# watch the GUI. this runs recorded frames through what an interpreter variant
+# does per frame (gesturePipeline: the same scaler / normalize branch,
+# predict_proba, the 0.75 threshold, GLOVE_ID calibration with --glove, then
+# the variant's smoothing from smoothing.py), but --chunk frames per call:
+#
+#   raw       argmax of predict_proba, "Unknown" below --threshold
+#   smoothed  what the interpreter would show after smoothing
+#
+# the smoother (and a temporal model's window) starts fresh at every file /
+# label run, like temporalFeatures.dataset_features. "none", "vote" and
+# "majority" are computed for a whole run with numpy (smooth_codes), same
+# labels and same ties as feeding the smoother frame by frame
+# (benchmarks/batchScoreCheck.py); "prob", "ema" and "+hysteresis" run the
+# streaming smoothers frame by frame.
+#
+# prints per true label: frames, raw / smoothed accuracy and Unknown rate,
+# then the smoothed confusion matrix (rows: true label, columns: prediction).
+# labels are compared after datasetCache.normalize_label, so " Dale_New" from
+# the rf_raw encoder matches "Dale". labels the model doesn't know only get an
+# Unknown rate (how much of them it rejects).
+#
+# usage:
+#   python machine_learning/batchScore.py --variant rf_raw
+#   python machine_learning/batchScore.py --variant rf_scaler --json before.json
+#   python machine_learning/batchScore.py --variant rf_scaler --artifacts machine_learning/models/rf_scaler --baseline before.json
+#   python machine_learning/batchScore.py --variant mlp ~/Downloads/recordings/*.glv --out predictions.csv
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import warnings
+
+import numpy as np
+
+from calibration import apply_calibration, load_reference
+from datasetCache import Dataset, load_dataset, normalize_label, read_recording
+from gesturePipeline import VARIANTS, GesturePipeline, load_pipeline, variant_dir
+from smoothing import UNKNOWN, make_smoother
+from temporalFeatures import TemporalPreprocessor, extract, runs
+from trainModels import TRAIN_DEFAULTS
+
+
+# ── input ────────────────────────────────────────────────────────────────────
+def load_rows(paths=None, sources=None, sessions=None, classes=None):
+    """
+    the frames to score as a Dataset: the given .csv / .glv files (read
+    directly, not cached) or else the dataset cache, limited to sources
+    """
+    if not paths:
+        ds = load_dataset(sessions=sessions)
+        if sources is not None and sessions:
+            sources = list(sources) + ["session"]
+        return ds.select(sources=sources, classes=classes)
+
+    files, values, labels, row_file = [], [], [], []
+    for i, path in enumerate(paths):
+        X, y = read_recording(path)
+        files.append({"path": path, "source": "file", "rows": len(X)})
+        values.append(X)
+        labels.append(y)
+        row_file.append(np.full(len(X), i, dtype=np.int16))
+    names, y = np.unique(np.concatenate(labels), return_inverse=True)
+    ds = Dataset(np.concatenate(values), y.astype(np.int16), names, files, np.concatenate(row_file))
+    return ds.select(classes=classes) if classes else ds
+
+
+# ── scoring ──────────────────────────────────────────────────────────────────
+def sklearn_pipeline(pipeline, artifact_dir, sample):
+    """
+    the same pipeline with gesture_model.pkl's own predict_proba when that is
+    a forest: forestEngine walks 100 trees level by level in NumPy, which is
+    built for one frame at a time, sklearn is ~8x faster on 64k-frame batches.
+    returns None when there is no pickle / sklearn, or when the two don't give
+    identical probabilities on sample
+    """
+    path = os.path.join(artifact_dir, "gesture_model.pkl")
+    if not hasattr(pipeline.model, "n_trees") or not os.path.exists(path):
+        return None
+    try:
+        import joblib
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            model = joblib.load(path)
+    except Exception:
+        return None
+    fast = GesturePipeline(model, pipeline.preprocess, pipeline.classes, pipeline.threshold,
+                           name=pipeline.name)
+    if not np.array_equal(predict_run(fast, sample), predict_run(pipeline, sample)):
+        print(f"⚠️  {path} doesn't match the interpreter's model, scoring with forestEngine")
+        return None
+    return fast
+
+
+def predict_run(pipeline, X, chunk=65536):
+    """predict_proba of one contiguous recording (n, 8), chunk frames per call"""
+    pre = pipeline.preprocess
+    # FusedPreprocessor.transform works in place on writable float32 input
+    X = np.asarray(X).view()
+    X.flags.writeable = False
+    out = []
+    for a in range(0, len(X), chunk):
+        b = min(a + chunk, len(X))
+        if isinstance(pre, TemporalPreprocessor):
+            # the window reaches back window - 1 frames into the previous chunk
+            lead = min(a, pre.window - 1)
+            feats = extract(pre._raw(X[a - lead:b]), pre.window)[lead:].astype(np.float32)
+            out.append(pipeline.model.predict_proba(
+                pre.fused.transform(feats) if pre.fused is not None else feats))
+        else:
+            out.append(pipeline.predict_proba(X[a:b]))
+    return np.concatenate(out)
+
+
+def smooth_codes(name, codes, probs, classes, window=5, min_count=3):
+    """
+    codes: raw predictions of one run as class indices (len(classes) = Unknown)
+    returns the smoothed predictions the same way, equal to feeding a fresh
+    make_smoother(name) frame by frame
+    """
+    unknown = len(classes)
+    if name == "none":
+        return codes.copy()
+    if name not in ("vote", "majority"):
+        smoother = make_smoother(name, classes=classes, window=window)
+        names = np.append(np.asarray(classes, dtype=object), UNKNOWN)
+        lookup = {label: i for i, label in enumerate(names.tolist())}
+        return np.array([lookup[smoother.update(names[c], p)[0]] for c, p in zip(codes, probs)],
+                        dtype=codes.dtype)
+
+    n, w = len(codes), window
+    # label counts over the window ending at each frame, from a running sum
+    counts = np.zeros((n + 1, unknown + 1), dtype=np.int32)
+    counts[np.arange(1, n + 1), codes] = 1
+    np.cumsum(counts, axis=0, out=counts)
+    counts = counts[1:] - counts[np.maximum(np.arange(1, n + 1) - w, 0)]
+    # WindowCounts breaks ties by the oldest occurrence: age of it in frames
+    age = np.full((n, unknown + 1), -1, dtype=np.int32)
+    for k in range(min(w, n)):
+        age[np.arange(k, n), codes[:n - k]] = k
+    key = counts * (w + 1) + age
+    rows = np.arange(n)
+
+    if name == "vote":
+        top = np.argmax(key, axis=1)
+        keep = (counts[rows, top] >= min_count) & (top != unknown)
+        return np.where(keep, top, unknown).astype(codes.dtype)
+
+    key[:, unknown] = -1                # Unknown never makes the majority
+    top = np.argmax(key, axis=1)
+    out = np.where(counts[rows, top] > 1, top, codes).astype(codes.dtype)
+    out[:w - 1] = codes[:w - 1]         # window not full yet: the raw prediction
+    return out
+
+
+def score(pipeline, ds, smoothing, window=5, chunk=65536):
+    """returns (raw, confidence, smoothed) for every row; raw / smoothed are
+    indices into pipeline.classes, len(classes) meaning Unknown"""
+    n, unknown = len(ds), len(pipeline.classes)
+    raw = np.empty(n, dtype=np.int16)
+    conf = np.empty(n, dtype=np.float32)
+    smoothed = np.empty(n, dtype=np.int16)
+    spans = runs(np.stack([np.asarray(ds.row_file), np.asarray(ds.y)], axis=1))
+    # a frame's prediction only depends on that frame, so chunks can cross
+    # files; a temporal window has to restart at every run
+    if isinstance(pipeline.preprocess, TemporalPreprocessor):
+        blocks = spans
+    else:
+        blocks = [(a, min(a + chunk, n)) for a in range(0, n, chunk)]
+    streaming = smoothing not in ("none", "vote", "majority")
+    kept = []                           # probabilities, only the streaming smoothers use them
+    for start, stop in blocks:
+        probs = predict_run(pipeline, ds.X[start:stop], chunk)
+        idx = np.argmax(probs, axis=1)
+        top = probs[np.arange(len(idx)), idx]
+        idx[top < pipeline.threshold] = unknown
+        raw[start:stop] = idx
+        conf[start:stop] = top
+        if streaming:
+            kept.append(probs)
+    probs = np.concatenate(kept) if kept else None
+    for start, stop in spans:
+        smoothed[start:stop] = smooth_codes(smoothing, raw[start:stop],
+                                            probs[start:stop] if streaming else None,
+                                            pipeline.classes, window)
+    return raw, conf, smoothed
+
+
+# ── report ───────────────────────────────────────────────────────────────────
+def columns(classes):
+    """prediction names as the dataset spells them, Unknown last"""
+    return [normalize_label(str(c)) for c in classes] + [UNKNOWN]
+
+
+def report(ds, classes, raw, smoothed):
+    """per true label accuracy / Unknown rate (raw and smoothed) + smoothed confusion matrix"""
+    cols = columns(classes)
+    unknown = len(cols) - 1
+    y = np.asarray(ds.y, dtype=np.int64)
+    truth = np.array([cols.index(c) if c in cols[:-1] else -1 for c in ds.classes.tolist()],
+                     dtype=np.int64).take(y) if len(y) else np.empty(0, dtype=np.int64)
+    confusion = np.bincount(y * len(cols) + smoothed, minlength=len(ds.classes) * len(cols))
+    confusion = confusion.reshape(len(ds.classes), len(cols))
+
+    def rate(mask, values, target):
+        return float(np.mean(values[mask] == target[mask])) if mask.any() else None
+
+    per_class, present = {}, np.bincount(y, minlength=len(ds.classes)) > 0
+    for i, label in enumerate(ds.classes.tolist()):
+        if not present[i]:
+            continue
+        m = y == i
+        known = label in cols[:-1]
+        per_class[label] = {
+            "frames": int(m.sum()),
+            "known": known,
+            "raw_accuracy": rate(m, raw, truth) if known else None,
+            "accuracy": rate(m, smoothed, truth) if known else None,
+            "raw_unknown": float(np.mean(raw[m] == unknown)) if m.any() else None,
+            "unknown": float(np.mean(smoothed[m] == unknown)) if m.any() else None,
+        }
+    known = truth >= 0
+    unknown_code = np.full(len(y), unknown)
+    return {
+        "frames": int(len(y)),
+        "known_frames": int(known.sum()),
+        "raw_accuracy": rate(known, raw, truth),
+        "accuracy": rate(known, smoothed, truth),
+        "raw_unknown": rate(known, raw, unknown_code),
+        "unknown": rate(known, smoothed, unknown_code),
+        "rejected": rate(~known, smoothed, unknown_code),    # labels the model doesn't know
+        "classes": per_class,
+        "rows": ds.classes[present].tolist(),
+        "columns": cols,
+        "confusion": confusion[present].tolist(),
+    }
+
+
+def _pct(v):
+    return f"{v:.1%}" if v is not None else "-"
+
+
+def print_report(r):
+    print(f"   {'label':<12} {'frames':>7} {'raw acc':>8} {'acc':>7} {'raw Unk':>8} {'Unknown':>8}")
+    for label, c in r["classes"].items():
+        print(f"   {label:<12} {c['frames']:>7} {_pct(c['raw_accuracy']):>8} {_pct(c['accuracy']):>7} "
+              f"{_pct(c['raw_unknown']):>8} {_pct(c['unknown']):>8}{'' if c['known'] else '  (not in model)'}")
+    print(f"   {'all known':<12} {r['known_frames']:>7} {_pct(r['raw_accuracy']):>8} "
+          f"{_pct(r['accuracy']):>7} {_pct(r['raw_unknown']):>8} {_pct(r['unknown']):>8}")
+    if r["rejected"] is not None:
+        print(f"   {r['frames'] - r['known_frames']} frames of labels the model doesn't know, "
+              f"{r['rejected']:.1%} of them shown as Unknown")
+    print()
+
+    width = max(7, max(len(c) for c in r["columns"]) + 1)
+    print("   smoothed confusion matrix (rows: true label, columns: prediction)")
+    print(f"   {'':<12}" + "".join(f"{c[:width - 1]:>{width}}" for c in r["columns"]))
+    for label, counts in zip(r["rows"], r["confusion"]):
+        print(f"   {label:<12}" + "".join(f"{v:>{width}}" for v in counts))
+
+
+def compare(r, baseline, tolerance=0.0):
+    """prints the accuracy change against an earlier report; True if nothing dropped"""
+    ok = True
+    for key in ("raw_accuracy", "accuracy"):
+        old, new = baseline.get(key), r.get(key)
+        if old is None or new is None:
+            continue
+        worse = new < old - tolerance
+        ok &= not worse
+        print(f"{'❌' if worse else '✅'} {key.replace('_', ' ')}: {old:.2%} -> {new:.2%} ({new - old:+.2%})")
+    for label, c in r["classes"].items():
+        old = baseline.get("classes", {}).get(label, {}).get("accuracy")
+        if old is not None and c["accuracy"] is not None and c["accuracy"] < old - tolerance:
+            print(f"   ⚠️  {label}: {old:.1%} -> {c['accuracy']:.1%}")
+    return ok
+
+
+def write_predictions(path, ds, classes, raw, conf, smoothed):
+    """per-frame predictions: .npz (arrays) or .csv (file, row, label, raw, confidence, smoothed)"""
+    names = np.array(columns(classes), dtype=object)
+    row_file = np.asarray(ds.row_file)
+    row = np.empty(len(row_file), dtype=np.int64)
+    for start, stop in runs(row_file):
+        row[start:stop] = np.arange(stop - start)
+    if path.endswith(".npz"):
+        np.savez(path, file_index=row_file, row=row, label=ds.labels, raw=raw, confidence=conf,
+                 smoothed=smoothed, columns=names.astype(str),
+                 files=np.array([f["path"] for f in ds.files], dtype=str))
+        return
+    files = np.array([f["path"] for f in ds.files], dtype=object).take(row_file)
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["file", "row", "label", "raw", "confidence", "smoothed"])
+        w.writerows(zip(files.tolist(), row.tolist(), ds.labels.tolist(), names.take(raw).tolist(),
+                        np.round(conf, 4).tolist(), names.take(smoothed).tolist()))
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser(description="Score recordings through an interpreter's pipeline")
+    ap.add_argument("files", nargs="*", help=".csv / .glv recordings (default: the dataset cache)")
+    ap.add_argument("--variant", default="rf_raw", choices=list(VARIANTS))
+    ap.add_argument("--artifacts", help="model folder (default: the variant's interpreter folder)")
+    ap.add_argument("--sources", help="dataset sources without files (default per variant, 'all' for all)")
+    ap.add_argument("--sessions", action="append", help="also score the .glv sessions in this folder")
+    ap.add_argument("--classes", help="comma separated labels (default: all)")
+    ap.add_argument("--glove", default=os.environ.get("GLOVE_ID"), help="calibration profile")
+    ap.add_argument("--smoothing", help="smoothing.py method (default per variant)")
+    ap.add_argument("--window", type=int, default=5)
+    ap.add_argument("--threshold", type=float, default=0.75)
+    ap.add_argument("--chunk", type=int, default=65536, help="frames per predict_proba call")
+    ap.add_argument("--forest-engine", action="store_true",
+                    help="score forests with forestEngine like the interpreters (slower on big batches)")
+    ap.add_argument("--out", help="per-frame predictions, .csv or .npz")
+    ap.add_argument("--json", help="write the report as JSON (a later --baseline)")
+    ap.add_argument("--baseline", help="earlier --json report: exit 1 if accuracy dropped")
+    ap.add_argument("--tolerance", type=float, default=0.0, help="accuracy allowed to drop (e.g. 0.005)")
+    args = ap.parse_args()
+
+    sources = args.sources or TRAIN_DEFAULTS[args.variant]["sources"]
+    ds = load_rows(args.files, None if sources == "all" else sources.split(","), args.sessions,
+                   args.classes.split(",") if args.classes else None)
+    artifact_dir = args.artifacts or variant_dir(args.variant)
+    pipeline = load_pipeline(args.variant, artifact_dir, threshold=args.threshold)
+    pipeline.preprocess = apply_calibration(pipeline.preprocess, args.glove, load_reference(artifact_dir))
+    if not args.forest_engine:
+        pipeline = sklearn_pipeline(pipeline, artifact_dir, np.asarray(ds.X[:4096])) or pipeline
+    smoothing = args.smoothing or VARIANTS[args.variant]["smoothing"]
+
+    t0 = time.perf_counter()
+    raw, conf, smoothed = score(pipeline, ds, smoothing, args.window, args.chunk)
+    elapsed = time.perf_counter() - t0
+    print(f"📦 {len(ds)} frames from {len(set(np.asarray(ds.row_file).tolist()))} files, "
+          f"{args.variant} model in {os.path.relpath(artifact_dir)} ({type(pipeline.model).__name__}), "
+          f"smoothing {smoothing!r}")
+    print(f"⏱  scored in {elapsed:.2f} s ({len(ds) / max(elapsed, 1e-9):,.0f} frames/s)\n")
+
+    r = report(ds, pipeline.classes, raw, smoothed)
+    r.update(variant=args.variant, artifacts=os.path.relpath(artifact_dir), smoothing=smoothing,
+             window=args.window, threshold=args.threshold, scored=time.strftime("%Y-%m-%dT%H:%M:%S"))
+    print_report(r)
+
+    if args.out:
+        write_predictions(args.out, ds, pipeline.classes, raw, conf, smoothed)
+        print(f"\n💾 per-frame predictions: {args.out}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(r, f, indent=1)
+        print(f"💾 report: {args.json}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print()
+        return 0 if compare(r, baseline, args.tolerance) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
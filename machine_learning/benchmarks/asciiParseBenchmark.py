@@ -0,0 +1,129 @@
+# ASCII frame parsing: one readline per frame vs FrameDecoder.feed per read
+#
+# builds a stream the way sensorReadings.ino prints it (" 801, 802, ..., -0.60\r\n",
+# banners first) with --bad of the lines broken in different ways (cut short,
+# extra field, empty field, "1.2.3", garbage bytes, status text), then parses it:
+#   readline  what the interpreters did per frame: decode, strip, isdigit
+#             check, split, float() list in try/except
+#   feed      FrameDecoder("ascii").feed on reads of --chunk lines each (what
+#             ser.read(ser.in_waiting or 1) returns; about one line at 9600 baud)
+# also runs the stream through FrameDecoder in random sized reads, to check
+# that partial lines carry over and the result equals parsing it in one go,
+# and checks the np.array fast path gives the same values and counters as
+# parsing every line on its own.
+#
+# usage:
+#   python machine_learning/benchmarks/asciiParseBenchmark.py
+#   python machine_learning/benchmarks/asciiParseBenchmark.py --frames 20000 --chunk 1,32 --bad 0.02
+
+import os
+import sys
+import time
+import random
+import argparse
+
+import numpy as np
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ML_DIR)
+from frameProtocol import FrameDecoder, _parse_lines, encode_ascii, parse_ascii_chunk
+
+BROKEN = [
+    lambda line: line[:len(line) // 2] + b"\r\n",                 # cut short
+    lambda line: line[:-2] + b", 7\r\n",                           # extra field
+    lambda line: line.replace(b", ", b",, ", 1)[:-2] + b"\r\n",    # empty field (still 8 commas?)
+    lambda line: line.replace(b".", b".1.", 1),                    # "2.1.32"
+    lambda line: line[:5] + b"\xff\x00" + line[5:],                # noise bytes
+    lambda line: b"MPU6050 connected!\r\n",                        # status text
+    lambda line: b" , , , , , , , \r\n",                           # right commas, no numbers
+]
+
+
+def readline_parse(lines):
+    """the interpreters' loop body, once per line"""
+    rows = []
+    for raw in lines:
+        line = raw.decode("utf-8", errors="ignore").strip()
+        if not any(char.isdigit() for char in line) or "Initializing" in line:
+            continue
+        try:
+            parts = [float(x.strip()) for x in line.split(",")]
+        except Exception:
+            continue
+        if len(parts) == 8:
+            rows.append(parts)
+    return rows
+
+
+def make_stream(n, bad, rng):
+    flex = rng.integers(0, 1024, size=(n, 5))
+    accel = np.round(rng.uniform(-39.0, 39.0, size=(n, 3)), 2)
+    lines = [b"Initializing MPU6050...\r\n", b"MPU6050 connected!\r\n"]
+    pick = random.Random(0)
+    for row in np.hstack([flex, accel]):
+        line = encode_ascii(row)
+        lines.append(pick.choice(BROKEN)(line) if pick.random() < bad else line)
+    return lines
+
+
+def timed(fn, arg, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def feed_all(chunks):
+    decoder = FrameDecoder("ascii")
+    for chunk in chunks:
+        decoder.feed(chunk)
+    return decoder
+
+
+def main():
+    ap = argparse.ArgumentParser(description="ASCII frame parsing: readline per frame vs FrameDecoder.feed")
+    ap.add_argument("--frames", type=int, default=20000)
+    ap.add_argument("--chunk", default="1,8,32,256", help="lines per read, comma separated")
+    ap.add_argument("--bad", type=float, default=0.02, help="share of broken lines")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    lines = make_stream(args.frames, args.bad, rng)
+
+    # random sized reads through the decoder: partial lines must carry over
+    stream = b"".join(lines)
+    decoder, got, pos, cut = FrameDecoder("ascii"), [], 0, random.Random(2)
+    while pos < len(stream):
+        step = cut.randint(1, 300)
+        got.append(decoder.feed(stream[pos:pos + step]))
+        pos += step
+    expected = parse_ascii_chunk(stream)
+    ok = (np.array_equal(np.concatenate(got), expected[0])
+          and (decoder.banners, decoder.malformed) == expected[1:])
+    print(f"{'✅' if ok else '❌'} {len(expected[0])} frames, {expected[1]} banners, "
+          f"{expected[2]} malformed; random-sized reads "
+          f"{'give the same result' if ok else 'DIFFER from parsing the stream in one go'}\n")
+
+    per_line = _parse_lines(stream.decode("utf-8", errors="ignore").split("\n"))
+    same = np.array_equal(per_line[0], expected[0]) and per_line[1:] == expected[1:]
+    print(f"{'✅' if same else '❌'} fast path "
+          f"{'== line by line' if same else 'DIFFERS from parsing line by line'}\n")
+    ok = ok and same
+
+    n = len(lines)
+    base = timed(readline_parse, lines, args.repeat)
+    print(f"{n} lines, {args.bad:.0%} broken\n")
+    print(f"{'parser':<16} {'µs/frame':>9} {'frames/s':>11} {'speedup':>8}")
+    print(f"{'readline':<16} {base / n * 1e6:>9.2f} {n / base:>11.0f} {1.0:>7.1f}x")
+    for size in (int(c) for c in args.chunk.split(",")):
+        chunks = [b"".join(lines[i:i + size]) for i in range(0, n, size)]
+        t = timed(feed_all, chunks, args.repeat)
+        print(f"{f'feed {size} lines':<16} {t / n * 1e6:>9.2f} {n / t:>11.0f} {base / t:>7.1f}x")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
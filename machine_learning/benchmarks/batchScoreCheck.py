@@ -0,0 +1,137 @@
+# batchScore.py against the per-frame loop the interpreters run
+
+# checks that the batch path changes nothing:
+#   smoothing  smooth_codes() for "none" / "vote" / "majority" against feeding
+#              make_smoother() frame by frame, on random label streams with
+#              lots of ties and runs shorter than the window
+#   temporal   predict_run() in small chunks against TemporalPreprocessor fed
+#              one frame at a time (the window carried across chunks)
+#   pipeline   every variant on the cached dataset: batchScore.score() against
+#              transform_frame + the interpreter's model + threshold + smoother
+#              per frame, raw and smoothed labels identical
+# then times score() on the dataset tiled up to --frames rows, next to the
+# per-frame loop on a slice of it.
+#
+# usage:
+#   python machine_learning/benchmarks/batchScoreCheck.py
+#   python machine_learning/benchmarks/batchScoreCheck.py --frames 5000000 --variant rf_raw
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ML_DIR)
+from batchScore import predict_run, score, sklearn_pipeline, smooth_codes
+from datasetCache import Dataset, load_dataset
+from gesturePipeline import VARIANTS, GesturePipeline, load_pipeline, variant_dir
+from smoothing import UNKNOWN, make_smoother
+from temporalFeatures import N_FEATURES, TemporalPreprocessor, runs
+
+
+def check_smoothing(seed=0):
+    rng = np.random.default_rng(seed)
+    classes = np.array(["A", "B", "C"])
+    names = np.append(classes.astype(object), UNKNOWN)
+    for trial in range(300):
+        name = ("none", "vote", "majority")[trial % 3]
+        window = int(rng.integers(1, 9))
+        codes = rng.integers(0, len(names), size=int(rng.integers(0, 40))).astype(np.int16)
+        smoother = make_smoother(name, classes=classes, window=window)
+        expected = [smoother.update(names[c])[0] for c in codes]
+        got = names.take(smooth_codes(name, codes, None, classes, window)).tolist()
+        if got != expected:
+            print(f"❌ {name} window {window} differs on {codes.tolist()}")
+            return False
+    return True
+
+
+class Echo:
+    """model stand-in that returns its input, to compare the features themselves"""
+
+    def predict_proba(self, X):
+        return np.array(X, dtype=np.float64)
+
+
+def check_temporal(ds, window=10, chunk=7):
+    X = np.asarray(ds.X[:500])
+    pipeline = GesturePipeline(Echo(), TemporalPreprocessor(window), [], name="echo")
+    got = predict_run(pipeline, X, chunk)
+    live = TemporalPreprocessor(window)
+    expected = np.vstack([live.transform_frame(frame).copy() for frame in X])
+    ok = got.shape == (len(X), N_FEATURES) and np.array_equal(got, expected)
+    if not ok:
+        print(f"❌ temporal features in {chunk}-frame chunks differ from the live window")
+    return ok
+
+
+def per_frame(pipeline, X, spans, smoothing, window=5):
+    """the interpreter loop: one frame at a time, a fresh smoother per run"""
+    pre = pipeline.preprocess
+    raw, smoothed = [], []
+    for start, stop in spans:
+        smoother = make_smoother(smoothing, classes=pipeline.classes, window=window)
+        if hasattr(pre, "reset"):
+            pre.reset()
+        for frame in X[start:stop]:
+            x = pre.transform_frame(frame) if pre is not None else frame.reshape(1, -1)
+            probs = pipeline.model.predict_proba(x)
+            gesture = pipeline.decide(probs)[0][0]
+            raw.append(gesture)
+            smoothed.append(smoother.update(gesture, probs)[0])
+    return raw, smoothed
+
+
+def tiled(ds, n):
+    """the dataset repeated up to n rows, every copy counted as new files"""
+    reps = -(-n // len(ds))
+    row_file = (np.asarray(ds.row_file, dtype=np.int64)[None, :]
+                + len(ds.files) * np.arange(reps)[:, None]).ravel()[:n]
+    return Dataset(np.tile(np.asarray(ds.X), (reps, 1))[:n], np.tile(np.asarray(ds.y), reps)[:n],
+                   ds.classes, ds.files * reps, row_file)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="batchScore.py vs the per-frame interpreter loop")
+    ap.add_argument("--frames", type=int, default=1000000, help="rows to time score() on")
+    ap.add_argument("--variant", action="append", choices=list(VARIANTS), help="default: all")
+    ap.add_argument("--slice", type=int, default=5000, help="rows to time the per-frame loop on")
+    args = ap.parse_args()
+
+    ds = load_dataset()
+    ok = check_smoothing()
+    ok &= check_temporal(ds)
+    print(f"{'✅' if ok else '❌'} vectorized smoothing and chunked temporal features "
+          f"{'match' if ok else 'DIFFER from'} the streaming versions\n")
+
+    spans = runs(np.stack([np.asarray(ds.row_file), np.asarray(ds.y)], axis=1))
+    big = tiled(ds, args.frames)
+    print(f"{'variant':<10} {'engine':<24} {'labels':>9} {'batch fr/s':>12} {'loop fr/s':>10} {'speedup':>8}")
+    for variant in args.variant or list(VARIANTS):
+        live = load_pipeline(variant)
+        pipeline = sklearn_pipeline(live, variant_dir(variant), np.asarray(ds.X[:4096])) or live
+        smoothing = VARIANTS[variant]["smoothing"]
+
+        raw, _, smoothed = score(pipeline, ds, smoothing)
+        names = np.append(np.asarray(live.classes, dtype=object), UNKNOWN)
+        exp_raw, exp_smoothed = per_frame(live, np.asarray(ds.X), spans, smoothing)
+        same = names.take(raw).tolist() == exp_raw and names.take(smoothed).tolist() == exp_smoothed
+        ok &= same
+
+        t0 = time.perf_counter()
+        score(pipeline, big, smoothing)
+        batch = len(big) / (time.perf_counter() - t0)
+        part = tiled(ds, args.slice)
+        t0 = time.perf_counter()
+        per_frame(live, np.asarray(part.X), runs(np.asarray(part.row_file)), smoothing)
+        loop = len(part) / (time.perf_counter() - t0)
+        print(f"{variant:<10} {type(pipeline.model).__name__:<24} {'same' if same else 'DIFFER':>9} "
+              f"{batch:>12,.0f} {loop:>10,.0f} {batch / loop:>7.0f}x", flush=True)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+# calibration: channels a profile didn't measure must pass through unchanged
+#
+# runs calibration.capture() against a simulated glove (recorded frames played
+# back as ASCII lines), once without and once with the IMU tilt pose, then for
+# every interpreter variant checks what apply_calibration() folds into the
+# model's preprocessing:
+#
+# 1. flex-only profile (the default capture, and gestureDataCollection's):
+#    X / Y / Z come out bit-identical to the uncalibrated preprocessing, the
+#    flex channels are remapped
+# 2. the same profile saved before profiles listed their "calibrated"
+#    channels gives the same result
+# 3. --imu profile: every channel is remapped
+#
+# usage:
+#   python machine_learning/benchmarks/calibrationCheck.py
+
+import os
+import sys
+import tempfile
+import argparse
+
+import numpy as np
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ML_DIR)
+from calibration import CHANNELS, N_FLEX, apply_calibration, capture, load_reference, save_profile
+from datasetCache import load_dataset
+from gesturePipeline import VARIANTS, load_pipeline, variant_dir
+
+
+class PlaybackSerial:
+    """serial.Serial stand-in that streams frames as the firmware's ASCII lines"""
+
+    def __init__(self, X):
+        self.data = b"".join(b",".join(b"%g" % v for v in row) + b"\r\n" for row in X.tolist())
+        self.pos = 0
+
+    @property
+    def in_waiting(self):
+        return 64
+
+    def reset_input_buffer(self):
+        pass
+
+    def read(self, n):
+        if self.pos >= len(self.data):
+            self.pos = 0
+        chunk = self.data[self.pos:self.pos + n]
+        self.pos += len(chunk)
+        return chunk
+
+
+def main():
+    ap = argparse.ArgumentParser(description="apply_calibration leaves unmeasured channels unchanged")
+    ap.add_argument("--frames", type=int, default=2000, help="recorded frames to play back / score")
+    args = ap.parse_args()
+
+    X = np.ascontiguousarray(np.asarray(load_dataset().X)[:args.frames], dtype=np.float32)
+    quiet = lambda msg: None
+    flex = capture(PlaybackSerial(X), "check_flex", seconds=0.05, prompt=quiet)
+    full = capture(PlaybackSerial(X), "check_imu", seconds=0.05, imu=True, prompt=quiet)
+    legacy = {k: v for k, v in flex.items() if k != "calibrated"}
+    print(f"flex-only profile calibrated {flex['calibrated']}, --imu profile {full['calibrated']}\n")
+
+    failed = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {name: save_profile(p, os.path.join(tmp, f"{name}.json"))
+                 for name, p in [("flex", flex), ("legacy", legacy), ("imu", full)]}
+        for variant in VARIANTS:
+            reference = load_reference(variant_dir(variant))
+            if reference is None:
+                print(f"{variant:>10}: no calibration_reference.json, skipped")
+                continue
+            base_pre = load_pipeline(variant).preprocess
+            base = base_pre.transform(X.copy()) if base_pre is not None else X.copy()
+
+            out = {}
+            for name, path in paths.items():
+                pre = apply_calibration(load_pipeline(variant).preprocess, path, reference)
+                out[name] = pre.transform(X.copy())
+
+            imu_same = np.array_equal(out["flex"][:, N_FLEX:], base[:, N_FLEX:])
+            flex_moved = not np.array_equal(out["flex"][:, :N_FLEX], base[:, :N_FLEX])
+            legacy_same = np.array_equal(out["legacy"], out["flex"])
+            imu_moved = not np.array_equal(out["imu"][:, N_FLEX:], base[:, N_FLEX:])
+            ok = imu_same and flex_moved and legacy_same and imu_moved
+            failed += not ok
+            print(f"{variant:>10}: {'✅' if ok else '❌'} flex-only X/Y/Z bit-identical {imu_same}, "
+                  f"flex remapped {flex_moved}, old profile same {legacy_same}, "
+                  f"--imu remaps X/Y/Z {imu_moved}")
+
+    print(f"\n{'✅ all variants pass' if not failed else f'❌ {failed} variant(s) failed'}"
+          f" ({', '.join(CHANNELS[N_FLEX:])} checked on {len(X)} frames)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
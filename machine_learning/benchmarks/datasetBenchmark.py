@@ -0,0 +1,86 @@
+# dataset loading: pandas read_csv + concat (notebooks) vs the dataset cache
+#
+# measures, each in a fresh process:
+#   pandas  read every CSV with pd.read_csv and concatenate (what the notebooks do)
+#   cold    datasetCache.build() into an empty cache (parses everything once)
+#   warm    load_dataset() on an up-to-date cache (stats the files, memory-maps)
+# "load" times only that call, in the process (the imports are done first);
+# "process" is the child from start to finish, imports included, which is
+# mostly interpreter and numpy / pandas startup for the warm cache.
+# also checks that the cached features equal the pandas ones.
+#
+# usage:
+#   python machine_learning/benchmarks/datasetBenchmark.py --repeat 5
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ML_DIR)
+from datasetCache import DATA_SOURCES, load_dataset
+
+CHILD = r"""
+import sys, time, json, glob, os
+t0 = time.perf_counter()
+sys.path.insert(0, {ml_dir!r})
+if {mode!r} == "pandas":
+    import pandas as pd
+    files = [p for d in {dirs!r} for p in sorted(glob.glob(os.path.join(d, "*.csv")))]
+    t1 = time.perf_counter()
+    df = pd.concat([pd.read_csv(p) for p in files], ignore_index=True)
+    n = len(df)
+else:
+    from datasetCache import load_dataset
+    t1 = time.perf_counter()
+    ds = load_dataset({cache!r})
+    n = len(ds)
+t2 = time.perf_counter()
+print(json.dumps({{"load": t2 - t1, "process": t2 - t0, "rows": n}}))
+"""
+
+
+def run_child(mode, cache):
+    code = CHILD.format(ml_dir=ML_DIR, mode=mode, cache=cache, dirs=list(DATA_SOURCES.values()))
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description="pandas CSV loading vs the dataset cache")
+    ap.add_argument("--repeat", type=int, default=5, help="fresh processes per measurement")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="dataset_cache_")
+    try:
+        results = {}
+        for mode in ("pandas", "cold", "warm"):
+            runs = []
+            for _ in range(args.repeat):
+                if mode == "cold":
+                    shutil.rmtree(tmp)
+                runs.append(run_child(mode, tmp))
+            results[mode] = runs
+            print(f"{mode:<7} load {np.median([r['load'] for r in runs]) * 1e3:>8.1f} ms  "
+                  f"process {np.median([r['process'] for r in runs]) * 1e3:>8.1f} ms  "
+                  f"({runs[0]['rows']} rows)")
+
+        import pandas as pd
+        frames = [pd.read_csv(os.path.join(d, f)) for d in DATA_SOURCES.values()
+                  for f in sorted(os.listdir(d)) if f.endswith(".csv")]
+        expected = pd.concat(frames, ignore_index=True).iloc[:, :8].to_numpy(np.float32)
+        same = np.array_equal(expected, load_dataset(tmp).X)
+        print("✅ same features as pandas" if same else "❌ features differ from pandas")
+        return 0 if same else 1
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+# per-frame latency of the sklearn RandomForest path vs the compiled forest
+#
+# usage (from anywhere):
+#   python machine_learning/benchmarks/forestBenchmark.py
+#   python machine_learning/benchmarks/forestBenchmark.py --model "machine_learning/Interpreter/gesture_model.pkl" --frames 2000
+
+import os
+import sys
+import glob
+import time
+import argparse
+import warnings
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ML_DIR   = os.path.dirname(BASE_DIR)
+sys.path.insert(0, ML_DIR)
+
+from forestEngine import load_compiled_forest
+
+# sklearn warns about pickles made with another sklearn version on every load
+warnings.filterwarnings("ignore", category=UserWarning)
+
+
+def load_frames(n_frames):
+    """Raw 8-value frames from every recorded CSV, repeated up to n_frames rows."""
+    paths = sorted(glob.glob(os.path.join(ML_DIR, "data", "*.csv")) +
+                   glob.glob(os.path.join(os.path.dirname(ML_DIR), "New_Data", "*.csv")))
+    frames = np.vstack([np.genfromtxt(p, delimiter=",", skip_header=1, usecols=range(8))
+                        for p in paths]).astype(np.float32)
+    reps = -(-n_frames // len(frames))
+    return np.tile(frames, (reps, 1))[:n_frames]
+
+
+def time_per_frame(fn, frames):
+    """Calls fn once per 1x8 frame, returns latencies in microseconds."""
+    lat = np.empty(len(frames))
+    for i in range(len(frames)):
+        row = frames[i:i + 1]
+        t0 = time.perf_counter()
+        fn(row)
+        lat[i] = time.perf_counter() - t0
+    return lat * 1e6
+
+
+def report(name, lat):
+    p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+    print(f"{name:<22} p50 {p50:9.1f} us   p95 {p95:9.1f} us   p99 {p99:9.1f} us")
+    return p50
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-frame latency: sklearn vs compiled forest")
+    ap.add_argument("--model", default=os.path.join(ML_DIR, "working interpreter", "gesture_model.pkl"))
+    ap.add_argument("--frames", type=int, default=1000)
+    ap.add_argument("--batch", type=int, default=256)
+    args = ap.parse_args()
+
+    model, forest = load_compiled_forest(args.model)
+    frames = load_frames(args.frames)
+
+    print(f"model: {args.model}")
+    print(f"trees: {forest.n_trees}  nodes: {len(forest.feature)}  max depth: {forest.max_depth}  "
+          f"compiled size: {forest.nbytes / 1024:.0f} KiB")
+
+    # the compiled path has to give the same answer before its timing means anything
+    same = np.array_equal(model.predict_proba(frames), forest.predict_proba(frames))
+    print(f"identical probabilities on {len(frames)} frames: {same}")
+    if not same:
+        sys.exit(1)
+
+    # warm up both paths once
+    model.predict_proba(frames[:1])
+    forest.predict_proba(frames[:1])
+
+    print("\nsingle frame (1x8 per call)")
+    sk  = report("sklearn predict_proba", time_per_frame(model.predict_proba, frames))
+    cmp = report("compiled forest", time_per_frame(forest.predict_proba, frames))
+    print(f"speedup (p50): {sk / cmp:.1f}x")
+
+    print(f"\nbatched ({args.batch} frames per call)")
+    for name, fn in (("sklearn predict_proba", model.predict_proba),
+                     ("compiled forest", forest.predict_proba)):
+        t0 = time.perf_counter()
+        for i in range(0, len(frames), args.batch):
+            fn(frames[i:i + args.batch])
+        per_frame = (time.perf_counter() - t0) / len(frames) * 1e6
+        print(f"{name:<22} {per_frame:9.2f} us / frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# Tk event-loop latency: per-frame root.after updates vs tkRender.TkRenderer
+#
+# builds the interpreter GUI's widgets (ttk labels, progress bar, image label,
+# themed background) without a model or a glove, and feeds them from a worker
+# thread at --rate predictions per second, two ways:
+#   legacy    root.after(0, gui_update) per frame, every update re-applies
+#             text + image, background restyled every 50 ms (the old GUIs)
+#   renderer  TkRenderer at --fps, only changed widgets, background at 10 Hz
+# a separate probe callback re-arms itself every 10 ms and records how late
+# Tk runs it, which is the event-loop latency a click or a redraw would see.
+# also printed: Tk updates made and CPU time of the whole process.
+#
+# needs a display; on a headless box:
+#   xvfb-run -a python machine_learning/benchmarks/guiRenderBenchmark.py
+#   xvfb-run -a python machine_learning/benchmarks/guiRenderBenchmark.py --rate 500 --seconds 10
+
+import os
+import sys
+import time
+import random
+import colorsys
+import argparse
+import threading
+
+import numpy as np
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ML_DIR)
+from tkRender import TkRenderer
+
+LABELS = ["Dale", "ILoveYou", "Paws_Up", "Unknown"]
+PROBE_MS = 10
+
+
+def build(tk, ttk):
+    root = tk.Tk()
+    root.geometry("800x400")
+    style = ttk.Style()
+    style.theme_use("default")
+    left = ttk.Frame(root, padding=10)
+    left.pack(side="left", fill="y")
+    w = {"root": root, "style": style}
+    w["raw"] = tk.StringVar(value="-")
+    w["smooth"] = tk.StringVar(value="-")
+    w["conf"] = tk.DoubleVar(value=0.0)
+    ttk.Label(left, textvariable=w["raw"], font=("Arial", 16, "bold")).grid(row=0, column=0)
+    ttk.Progressbar(left, variable=w["conf"], maximum=100, length=300).grid(row=1, column=0)
+    w["conf_lbl"] = ttk.Label(left, text="0%")
+    w["conf_lbl"].grid(row=1, column=1)
+    ttk.Label(left, textvariable=w["smooth"], font=("Arial", 16, "bold")).grid(row=2, column=0)
+    for i in range(6):      # the rest of the window's labels, restyled with the theme
+        ttk.Label(left, text=f"label {i}").grid(row=3 + i, column=0)
+    w["images"] = {g: tk.PhotoImage(width=200, height=200) for g in LABELS[:3]}
+    w["image"] = ttk.Label(root, text="No Image")
+    w["image"].pack(expand=True)
+    return w
+
+
+def predictions(rate, seconds, seed=0):
+    """(raw, conf, smoothed) per frame: gestures held ~1 s with noisy raw labels"""
+    rng = random.Random(seed)
+    held = LABELS[0]
+    for i in range(int(rate * seconds)):
+        if i % int(rate) == 0:
+            held = rng.choice(LABELS[:3])
+        raw = held if rng.random() < 0.8 else rng.choice(LABELS)
+        yield raw, rng.uniform(0.4, 1.0), held
+
+
+def run(mode, args):
+    import tkinter as tk
+    from tkinter import ttk
+    w = build(tk, ttk)
+    root, style = w["root"], w["style"]
+    updates = [0]
+
+    def show_conf(pct):
+        w["conf"].set(pct)
+        w["conf_lbl"].config(text=f"{pct}%")
+        updates[0] += 2
+
+    def show_gesture(g):
+        w["smooth"].set(g)
+        img = w["images"].get(g)
+        w["image"].config(image=img or "", text="" if img else "No Image")
+        updates[0] += 2
+
+    def paint_bg(color):
+        root.configure(bg=color)
+        style.configure("TFrame", background=color)
+        style.configure("TLabel", background=color)
+        updates[0] += 3
+
+    def set_raw(v):
+        w["raw"].set(v)
+        updates[0] += 1
+
+    renderer = TkRenderer(root, fps=args.fps)
+    renderer.bind("raw", set_raw).bind("conf", show_conf).bind("gesture", show_gesture)
+    renderer.bind("bg", paint_bg)
+
+    hue = [0.0]
+    bg_every = 50 if mode == "legacy" else 100
+
+    def animate_bg():
+        hue[0] = (hue[0] + 0.06 * bg_every / 1000) % 1.0
+        r, g, b = colorsys.hsv_to_rgb(hue[0], 0.4, 0.9)
+        color = f"#{int(r * 255):02x}{int(g * 255):02x}{int(b * 255):02x}"
+        if mode == "legacy":
+            paint_bg(color)
+        else:
+            renderer.submit(bg=color)
+        root.after(bg_every, animate_bg)
+
+    lag = []
+    due = [0.0]
+
+    def probe():
+        now = time.perf_counter()
+        lag.append(max(0.0, now - due[0]))
+        due[0] = time.perf_counter() + PROBE_MS / 1000
+        root.after(PROBE_MS, probe)
+
+    def worker():
+        period = 1.0 / args.rate
+        t_next = time.perf_counter()
+        for raw, conf, smooth in predictions(args.rate, args.seconds):
+            if mode == "legacy":
+                root.after(0, lambda r=raw, c=conf, s=smooth: (set_raw(r), show_conf(int(round(c * 100))),
+                                                             show_gesture(s)))
+            else:
+                renderer.submit(raw=raw, conf=int(round(conf * 100)), gesture=smooth)
+            t_next += period
+            time.sleep(max(0.0, t_next - time.perf_counter()))
+        root.after(200, root.quit)
+
+    if mode == "renderer":
+        renderer.start()
+    animate_bg()
+    due[0] = time.perf_counter() + PROBE_MS / 1000
+    root.after(PROBE_MS, probe)
+    cpu = time.process_time()
+    threading.Thread(target=worker, daemon=True).start()
+    root.mainloop()
+    cpu = time.process_time() - cpu
+    root.destroy()
+
+    lag = np.asarray(lag[5:]) * 1000.0
+    return {"p50": float(np.percentile(lag, 50)), "p95": float(np.percentile(lag, 95)),
+            "max": float(lag.max()), "updates": updates[0], "cpu": cpu,
+            "age_p95": renderer.stats()["age_ms_p95"] if mode == "renderer" else None}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Tk event-loop latency: per-frame updates vs TkRenderer")
+    ap.add_argument("--rate", type=float, default=200.0, help="predictions per second")
+    ap.add_argument("--fps", type=float, default=30.0, help="renderer ticks per second")
+    ap.add_argument("--seconds", type=float, default=5.0)
+    args = ap.parse_args()
+
+    import tkinter as tk
+    try:
+        tk.Tk().destroy()
+    except tk.TclError as e:
+        print(f"❌ no display ({e}); run under xvfb-run -a")
+        return 1
+
+    print(f"{args.rate:.0f} predictions/s for {args.seconds:.0f} s, probe every {PROBE_MS} ms\n")
+    print(f"{'mode':<9} {'lag p50 ms':>10} {'p95 ms':>7} {'max ms':>7} {'Tk updates':>11} {'CPU s':>6} {'age p95 ms':>11}")
+    for mode in ("legacy", "renderer"):
+        r = run(mode, args)
+        age = f"{r['age_p95']:>11.1f}" if r["age_p95"] is not None else f"{'-':>11}"
+        print(f"{mode:<9} {r['p50']:>10.2f} {r['p95']:>7.2f} {r['max']:>7.1f} {r['updates']:>11} "
+              f"{r['cpu']:>6.2f} {age}", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
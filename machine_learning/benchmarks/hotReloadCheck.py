@@ -0,0 +1,175 @@
+# hotReload.ModelReloader against a running frame loop
+
+# copies an interpreter folder to a temp dir and replays the recorded frames
+# through it the way the interpreters do (poll() between frames, then
+# transform_frame + predict_proba), while the folder is changed under it:
+#   same files again   reloaded and swapped; predictions unchanged
+#   broken bundle      a truncated model.bundle: load fails, the loop keeps
+#                      the model it has
+#   wrong encoder      pickles whose label encoder doesn't fit the model
+#                      (validation fails), kept
+#   fails live         a model that passes the checks but raises on its first
+#                      frame: rolled back at the next poll()
+# prints load / warm-up / swap / first-prediction times and the per-frame
+# latency while the watcher thread loads, next to the latency without it.
+#
+# usage:
+#   python machine_learning/benchmarks/hotReloadCheck.py
+#   python machine_learning/benchmarks/hotReloadCheck.py --variant mlp
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ML_DIR)
+from datasetCache import load_dataset
+from gesturePipeline import VARIANTS, variant_dir
+from hotReload import ModelReloader, load_state
+
+
+class Loop:
+    """the interpreter side: poll() then one frame, latencies recorded"""
+
+    def __init__(self, reloader, state, frames):
+        self.reloader, self.state, self.frames = reloader, state, frames
+        self.i = 0
+        self.latency = []
+        self.errors = 0
+
+    def step(self):
+        t = time.perf_counter()
+        new = self.reloader.poll()
+        if new is not None:
+            self.state = new
+        model, pre, _ = self.state
+        frame = self.frames[self.i % len(self.frames)]
+        self.i += 1
+        try:
+            probs = model.predict_proba(pre.transform_frame(frame) if pre is not None
+                                        else frame.reshape(1, -1))
+        except Exception:
+            self.errors += 1
+            probs = None
+        self.latency.append(time.perf_counter() - t)
+        return probs
+
+    def run_until(self, done, timeout=10.0):
+        end = time.perf_counter() + timeout
+        while not done() and time.perf_counter() < end:
+            self.step()
+        return done()
+
+
+def labels(state, frames):
+    model, pre, encoder = state
+    if hasattr(pre, "reset"):
+        pre.reset()
+    out = [encoder.classes_[int(np.argmax(model.predict_proba(
+        pre.transform_frame(f) if pre is not None else f.reshape(1, -1))))] for f in frames]
+    if hasattr(pre, "reset"):
+        pre.reset()
+    return out
+
+
+def touch(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def ms(values):
+    return f"p50 {np.percentile(values, 50) * 1e3:.3f} / p99 {np.percentile(values, 99) * 1e3:.3f} " \
+           f"/ max {max(values) * 1e3:.2f} ms"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="ModelReloader under a running frame loop")
+    ap.add_argument("--variant", default="rf_raw", choices=list(VARIANTS))
+    args = ap.parse_args()
+    frames = np.asarray(load_dataset().X[:400], dtype=np.float32)
+    ok = True
+
+    with tempfile.TemporaryDirectory() as d:
+        for name in os.listdir(variant_dir(args.variant)):
+            src = os.path.join(variant_dir(args.variant), name)
+            if os.path.isfile(src) and not name.endswith((".py", ".png")):
+                shutil.copy2(src, d)
+        load = lambda path: load_state(path, args.variant)
+        state = load(d)
+        expected = labels(state, frames)
+        reloader = ModelReloader(d, load, state, interval=0.05, settle=0.05).start()
+        loop = Loop(reloader, state, frames)
+
+        # no change: plain per-frame latency
+        loop.run_until(lambda: loop.i >= 2000)
+        base = loop.latency[:]
+
+        # same files again -> reload + swap, same predictions
+        loop.latency.clear()
+        touch(os.path.join(d, "model.bundle") if os.path.exists(os.path.join(d, "model.bundle"))
+              else os.path.join(d, "gesture_model.pkl"))
+        swapped = loop.run_until(lambda: reloader.reloads == 1 and reloader.last["first_predict_ms"] > 0)
+        during = loop.latency[:]
+        same = swapped and labels(loop.state, frames) == expected
+        ok &= same
+        s = reloader.stats()
+        print(f"{'✅' if same else '❌'} reload: load {s['load_ms']:.1f} ms, warm-up {s['warmup_ms']:.2f} ms, "
+              f"swap {s['swap_us']:.0f} µs ({s['wait_ms']:.2f} ms after ready), "
+              f"first prediction {s['first_predict_ms']:.3f} ms, predictions unchanged: {same}")
+        print(f"   frame latency without reload  {ms(base)}")
+        print(f"   frame latency while reloading {ms(during)}")
+
+        # broken bundle (renamed in, the live one may be memory-mapped) -> kept
+        if os.path.exists(os.path.join(d, "model.bundle")):
+            with open(os.path.join(d, "model.bundle"), "rb") as f:
+                head = f.read(64)
+            with open(os.path.join(d, "broken.tmp"), "wb") as f:
+                f.write(head)
+            os.replace(os.path.join(d, "broken.tmp"), os.path.join(d, "model.bundle"))
+            kept = loop.run_until(lambda: reloader.failures == 1) and reloader.reloads == 1
+            kept &= labels(loop.state, frames) == expected
+            ok &= kept
+            print(f"{'✅' if kept else '❌'} truncated model.bundle: load failed, old model kept")
+            os.remove(os.path.join(d, "model.bundle"))
+            loop.run_until(lambda: reloader.reloads == 2 or reloader.failures == 2)
+
+        # pickles with another variant's encoder -> validation fails, kept
+        other = "mlp" if args.variant != "mlp" else "rf_raw"
+        failures, reloads = reloader.failures, reloader.reloads
+        shutil.copy2(os.path.join(variant_dir(other), "label_encoder.pkl"), d)
+        kept = loop.run_until(lambda: reloader.failures == failures + 1) and reloader.reloads == reloads
+        ok &= kept
+        print(f"{'✅' if kept else '❌'} {other}'s label_encoder.pkl: {reloader.last_error}, old model kept")
+        reloader.stop()
+
+    # passes validation, raises live -> rollback
+    class FailsLive:
+        def __init__(self, model):
+            self.model, self.calls = model, 0
+
+        def predict_proba(self, X):
+            self.calls += 1
+            if self.calls > 2:            # validate() + warm-up pass
+                raise RuntimeError("boom")
+            return self.model.predict_proba(X)
+
+    live = load_state(variant_dir(args.variant), args.variant)
+    reloader = ModelReloader(variant_dir(args.variant), lambda path: (FailsLive(live[0]),) + live[1:], live)
+    loop = Loop(reloader, live, frames)
+    reloader.reload()
+    loop.step()                          # swaps, first prediction raises
+    loop.step()                          # rolled back
+    back = reloader.rollbacks == 1 and loop.state[0] is live[0] and loop.errors == 1
+    back &= loop.step() is not None
+    ok &= back
+    print(f"{'✅' if back else '❌'} model failing its first live frame: rolled back to the previous one")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
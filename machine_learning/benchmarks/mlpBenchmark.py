@@ -0,0 +1,129 @@
+# sklearn MLPClassifier vs mlpEngine's float32 and int8 forward passes
+#
+# for every MLP: the shipped "MLP Interpreter (WIP)" model on its training
+# rows, plus (unless --no-fit) a (128, 64) MLP fitted here on the rf_scaler /
+# rf_raw rows with every 5th row held out, on the model's own input (after
+# the variant's scaler / normalize step):
+#   max |dp|   largest probability difference to sklearn
+#   agree      argmax the same as sklearn
+#   accuracy   argmax against the recorded labels (held-out rows when fitted)
+#   us/frame   p50 of one 1x8 frame per call, then frames/s in batches
+#
+# usage:
+#   python machine_learning/benchmarks/mlpBenchmark.py
+#   python machine_learning/benchmarks/mlpBenchmark.py --no-fit --batch 32
+
+import os
+import sys
+import time
+import argparse
+import warnings
+
+import numpy as np
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ML_DIR)
+from datasetCache import load_dataset
+from gesturePipeline import variant_dir
+from mlpEngine import compile_mlp, quantize_mlp
+from trainModels import TRAIN_DEFAULTS, fit_preprocessing, make_estimator, preprocess_rows
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+
+def rows(ds, variant):
+    d = TRAIN_DEFAULTS[variant]
+    return ds.select(sources=d["sources"].split(","),
+                     classes=d["classes"].split(",") if d["classes"] else None)
+
+
+def shipped(ds):
+    """the interpreter's MLP on the rows it was trained on"""
+    import joblib
+    from gesturePipeline import load_pipeline
+    model = joblib.load(os.path.join(variant_dir("mlp"), "gesture_model.pkl"))
+    encoder = joblib.load(os.path.join(variant_dir("mlp"), "label_encoder.pkl"))
+    sel = rows(ds, "mlp")
+    X = preprocess_rows(load_pipeline("mlp").preprocess, sel.X)
+    return "mlp (shipped)", model, X, truth(encoder.classes_.take(model.classes_), sel)
+
+
+def fitted(ds, variant):
+    """a (128, 64) MLP on the variant's rows, scored on the held-out 5th rows"""
+    sel = rows(ds, variant)
+    held = np.arange(len(sel.y)) % 5 == 0
+    _, pre = fit_preprocessing(variant, np.asarray(sel.X)[~held])
+    X = preprocess_rows(pre, sel.X)
+    model = make_estimator("mlp", {"hidden_layer_sizes": (128, 64)})
+    model.fit(X[~held], sel.classes.take(sel.y[~held]))
+    return f"mlp on {variant} rows", model, X[held], truth(model.classes_, sel)[held]
+
+
+def truth(classes, sel):
+    """recorded label -> index into the model's classes (-1: a class the model hasn't got)"""
+    names = [str(c).strip() for c in classes]
+    lookup = np.array([names.index(c.strip()) if c.strip() in names else -1
+                       for c in sel.classes.tolist()])
+    return lookup.take(sel.y)
+
+
+def per_frame_us(fn, X, n=2000):
+    lat = np.empty(min(n, len(X)))
+    for i in range(len(lat)):
+        row = X[i:i + 1]
+        t0 = time.perf_counter()
+        fn(row)
+        lat[i] = time.perf_counter() - t0
+    return float(np.percentile(lat, 50) * 1e6)
+
+
+def batch_rate(fn, X, batch, total=200000):
+    X = np.tile(X, (-(-total // len(X)), 1))[:total]
+    t0 = time.perf_counter()
+    for i in range(0, len(X), batch):
+        fn(X[i:i + batch])
+    return len(X) / (time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="sklearn MLP vs float32 / int8 NumPy forward pass")
+    ap.add_argument("--no-fit", action="store_true", help="only the shipped MLP")
+    ap.add_argument("--batch", type=int, default=256)
+    args = ap.parse_args()
+
+    ds = load_dataset()
+    cases = [shipped(ds)]
+    if not args.no_fit:
+        cases += [fitted(ds, v) for v in ("rf_scaler", "rf_raw")]
+
+    ok = True
+    for name, model, X, y in cases:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        X.flags.writeable = False
+        engines = [("sklearn", model), ("float32", compile_mlp(model)), ("int8", quantize_mlp(model))]
+        ref = model.predict_proba(X)
+        print(f"\n{name}: {len(X)} rows, layers {[w.shape for w in model.coefs_]}")
+        print(f"{'engine':<9} {'weights':>9} {'max |dp|':>9} {'agree':>8} {'accuracy':>9} "
+              f"{'us/frame':>9} {'speedup':>8} {f'batch {args.batch} fr/s':>18}")
+        base_us = None
+        for label, engine in engines:
+            probs = engine.predict_proba(X)
+            pred = np.argmax(probs, axis=1)
+            diff = float(np.abs(probs - ref).max())
+            agree = float(np.mean(pred == np.argmax(ref, axis=1)))
+            acc = float(np.mean(pred == y))
+            engine.predict_proba(X[:1])
+            us = per_frame_us(engine.predict_proba, X)
+            base_us = base_us or us
+            rate = batch_rate(engine.predict_proba, X, args.batch)
+            size = getattr(engine, "nbytes", None) or sum(w.nbytes + b.nbytes for w, b in
+                                                        zip(model.coefs_, model.intercepts_))
+            print(f"{label:<9} {size / 1024:>7.1f}Ki {diff:>9.2g} {agree:>8.2%} {acc:>9.2%} "
+                  f"{us:>9.1f} {base_us / us:>7.1f}x {rate:>18,.0f}", flush=True)
+            if label == "float32":
+                ok &= diff < 1e-5
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
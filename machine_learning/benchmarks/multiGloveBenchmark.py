@@ -0,0 +1,111 @@
+# multiGloveServer scaling: 1 .. 32 virtual gloves on one model
+#
+# for every glove count, a child process streams that many gloveSimulator.py
+# ptys at --rate samples/s each (so the simulators don't share the server's
+# GIL), and MultiGloveServer serves all of them for --seconds, twice:
+#   shared     one predict_proba for the frames every glove has waiting
+#   per-glove  one predict_proba per glove, what N interpreter processes do
+# printed per run: total frames/s, the slowest glove's frames/s (should stay at
+# --rate), latency p50 / p95 from bytes arriving to the smoothed result, mean
+# frames per predict_proba, predict calls per second and frames lost.
+#
+# usage (Linux / macOS):
+#   python machine_learning/benchmarks/multiGloveBenchmark.py --variant rf_raw
+#   python machine_learning/benchmarks/multiGloveBenchmark.py --gloves 1,8,32 --rate 200 --seconds 10
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ML_DIR)
+from gesturePipeline import VARIANTS, load_pipeline, variant_dir
+from multiGloveServer import MultiGloveServer
+
+CHILD = r"""
+import sys, os
+sys.path.insert(0, {ml_dir!r})
+from gloveSimulator import GloveSimulator, load_recordings
+recordings = load_recordings()
+sims = [GloveSimulator(rate={rate}, binary={binary}, seed=i, recordings=recordings)
+        for i in range({n})]
+for i, sim in enumerate(sims):
+    sim.start(os.path.join({tmp!r}, f"glove{{i}}"))
+print("ready", flush=True)
+sys.stdin.read()
+for sim in sims:
+    sim.stop()
+"""
+
+
+def run(pipeline, n, args, shared):
+    tmp = tempfile.mkdtemp(prefix="gloves_")
+    code = CHILD.format(ml_dir=ML_DIR, rate=args.rate, binary=args.binary, n=n, tmp=tmp)
+    child = subprocess.Popen([sys.executable, "-c", code], stdin=subprocess.PIPE,
+                             stdout=subprocess.PIPE, text=True)
+    try:
+        child.stdout.readline()
+        server = MultiGloveServer(pipeline, smoothing=VARIANTS[args.variant]["smoothing"],
+                                  batch_window=args.batch_window / 1000.0, shared=shared)
+        for i in range(n):
+            server.add(os.path.join(tmp, f"glove{i}"))
+        asyncio.run(server.run(args.warmup, report_every=None))
+        server.batches.reset_window()
+        for g in server.gloves:
+            g.stats.reset_window()
+        calls0 = server.predict_calls
+        t0 = time.perf_counter()
+        asyncio.run(server.run(args.seconds, report_every=None))
+        elapsed = time.perf_counter() - t0
+        s = server.stats()
+        server.close()
+    finally:
+        child.stdin.close()
+        child.wait()
+        for f in os.listdir(tmp):
+            os.remove(os.path.join(tmp, f))
+        os.rmdir(tmp)
+    gloves = s["gloves"].values()
+    calls = (server.predict_calls - calls0) / elapsed
+    return {
+        "fps": s["frames_per_s"],
+        "slowest": min(g["frames_per_s"] for g in gloves),
+        "p50": s["latency_ms_p50"],
+        "p95": s["latency_ms_p95"],
+        "batch": s["frames_per_s"] / calls if calls else 0.0,
+        "calls": calls,
+        "lost": sum(g["overflow"] + g["dropped"] for g in gloves),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="multiGloveServer throughput / latency vs glove count")
+    ap.add_argument("--variant", default="rf_raw", choices=list(VARIANTS))
+    ap.add_argument("--gloves", default="1,2,4,8,16,32")
+    ap.add_argument("--rate", type=float, default=100.0, help="samples/s per glove")
+    ap.add_argument("--binary", action="store_true", help="binary frames instead of ASCII")
+    ap.add_argument("--batch-window", type=float, default=2.0, help="ms")
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--warmup", type=float, default=1.0)
+    args = ap.parse_args()
+
+    pipeline = load_pipeline(args.variant, variant_dir(args.variant))
+    print(f"{args.variant}, {args.rate:.0f} samples/s per glove, "
+          f"{'binary' if args.binary else 'ASCII'}, {args.seconds:.0f} s per run\n")
+    print(f"{'gloves':>6} {'mode':<10} {'frames/s':>9} {'slowest':>8} {'p50 ms':>7} "
+          f"{'p95 ms':>7} {'batch':>6} {'calls/s':>8} {'lost':>5}")
+    for n in [int(v) for v in args.gloves.split(",")]:
+        for shared in (True, False):
+            r = run(pipeline, n, args, shared)
+            print(f"{n:>6} {'shared' if shared else 'per-glove':<10} {r['fps']:>9.0f} "
+                  f"{r['slowest']:>8.1f} {r['p50']:>7.1f} {r['p95']:>7.1f} {r['batch']:>6.1f} "
+                  f"{r['calls']:>8.0f} {r['lost']:>5}", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+# prediction cache: hit rate, agreement and cost per frame for a few key steps
+
+# replays the recorded gestures in order, one frame at a time like the
+# interpreters (transform_frame + the interpreter's model), without a cache
+# and through PredictionCache with different quantization steps:
+#   hit rate   frames answered from the cache
+#   agree      frames whose gesture (after the threshold) is the same as
+#              without the cache; 100% by construction at the default steps
+#   µs/frame   whole per-frame cost, lookups included
+# --passes 2 replays everything twice, like gloveSimulator cycling through the
+# recordings. also checks LRU eviction and that touching a watched model file
+# clears the cache.
+#
+# usage:
+#   python machine_learning/benchmarks/predictionCacheBenchmark.py
+#   python machine_learning/benchmarks/predictionCacheBenchmark.py --variant mlp --passes 2 --maxsize 1024
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ML_DIR)
+from datasetCache import load_dataset
+from gesturePipeline import VARIANTS, load_pipeline
+from predictionCache import DEFAULT_STEPS, PredictionCache, parse_steps
+
+STEPS = ["1,0.01", "2,0.05", "4,0.1", "8,0.25", "16,0.5"]
+
+
+def predictor(pipeline):
+    pre, model = pipeline.preprocess, pipeline.model
+
+    def predict(frame):
+        x = pre.transform_frame(frame) if pre is not None else np.asarray(frame, dtype=np.float32).reshape(1, -1)
+        return model.predict_proba(x)[0]
+    return predict
+
+
+def replay(pipeline, frames, cache=None):
+    """(gesture index per frame, -1 = Unknown; seconds)"""
+    predict = predictor(pipeline)
+    out = np.empty(len(frames), dtype=np.int64)
+    t0 = time.perf_counter()
+    for i, frame in enumerate(frames):
+        probs = cache.predict_proba(frame, predict) if cache is not None else predict(frame)
+        idx = int(np.argmax(probs))
+        out[i] = idx if probs[idx] >= pipeline.threshold else -1
+    return out, time.perf_counter() - t0
+
+
+def check_lru_and_watch():
+    cache = PredictionCache(maxsize=2)
+    for v in (1.0, 2.0, 1.0, 3.0):          # 1 is used again, so 2 goes first
+        cache.predict_proba([v] * 8, lambda f: np.array([f[0]]))
+    ok = cache.stats()["evictions"] == 1 and cache.lookup([2.0] * 8)[1] is None \
+        and cache.lookup([1.0] * 8)[1] is not None
+
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "gesture_model.pkl")
+        with open(path, "wb") as f:
+            f.write(b"old")
+        cache = PredictionCache(watch=[path], check_every=0.0)
+        cache.predict_proba([1.0] * 8, lambda f: np.array([0.5]))
+        with open(path, "wb") as f:
+            f.write(b"retrained")
+        ok &= cache.lookup([1.0] * 8)[1] is None and cache.stats()["invalidations"] == 1
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser(description="PredictionCache hit rate / agreement / cost")
+    ap.add_argument("--variant", default="rf_raw", choices=list(VARIANTS))
+    ap.add_argument("--maxsize", type=int, default=4096)
+    ap.add_argument("--passes", type=int, default=1, help="replay the recordings this many times")
+    ap.add_argument("--steps", action="append", help="flex,accel steps to try (default: a ladder)")
+    args = ap.parse_args()
+
+    ok = check_lru_and_watch()
+    print(f"{'✅' if ok else '❌'} LRU eviction and model-file invalidation\n")
+
+    ds = load_dataset()
+    frames = np.tile(np.asarray(ds.X, dtype=np.float32), (args.passes, 1))
+    pipeline = load_pipeline(args.variant)
+    base, t_base = replay(pipeline, frames)
+    print(f"{args.variant}: {len(frames)} frames, {args.maxsize}-entry cache\n")
+    print(f"{'steps (flex, accel)':<20} {'hit rate':>9} {'agree':>8} {'µs/frame':>9} {'speedup':>8} {'evictions':>10}")
+    print(f"{'no cache':<20} {'-':>9} {'-':>8} {t_base / len(frames) * 1e6:>9.1f} {'1.0x':>8} {'-':>10}")
+    for text in args.steps or STEPS:
+        steps = parse_steps(text)
+        cache = PredictionCache(args.maxsize, steps)
+        got, t = replay(pipeline, frames, cache)
+        s = cache.stats()
+        agree = float(np.mean(got == base))
+        if steps == DEFAULT_STEPS and agree != 1.0:
+            ok = False
+        print(f"{text:<20} {s['hit_rate']:>9.1%} {agree:>8.2%} {t / len(frames) * 1e6:>9.1f} "
+              f"{t_base / t:>7.1f}x {s['evictions']:>10}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
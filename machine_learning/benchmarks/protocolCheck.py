@@ -0,0 +1,104 @@
+# checks frameProtocol.FrameDecoder end to end over a pseudo-terminal
+#
+# a writer thread plays the glove on the master side of a pty: banners, ASCII
+# lines or binary frames, written in random sized pieces, with corrupted and
+# dropped frames mixed in. the host side opens the slave with pyserial like
+# the interpreters do and feeds every read into a FrameDecoder.
+#
+# usage (Linux / macOS):
+#   python machine_learning/benchmarks/protocolCheck.py
+
+import os
+import sys
+import pty
+import time
+import random
+import threading
+import numpy as np
+import serial
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BASE_DIR))
+
+from frameProtocol import FrameDecoder, encode_frame, encode_ascii
+
+
+def make_samples(n, rng):
+    flex  = rng.integers(0, 1024, size=(n, 5))
+    accel = np.round(rng.uniform(-39.0, 39.0, size=(n, 3)), 2)
+    return np.hstack([flex, accel])
+
+
+def build_stream(samples, binary, drop, corrupt, rng):
+    """returns (bytes to send, samples the decoder should recover)"""
+    out = bytearray(b"Initializing MPU6050...\r\nMPU6050 connected!\r\n")
+    expected = []
+    for seq, row in enumerate(samples):
+        if seq in drop:
+            continue
+        if binary:
+            frame = bytearray(encode_frame(seq, row[:5], row[5:]))
+            if seq in corrupt:
+                frame[rng.integers(2, 18)] ^= 0x5A
+            else:
+                expected.append(row)
+            out += frame
+        else:
+            line = encode_ascii(row)
+            if seq in corrupt:
+                line = line.replace(b",", b";", 1)
+            else:
+                expected.append(row)
+            out += line
+    return bytes(out), np.array(expected, dtype=np.float32)
+
+
+def run(binary, n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    samples = make_samples(n, rng)
+    drop    = set(rng.choice(n, size=20, replace=False).tolist())
+    corrupt = set(rng.choice(sorted(set(range(n)) - drop), size=20, replace=False).tolist())
+    stream, expected = build_stream(samples, binary, drop, corrupt, rng)
+
+    master, slave = pty.openpty()
+    ser = serial.Serial(os.ttyname(slave), 115200, timeout=0.05)
+
+    def writer():
+        pos, pick = 0, random.Random(seed)
+        while pos < len(stream):
+            step = pick.randint(1, 64)
+            os.write(master, stream[pos:pos + step])
+            pos += step
+        time.sleep(0.1)
+
+    t = threading.Thread(target=writer, daemon=True)
+    t0 = time.perf_counter()
+    t.start()
+
+    decoder = FrameDecoder(mode="auto")
+    got = []
+    while t.is_alive() or ser.in_waiting:
+        got.append(decoder.feed(ser.read(ser.in_waiting or 1)))
+    elapsed = time.perf_counter() - t0
+    ser.close()
+    os.close(master)
+
+    got = np.vstack(got)
+    c = decoder.counters()
+    ok = got.shape == expected.shape and np.allclose(got, expected)
+    if binary:
+        # every missing sequence number is either dropped or failed its CRC
+        ok &= c["dropped"] == len(drop) + len(corrupt)
+        ok &= set(decoder.missing) == {s & 0xFF for s in drop | corrupt}
+    else:
+        ok &= c["malformed"] == len(corrupt)
+
+    name = "binary" if binary else "ascii"
+    print(f"{name:<6} {'OK  ' if ok else 'FAIL'} {len(got)}/{len(expected)} samples, "
+          f"{len(stream) / max(n, 1):.1f} bytes/sample, {elapsed * 1000:.0f} ms, counters {c}")
+    return ok
+
+
+if __name__ == "__main__":
+    results = [run(binary=False), run(binary=True)]
+    sys.exit(0 if all(results) else 1)
@@ -0,0 +1,141 @@
+# smoothing.py vs the per-frame Counter code the interpreters used
+#
+# 1. replays random prediction streams through the old GUI vote and the old
+#    New_Interpreter majority code and checks the incremental smoothers give
+#    the same label on every frame
+# 2. times one update per strategy for growing window sizes (should stay flat)
+#
+# usage:
+#   python machine_learning/benchmarks/smoothingBenchmark.py
+#   python machine_learning/benchmarks/smoothingBenchmark.py --frames 50000 --windows 5,50,500
+
+import os
+import sys
+import time
+import argparse
+from collections import Counter, deque
+
+import numpy as np
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ML_DIR)
+from smoothing import make_smoother
+
+CLASSES = np.array(["Dale", "ILoveYou", "Paws_Up", "Sorry", "Water"])
+
+
+def random_stream(n, rng):
+    """sticky random labels (runs of the same gesture) plus Unknown / Error and matching probs"""
+    labels, probs = [], []
+    current = 0
+    for _ in range(n):
+        if rng.random() < 0.2:
+            current = rng.integers(len(CLASSES))
+        p = rng.dirichlet(np.ones(len(CLASSES)) * 0.5)
+        p[current] += 1.0
+        p /= p.sum()
+        r = rng.random()
+        if r < 0.02:
+            labels.append("Error")
+            probs.append(None)
+            continue
+        idx = int(np.argmax(p))
+        labels.append(str(CLASSES[idx]) if (p[idx] >= 0.75 and r > 0.1) else "Unknown")
+        probs.append(p)
+    return labels, probs
+
+
+def legacy_vote(labels, window):
+    buf, out = deque(maxlen=window), []
+    for g in labels:
+        buf.append(g)
+        top, freq = Counter(buf).most_common(1)[0]
+        out.append(top if (freq >= 3 and top != "Unknown") else "Unknown")
+    return out
+
+
+def legacy_majority(labels, window):
+    recent, out = [], []
+    for g in labels:
+        recent.append(g)
+        if len(recent) > window:
+            recent.pop(0)
+        if len(recent) == window:
+            valid = [p for p in recent if not (p.startswith("Unknown") or p.startswith("Error"))]
+            if valid:
+                top, count = Counter(valid).most_common(1)[0]
+                out.append(top if count > 1 else g)
+            else:
+                out.append(g)
+        else:
+            out.append(g)
+    return out
+
+
+def check(labels, probs):
+    ok = True
+    for window in (3, 5, 8, 20):
+        for name, legacy in (("vote", legacy_vote), ("majority", legacy_majority)):
+            sm = make_smoother(name, classes=CLASSES, window=window)
+            new = [sm.update(g, p)[0] for g, p in zip(labels, probs)]
+            old = legacy(labels, window)
+            bad = sum(a != b for a, b in zip(old, new))
+            ok &= bad == 0
+            print(f"  {name:<9} window {window:>3}: {'✅ identical' if not bad else f'❌ {bad} frames differ'}")
+
+    # windowed probability average vs a plain mean over the window
+    window = 7
+    sm = make_smoother("prob", classes=CLASSES, window=window)
+    ring, worst = deque(maxlen=window), 0.0
+    for g, p in zip(labels, probs):
+        _, conf = sm.update(g, p)
+        if p is None:
+            continue
+        ring.append(p)
+        worst = max(worst, abs(np.mean(ring, axis=0).max() - conf))
+    ok &= worst < 1e-9
+    print(f"  prob      window {window:>3}: max |running - exact| = {worst:.2e}")
+    return ok
+
+
+def time_update(name, window, labels, probs):
+    sm = make_smoother(name, classes=CLASSES, window=window)
+    t0 = time.perf_counter()
+    for g, p in zip(labels, probs):
+        sm.update(g, p)
+    return (time.perf_counter() - t0) / len(labels) * 1e6
+
+
+def time_legacy(name, window, labels):
+    t0 = time.perf_counter()
+    (legacy_vote if name == "vote" else legacy_majority)(labels, window)
+    return (time.perf_counter() - t0) / len(labels) * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Check and time the incremental smoothers")
+    ap.add_argument("--frames", type=int, default=20000)
+    ap.add_argument("--windows", default="5,25,100,400")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    labels, probs = random_stream(args.frames, rng)
+
+    print("🔎 equivalence with the old per-frame Counter code")
+    ok = check(labels, probs)
+
+    windows = [int(w) for w in args.windows.split(",")]
+    strategies = ["vote", "majority", "prob", "ema", "prob+hysteresis"]
+    print(f"\n⏱  us per frame ({args.frames} frames)")
+    print(f"  {'strategy':<18}" + "".join(f"{'w=' + str(w):>10}" for w in windows))
+    for name in ("vote", "majority"):
+        print(f"  {name + ' (Counter)':<18}" + "".join(f"{time_legacy(name, w, labels):>10.2f}" for w in windows))
+    for name in strategies:
+        print(f"  {name:<18}" + "".join(f"{time_update(name, w, labels, probs):>10.2f}" for w in windows))
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
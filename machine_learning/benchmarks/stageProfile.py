@@ -0,0 +1,430 @@
+# per-stage latency / allocation profile of the interpreter pipeline
+#
+# replays recorded frames through each interpreter variant and times every
+# stage between bytes arriving on the port and the result being handed to
+# the GUI. two implementations are profiled per variant:
+#   legacy   the per-frame code the scripts started with (DataFrame + sklearn):
+#            readline  decode  digit_check  split  float_parse  normalize  scale
+#            predict_proba  inverse_transform  vote
+#   current  what the scripts run now: ser.read of what is waiting, one
+#            FrameDecoder.feed per read, then the model load_pipeline picks
+#            (model.bundle when it matches the pickles, compiled forest /
+#            NumPy MLP, fused preprocess):
+#            read  feed  scale  predict_proba  inverse_transform  vote
+# plus dispatch (Tk root.after -> callback) with --tk. read / feed are timed
+# per call (--chunk bytes waiting per read), the other stages per frame;
+# total_mean is all the time spent divided by the frames.
+#
+# results are saved as JSON (meta.models: the file each variant loaded and
+# its sha1); --compare flags stages that got slower.
+#
+# usage:
+#   python machine_learning/benchmarks/stageProfile.py --frames 2000 --out profile.json
+#   python machine_learning/benchmarks/stageProfile.py --compare profile.json
+#   python machine_learning/benchmarks/stageProfile.py --impl current --chunk 4096   # a backlog per read
+#   python machine_learning/benchmarks/stageProfile.py --source pty --rate 1000   # through gloveSimulator
+#   xvfb-run python machine_learning/benchmarks/stageProfile.py --tk              # include Tk dispatch
+
+import os
+import io
+import sys
+import json
+import time
+import hashlib
+import argparse
+import platform
+import threading
+import tracemalloc
+import warnings
+from collections import Counter, deque
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ML_DIR   = os.path.dirname(BASE_DIR)
+sys.path.insert(0, ML_DIR)
+
+from gesturePipeline import VARIANTS, load_pipeline, variant_dir
+from frameProtocol import FrameDecoder, encode_ascii
+from gloveSimulator import load_recordings
+from smoothing import make_smoother
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+STAGES = ["readline", "decode", "digit_check", "split", "float_parse", "read", "feed",
+          "normalize", "scale", "predict_proba", "inverse_transform", "vote", "dispatch"]
+
+
+class StageRecorder:
+    """collects per-stage durations (ns) and allocation peaks (bytes)"""
+
+    def __init__(self):
+        self.ns = {s: [] for s in STAGES}
+        self.alloc = {s: [] for s in STAGES}
+        self.trace = False
+
+    def lap(self, stage, t0):
+        t1 = time.perf_counter_ns()
+        self.ns[stage].append(t1 - t0)
+        if self.trace:
+            cur, peak = tracemalloc.get_traced_memory()
+            self.alloc[stage].append(peak - self._base)
+            tracemalloc.reset_peak()
+            self._base = cur
+            return time.perf_counter_ns()
+        return t1
+
+    def start(self):
+        if self.trace:
+            self._base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        return time.perf_counter_ns()
+
+    def summary(self):
+        out = {}
+        for s in STAGES:
+            if not self.ns[s]:
+                continue
+            us = np.asarray(self.ns[s]) / 1000.0
+            p50, p95, p99 = np.percentile(us, [50, 95, 99])
+            entry = {"n": len(us), "mean_us": float(us.mean()), "p50_us": float(p50),
+                     "p95_us": float(p95), "p99_us": float(p99)}
+            if self.alloc[s]:
+                entry["alloc_peak_bytes_mean"] = float(np.mean(self.alloc[s]))
+            out[s] = entry
+        return out
+
+
+# ── replay sources ────────────────────────────────────────────────────────────
+class MemorySerial:
+    """
+    readline() / read() / in_waiting over an in-memory byte stream
+    (deterministic); in_waiting reports at most `chunk` bytes, what has
+    arrived since the last read
+    """
+
+    def __init__(self, data, chunk):
+        self._buf = io.BytesIO(data)
+        self._len = len(data)
+        self.chunk = chunk
+
+    def readline(self):
+        return self._buf.readline()
+
+    def read(self, n=1):
+        return self._buf.read(n)
+
+    @property
+    def in_waiting(self):
+        return min(self.chunk, self._len - self._buf.tell())
+
+
+def replay_bytes(n_frames):
+    recs = load_recordings()
+    rows = np.vstack([recs[g] for g in sorted(recs)])
+    rows = np.tile(rows, (-(-n_frames // len(rows)), 1))[:n_frames]
+    return b"Initializing MPU6050...\r\n" + b"".join(encode_ascii(r) for r in rows)
+
+
+def open_source(args, n_frames):
+    if args.source == "memory":
+        return MemorySerial(replay_bytes(n_frames), args.chunk), None
+    import serial
+    from gloveSimulator import GloveSimulator
+    sim = GloveSimulator(rate=args.rate, seed=0)
+    port = sim.start()
+    return serial.Serial(port, 115200, timeout=1), sim
+
+
+# ── per-frame code, one function per variant / implementation ─────────────────
+def make_legacy(variant):
+    """the original per-frame code of the variant's scripts"""
+    import joblib
+    import pandas as pd
+
+    d = variant_dir(variant)
+    cfg = VARIANTS[variant]
+    if cfg["normalize"]:
+        sys.path.insert(0, d)
+        from normalizeFunction import normalize
+    model   = joblib.load(os.path.join(d, "gesture_model.pkl"))
+    encoder = joblib.load(os.path.join(d, "label_encoder.pkl"))
+    scaler  = joblib.load(os.path.join(d, "scaler.pkl")) if cfg["scaler"] else None
+    window  = deque(maxlen=5)
+    recent  = []
+
+    def predict(parts, rec, t):
+        arr = parts
+        if cfg["normalize"]:
+            arr = normalize(parts[:5], 100, 700) + normalize(parts[5:], -1, 2)
+            t = rec.lap("normalize", t)
+        arr = np.array(arr, dtype=np.float32).reshape(1, -1)
+        if scaler is not None:
+            arr = scaler.transform(pd.DataFrame(arr, columns=scaler.feature_names_in_))
+            t = rec.lap("scale", t)
+        probs = model.predict_proba(arr)
+        t = rec.lap("predict_proba", t)
+        idx = int(np.argmax(probs))
+        conf = probs[0][idx]
+        gesture = encoder.inverse_transform([idx])[0]
+        gesture = gesture if conf >= 0.75 else "Unknown"
+        t = rec.lap("inverse_transform", t)
+
+        if cfg["smoothing"] == "vote":
+            window.append(gesture)
+            top, freq = Counter(window).most_common(1)[0]
+            gesture = top if (freq >= 3 and top != "Unknown") else "Unknown"
+            t = rec.lap("vote", t)
+        elif cfg["smoothing"] == "majority":
+            recent.append(gesture)
+            if len(recent) > 5:
+                recent.pop(0)
+            valid = [p for p in recent if not (p.startswith("Unknown") or p.startswith("Error"))]
+            if len(recent) == 5 and valid:
+                top, count = Counter(valid).most_common(1)[0]
+                gesture = top if count > 1 else gesture
+            t = rec.lap("vote", t)
+        return gesture, t
+
+    return predict
+
+
+def make_current(variant, smoothing=None):
+    """what the scripts run per frame now (smoothing: override the variant's strategy)"""
+    pipe = load_pipeline(variant)
+    smoothing = smoothing or VARIANTS[variant]["smoothing"]
+    smoother = make_smoother(smoothing, classes=pipe.classes, window=5)
+
+    def predict(parts, rec, t):
+        if pipe.preprocess is not None:
+            X = pipe.preprocess.transform_frame(parts)
+        else:
+            X = np.array(parts, dtype=np.float32).reshape(1, -1)
+        t = rec.lap("scale", t)
+        probs = pipe.model.predict_proba(X)
+        t = rec.lap("predict_proba", t)
+        idx = int(np.argmax(probs[0]))
+        conf = probs[0][idx]
+        gesture = pipe.classes[idx] if conf >= pipe.threshold else "Unknown"
+        t = rec.lap("inverse_transform", t)
+
+        if smoothing != "none":
+            gesture, _ = smoother.update(gesture, probs[0])
+            t = rec.lap("vote", t)
+        return gesture, t
+
+    return predict
+
+
+def run_frames(ser, predict, rec, n_frames, dispatch=None):
+    """the legacy read loop (one readline per frame), instrumented"""
+    done = 0
+    while done < n_frames:
+        t = rec.start()
+        raw = ser.readline()
+        t = rec.lap("readline", t)
+        if not raw:
+            break
+        line = raw.decode("utf-8", errors="ignore").strip()
+        t = rec.lap("decode", t)
+        ok = any(ch.isdigit() for ch in line) and "Initializing" not in line
+        t = rec.lap("digit_check", t)
+        if not ok:
+            continue
+        fields = line.split(",")
+        t = rec.lap("split", t)
+        if len(fields) != 8:
+            continue
+        try:
+            parts = [float(x) for x in fields]
+        except ValueError:
+            continue
+        t = rec.lap("float_parse", t)
+        gesture, t = predict(parts, rec, t)
+        if dispatch is not None:
+            dispatch(gesture)
+        done += 1
+    return done
+
+
+def run_chunks(ser, predict, rec, n_frames, dispatch=None):
+    """the interpreters' read loop now: what is waiting on the port, one FrameDecoder.feed per read"""
+    decoder = FrameDecoder("ascii")
+    done = 0
+    while done < n_frames:
+        t = rec.start()
+        data = ser.read(ser.in_waiting or 1)
+        t = rec.lap("read", t)
+        if not data:
+            break
+        frames = decoder.feed(data)
+        t = rec.lap("feed", t)
+        for parts in frames[:n_frames - done]:
+            gesture, _ = predict(parts, rec, t)
+            if dispatch is not None:
+                dispatch(gesture)
+            done += 1
+            t = rec.start()
+    return done
+
+
+class TkDispatch:
+    """measures root.after(0, ...) -> callback latency like the GUI read loops"""
+
+    def __init__(self, rec):
+        import tkinter as tk
+        self.root = tk.Tk()
+        self.root.withdraw()
+        self.rec = rec
+
+    def __call__(self, gesture):
+        t0 = time.perf_counter_ns()
+        self.root.after(0, lambda: self.rec.ns["dispatch"].append(time.perf_counter_ns() - t0))
+
+    def run(self, worker):
+        th = threading.Thread(target=worker, daemon=True)
+        th.start()
+
+        def poll():
+            if th.is_alive():
+                self.root.after(5, poll)
+            else:
+                self.root.after(50, self.root.quit)
+        poll()
+        self.root.mainloop()
+        self.root.destroy()
+
+
+def profile(variant, impl, args, trace):
+    rec = StageRecorder()
+    rec.trace = trace
+    if impl == "legacy":
+        predict, loop = make_legacy(variant), run_frames
+    else:
+        predict, loop = make_current(variant, args.smoothing), run_chunks
+    ser, sim = open_source(args, args.frames + 1)
+    try:
+        if trace:
+            tracemalloc.start()
+        if args.tk and not trace:
+            disp = TkDispatch(rec)
+            disp.run(lambda: loop(ser, predict, rec, args.frames, disp))
+        else:
+            loop(ser, predict, rec, args.frames)
+    finally:
+        if trace:
+            tracemalloc.stop()
+        if sim is not None:
+            sim.stop()
+    return rec
+
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        h.update(f.read())
+    return h.hexdigest()
+
+
+def loaded_model(variant):
+    """the file the current implementation runs (model.bundle or gesture_model.pkl) and its sha1"""
+    source = load_pipeline(variant).source
+    return {"file": os.path.relpath(source, ML_DIR), "sha1": file_sha1(source)}
+
+
+def git_commit():
+    try:
+        import subprocess
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ML_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def print_table(name, stages):
+    print(f"\n{name}")
+    print(f"  {'stage':<18}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}{'alloc B':>10}")
+    for s, e in stages.items():
+        alloc = e.get("alloc_peak_bytes_mean")
+        alloc = f"{alloc:10.0f}" if alloc is not None else f"{'-':>10}"
+        print(f"  {s:<18}{e['p50_us']:10.1f}{e['p95_us']:10.1f}{e['p99_us']:10.1f}{alloc}")
+
+
+def compare(old, new, tolerance):
+    """returns the list of (run, stage, old p95, new p95) that got slower than tolerance"""
+    worse = []
+    for run, stages in new["runs"].items():
+        for s, e in stages.items():
+            prev = old.get("runs", {}).get(run, {}).get(s)
+            if prev and e["p95_us"] > prev["p95_us"] * (1.0 + tolerance):
+                worse.append((run, s, prev["p95_us"], e["p95_us"]))
+    return worse
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-stage latency profile of the interpreters")
+    ap.add_argument("--variants", default=",".join(VARIANTS), help="comma separated")
+    ap.add_argument("--impl", default="legacy,current", help="legacy, current or both")
+    ap.add_argument("--frames", type=int, default=1000)
+    ap.add_argument("--source", choices=["memory", "pty"], default="memory")
+    ap.add_argument("--rate", type=float, default=1000.0, help="simulator rate for --source pty")
+    ap.add_argument("--chunk", type=int, default=48,
+                    help="bytes waiting per read for --source memory (48: about one line, what "
+                         "the loop finds at 9600 baud)")
+    ap.add_argument("--tk", action="store_true", help="measure Tk root.after dispatch (needs a display)")
+    ap.add_argument("--smoothing", help="strategy for the current impl (default: the variant's own)")
+    ap.add_argument("--no-alloc", action="store_true", help="skip the tracemalloc pass")
+    ap.add_argument("--out", help="write results as JSON")
+    ap.add_argument("--compare", help="earlier JSON to compare p95 against")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 slowdown (0.25 = 25%%)")
+    args = ap.parse_args()
+
+    import sklearn
+    result = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "sklearn": sklearn.__version__,
+            "frames": args.frames,
+            "source": args.source,
+            "chunk": args.chunk,
+            "models": {v: loaded_model(v) for v in VARIANTS},
+        },
+        "runs": {},
+    }
+
+    for variant in args.variants.split(","):
+        for impl in args.impl.split(","):
+            name = f"{variant}/{impl}"
+            rec = profile(variant, impl, args, trace=False)
+            stages = rec.summary()
+            if not args.no_alloc:
+                alloc = profile(variant, impl, args, trace=True).summary()
+                for s, e in alloc.items():
+                    if s in stages and "alloc_peak_bytes_mean" in e:
+                        stages[s]["alloc_peak_bytes_mean"] = e["alloc_peak_bytes_mean"]
+            total = sum(e["mean_us"] * e["n"] for s, e in stages.items() if s != "dispatch") / args.frames
+            stages["total_mean"] = {"n": 0, "mean_us": total, "p50_us": total, "p95_us": total, "p99_us": total}
+            result["runs"][name] = stages
+            print_table(name, stages)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 saved {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        worse = compare(old, result, args.tolerance)
+        for run, s, a, b in worse:
+            print(f"⚠️  {run} {s}: p95 {a:.1f} -> {b:.1f} us")
+        if worse:
+            sys.exit(1)
+        print(f"✅ no stage slower than {args.tolerance:.0%} vs {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
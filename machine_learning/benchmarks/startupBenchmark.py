@@ -0,0 +1,123 @@
+# startup time: pickles (joblib + sklearn) vs model.bundle (memory-mapped)
+#
+# every measurement runs in a fresh python process, so imports are cold
+# (module caches, not the OS file cache). for each variant and path it records
+#   load   importing the helpers + loading the model until it can predict
+#   first  the first predict_proba call
+#   proc   wall time of the whole process (interpreter start included)
+#   rss    peak resident memory of the process
+# and checks that both paths give identical probabilities on the recorded data.
+#
+# usage:
+#   python machine_learning/modelBundle.py export --variant all
+#   python machine_learning/benchmarks/startupBenchmark.py --repeat 7
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+import numpy as np
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ML_DIR)
+from gesturePipeline import VARIANTS, variant_dir
+
+# runs in the child process; prints one JSON line
+CHILD = r"""
+import os, sys, time, json, warnings, resource
+t0 = time.perf_counter()
+sys.path.insert(0, {ml_dir!r})
+import numpy as np
+d, path, cfg = {dir!r}, {path!r}, {cfg!r}
+if path == "bundle":
+    from modelBundle import load_current_bundle
+    b = load_current_bundle(os.path.join(d, "model.bundle"))
+    if b is None:
+        sys.exit("model.bundle is missing or older than the pickles, re-export it")
+    model, preprocess = b.model, b.preprocess
+else:
+    import joblib
+    warnings.simplefilter("ignore", UserWarning)
+    model = joblib.load(os.path.join(d, "gesture_model.pkl"))
+    encoder = joblib.load(os.path.join(d, "label_encoder.pkl"))
+    scaler = joblib.load(os.path.join(d, "scaler.pkl")) if cfg["scaler"] else None
+    from fusedPreprocess import FusedPreprocessor, mlp_preprocessor
+    if hasattr(model, "estimators_"):
+        from forestEngine import compile_forest
+        model = compile_forest(model)
+    if cfg["normalize"]:
+        preprocess = mlp_preprocessor(scaler)
+    elif scaler is not None:
+        preprocess = FusedPreprocessor.from_scaler(scaler)
+    else:
+        preprocess = None
+t1 = time.perf_counter()
+x = np.array([[801, 802, 0, 795, 881, 2.32, 9.58, -0.60]], dtype=np.float32)
+if preprocess is not None:
+    x = preprocess.transform(x)
+model.predict_proba(x)
+t2 = time.perf_counter()
+# ru_maxrss survives exec on Linux (it would include the parent), VmHWM doesn't
+try:
+    rss = next(int(l.split()[1]) for l in open("/proc/self/status") if l.startswith("VmHWM"))
+except OSError:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"load": t1 - t0, "first": t2 - t1, "rss": rss,
+                  "sklearn": "sklearn" in sys.modules, "pandas": "pandas" in sys.modules}}))
+"""
+
+
+def run_child(variant, path):
+    code = CHILD.format(ml_dir=ML_DIR, dir=variant_dir(variant), path=path, cfg=VARIANTS[variant])
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    r = json.loads(out.stdout.strip().splitlines()[-1])
+    r["proc"] = time.perf_counter() - t0
+    return r
+
+
+def check_equal(variant):
+    from gesturePipeline import load_pipeline
+    from gloveSimulator import load_recordings
+    X = np.concatenate(list(load_recordings().values())).astype(np.float32)
+    a = load_pipeline(variant, bundle=True).predict_proba(X.copy())
+    b = load_pipeline(variant, bundle=False).predict_proba(X.copy())
+    return bool(np.array_equal(a, b))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Cold-start time of pickles vs model.bundle")
+    ap.add_argument("--variants", default=",".join(VARIANTS), help="comma separated")
+    ap.add_argument("--repeat", type=int, default=5, help="fresh processes per measurement")
+    args = ap.parse_args()
+
+    ok = True
+    print(f"{'variant':<10} {'path':<7} {'load ms':>9} {'first ms':>9} {'proc ms':>9} "
+          f"{'rss MiB':>8}  imports")
+    for v in args.variants.split(","):
+        if not os.path.exists(os.path.join(variant_dir(v), "model.bundle")):
+            print(f"{v:<10} no model.bundle, run: python machine_learning/modelBundle.py export")
+            ok = False
+            continue
+        rows = {}
+        for path in ("pickle", "bundle"):
+            runs = [run_child(v, path) for _ in range(args.repeat)]
+            med = {k: float(np.median([r[k] for r in runs])) for k in ("load", "first", "proc", "rss")}
+            rss = med["rss"] / (1024 * 1024 if sys.platform == "darwin" else 1024)
+            mods = [m for m in ("sklearn", "pandas") if runs[0][m]]
+            rows[path] = med
+            print(f"{v:<10} {path:<7} {med['load'] * 1e3:>9.1f} {med['first'] * 1e3:>9.2f} "
+                  f"{med['proc'] * 1e3:>9.1f} {rss:>8.1f}  {', '.join(mods) or 'numpy only'}")
+        same = check_equal(v)
+        ok &= same
+        print(f"{'':<10} speedup {rows['pickle']['load'] / rows['bundle']['load']:.1f}x load, "
+              f"{rows['pickle']['proc'] / rows['bundle']['proc']:.1f}x process; "
+              f"{'✅ identical probabilities' if same else '❌ probabilities differ'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+# predictionStream.py under load: many WebSocket clients, some of them stalled
+#
+# starts predictionStream.py with --gloves simulated gloves (no hardware) and
+# connects local WebSocket clients in rounds. every round has N clients that
+# read as fast as they can and S stalled clients that connect and then never
+# read (a frozen browser tab). per round:
+#   msg/s     messages per second per reading client (capped by --max-hz)
+#   p50/p95   ms from a glove frame being scored to a client receiving it
+#   bytes     average message size
+#   frames/s  glove frames scored per second, from the "seq" counters; should
+#             stay at gloves x rate however many clients there are
+#
+# usage:
+#   python machine_learning/benchmarks/streamLoadTest.py
+#   python machine_learning/benchmarks/streamLoadTest.py --clients 1,50,200 --stalled 20 --seconds 10
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import subprocess
+
+import numpy as np
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def reader(url, stats, stop):
+    import json
+    import websockets
+    async with websockets.connect(url, compression=None, max_size=None) as ws:
+        await ws.recv()                                      # connection message
+        while not stop.is_set():
+            try:
+                data = await asyncio.wait_for(ws.recv(), 0.5)
+            except asyncio.TimeoutError:
+                continue
+            now = time.time()
+            msg = json.loads(data)
+            stats["messages"] += 1
+            stats["bytes"] += len(data)
+            for name, e in msg["gloves"].items():
+                stats["latency"].append(now - e["t"])
+                first = stats["seq0"].setdefault(name, (e["seq"], now))
+                stats["seq"][name] = (e["seq"], now, first)
+
+
+async def stalled(url, stop):
+    import websockets
+    async with websockets.connect(url, compression=None, max_queue=1) as ws:
+        await ws.recv()
+        await stop.wait()                                    # never reads again
+
+
+async def round_(url, n, n_stalled, seconds):
+    stop = asyncio.Event()
+    per_client = [{"messages": 0, "bytes": 0, "latency": [], "seq0": {}, "seq": {}} for _ in range(n)]
+    tasks = [asyncio.create_task(stalled(url, stop)) for _ in range(n_stalled)]
+    await asyncio.sleep(0.5)                                 # let the stalled ones fill up first
+    tasks += [asyncio.create_task(reader(url, s, stop)) for s in per_client]
+    await asyncio.sleep(seconds)
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    lat = np.concatenate([s["latency"] for s in per_client]) * 1e3
+    msgs = sum(s["messages"] for s in per_client)
+    fps = []
+    for name, (seq, t, (seq0, t0)) in per_client[0]["seq"].items():
+        fps.append((seq - seq0) / (t - t0) if t > t0 else 0.0)
+    return {
+        "msg_s": msgs / n / seconds,
+        "p50": float(np.percentile(lat, 50)) if len(lat) else 0.0,
+        "p95": float(np.percentile(lat, 95)) if len(lat) else 0.0,
+        "bytes": sum(s["bytes"] for s in per_client) / max(msgs, 1),
+        "fps": sum(fps),
+    }
+
+
+async def run(args):
+    url = f"ws://127.0.0.1:{args.ws_port}"
+    print(f"{args.gloves} gloves x {args.rate:.0f} samples/s, at most {args.max_hz:g} messages/s per client\n")
+    print(f"{'clients':>8} {'stalled':>8} {'msg/s':>7} {'p50 ms':>7} {'p95 ms':>7} {'bytes':>6} {'frames/s':>9}")
+    for n in [int(v) for v in args.clients.split(",")]:
+        for n_stalled in sorted({0, args.stalled}):
+            r = await round_(url, n, n_stalled, args.seconds)
+            print(f"{n:>8} {n_stalled:>8} {r['msg_s']:>7.1f} {r['p50']:>7.1f} {r['p95']:>7.1f} "
+                  f"{r['bytes']:>6.0f} {r['fps']:>9.0f}", flush=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="predictionStream.py with many local WebSocket clients")
+    ap.add_argument("--variant", default="rf_raw")
+    ap.add_argument("--gloves", type=int, default=2, help="simulated gloves")
+    ap.add_argument("--rate", type=float, default=100.0, help="samples/s per glove")
+    ap.add_argument("--clients", default="1,10,50,100", help="reading clients per round")
+    ap.add_argument("--stalled", type=int, default=10, help="clients that never read (0 = none)")
+    ap.add_argument("--max-hz", type=float, default=30.0)
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--ws-port", type=int, default=8799)
+    args = ap.parse_args()
+    try:
+        import websockets  # noqa: F401
+    except ImportError:
+        print("❌ needs the websockets package: pip install websockets")
+        return 1
+
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ML_DIR, "predictionStream.py"), "--variant", args.variant,
+         "--simulate", str(args.gloves), "--sim-rate", str(args.rate), "--ws-port", str(args.ws_port),
+         "--max-hz", str(args.max_hz), "--report-every", "0"],
+        stdout=subprocess.PIPE, text=True)
+    try:
+        for line in server.stdout:
+            if line.startswith("📡 ws://"):
+                break
+        asyncio.run(run(args))
+    finally:
+        server.terminate()
+        server.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+# temporal features: streaming vs offline, and the per-frame cost
+#
+# 1. for every recording run of the dataset (one file, one label), feeds the
+#    frames one by one through TemporalFeatures and checks the result is
+#    bit-identical to temporalFeatures.extract() on the whole run (what the
+#    models are trained on)
+# 2. times update() per frame for a few window sizes against recomputing the
+#    stats from the last `window` frames every frame (the naive way); update()
+#    should stay flat as the window grows
+#
+# usage:
+#   python machine_learning/benchmarks/temporalCheck.py
+#   python machine_learning/benchmarks/temporalCheck.py --windows 5,10,50,200 --frames 5000
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ML_DIR)
+from datasetCache import load_dataset
+from temporalFeatures import ACCEL, N_FEATURES, TemporalFeatures, extract, quantize, runs
+
+
+def naive(history, window):
+    """the same features by re-scanning the last `window` frames"""
+    q = quantize(history[-window:])
+    cur, prev = q[-1], q[-2] if len(q) > 1 else q[-1]
+    mag2 = (q[:, ACCEL] ** 2).sum(axis=1)
+    return np.concatenate([cur, q.mean(axis=0), q.var(axis=0), q.min(axis=0), q.max(axis=0),
+                           cur - prev, [np.sqrt(mag2[-1]), np.sqrt(mag2.mean())]])
+
+
+def main():
+    ap = argparse.ArgumentParser(description="TemporalFeatures: streaming == offline, cost per frame")
+    ap.add_argument("--window", type=int, default=10, help="window for the equality check")
+    ap.add_argument("--windows", default="1,5,10,50,200", help="windows to time")
+    ap.add_argument("--frames", type=int, default=1000, help="timed frames per window")
+    ap.add_argument("--repeat", type=int, default=15, help="timed passes, the best one counts")
+    args = ap.parse_args()
+
+    ds = load_dataset()
+    X = np.asarray(ds.X)
+    pieces = runs(np.stack([np.asarray(ds.row_file), np.asarray(ds.y)], axis=1))
+    t0 = time.perf_counter()
+    mismatched = 0
+    for start, stop in pieces:
+        live = TemporalFeatures(args.window).update_many(X[start:stop])
+        mismatched += not np.array_equal(live, extract(X[start:stop], args.window))
+    print(f"{len(pieces)} runs, {len(X)} frames, window {args.window}: "
+          f"{'✅ streaming == offline' if not mismatched else f'❌ {mismatched} runs differ'} "
+          f"({time.perf_counter() - t0:.1f} s)\n")
+
+    frames = np.resize(X, (args.frames, X.shape[1]))
+    print(f"{'window':>7} {'update µs':>10} {'naive µs':>9} {'extract µs':>11}  ({N_FEATURES} features)")
+    for w in [int(v) for v in args.windows.split(",")]:
+        inc = slow = off = float("inf")
+        # interleaved best-of passes: a busy machine slows all three alike
+        for _ in range(args.repeat):
+            tf = TemporalFeatures(w)
+            t = time.perf_counter()
+            for f in frames:
+                tf.update(f)
+            inc = min(inc, (time.perf_counter() - t) / len(frames))
+            t = time.perf_counter()
+            for i in range(len(frames)):
+                naive(frames[max(0, i - w + 1):i + 1], w)
+            slow = min(slow, (time.perf_counter() - t) / len(frames))
+            t = time.perf_counter()
+            extract(frames, w)
+            off = min(off, (time.perf_counter() - t) / len(frames))
+        print(f"{w:>7} {inc * 1e6:>10.1f} {slow * 1e6:>9.1f} {off * 1e6:>11.2f}", flush=True)
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
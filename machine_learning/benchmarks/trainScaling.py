@@ -0,0 +1,61 @@
+# how the training grid scales with worker processes
+#
+# builds (or reuses) the cached folds once, then runs the same grid from
+# trainModels.py with 1, 2, 4, ... processes up to the CPU count and prints
+# wall time, speedup over one process and efficiency (speedup / processes).
+# the cross-validation scores must not depend on the process count.
+#
+# usage:
+#   python machine_learning/benchmarks/trainScaling.py --variant rf_scaler
+#   python machine_learning/benchmarks/trainScaling.py --jobs 1,2,4,8 --models rf
+
+import os
+import sys
+import argparse
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ML_DIR)
+from datasetCache import load_dataset
+from gesturePipeline import VARIANTS
+from trainModels import TRAIN_DEFAULTS, build_folds, candidates, run_grid
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    steps = [1]
+    while steps[-1] * 2 <= cpus:
+        steps.append(steps[-1] * 2)
+    if steps[-1] != cpus:
+        steps.append(cpus)
+
+    ap = argparse.ArgumentParser(description="Training grid wall time vs worker processes")
+    ap.add_argument("--variant", default="rf_scaler", choices=list(VARIANTS))
+    ap.add_argument("--models", help="comma separated (default per variant)")
+    ap.add_argument("--folds", type=int, default=5)
+    ap.add_argument("--jobs", default=",".join(map(str, steps)), help="process counts to try")
+    args = ap.parse_args()
+
+    defaults = TRAIN_DEFAULTS[args.variant]
+    classes = defaults["classes"]
+    ds = load_dataset().select(sources=defaults["sources"].split(","),
+                               classes=classes.split(",") if classes else None)
+    folder, _ = build_folds(ds, args.variant, args.folds)
+    cands = candidates((args.models or defaults["models"]).split(","))
+    print(f"{len(cands)} candidates x {args.folds} folds, {len(ds)} rows, {cpus} CPUs\n")
+    print(f"{'jobs':>5} {'wall s':>8} {'speedup':>8} {'efficiency':>11}")
+
+    base = scores = None
+    ok = True
+    for jobs in [int(j) for j in args.jobs.split(",")]:
+        results, wall = run_grid(folder, cands, args.folds, jobs)
+        acc = [r["folds"] for r in results]
+        if scores is None:
+            base, scores = wall, acc
+        ok &= acc == scores
+        print(f"{jobs:>5} {wall:>8.2f} {base / wall:>7.2f}x {base / wall / jobs:>10.0%}", flush=True)
+    print("\n✅ same scores for every process count" if ok else "\n❌ scores depend on the process count")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,334 @@
+# per-glove calibration profiles + vectorized per-channel normalization
+
+# normalizeFunction.normalize() used one min/range for all five flex sensors
+# (100/700) and one for the IMU (-1/2). the recorded data doesn't fit that:
+# most flex channels sit between ~750 and ~970, and one thumb sensor reads 0
+# on some gloves. a calibration profile stores each channel's own min / max
+# for one glove:
+#
+#   capture  hold open hand / fist a few times, the medians of every pose give
+#            each flex channel's two extremes (optional "tilt" pose for the IMU)
+#   fit-csv  robust (1st / 99th percentile) range of recorded CSVs, e.g. the
+#            data a model was trained on
+#
+# profiles live in machine_learning/calibrations/<glove>.json and list the
+# channels they actually measured ("calibrated"). ChannelNormalizer applies them
+# to one frame or an (n, 8) array without a python loop, and apply_calibration()
+# remaps a glove's measured ranges onto the ranges a model was trained with,
+# folded into the interpreters' fused preprocessing; unmeasured channels pass
+# through unchanged.
+#
+# usage:
+#   python machine_learning/calibration.py capture --glove left01 --port COM4
+#   python machine_learning/calibration.py fit-csv --glove train_new New_Data/*.csv
+#   python machine_learning/calibration.py apply --glove left01 raw.csv normalized.csv
+#   GLOVE_ID=left01 python "machine_learning/MLP Interpreter (WIP)/Interpret.py"
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+
+import numpy as np
+
+from fusedPreprocess import FusedPreprocessor, FLEX_MIN, FLEX_RANGE, IMU_MIN, IMU_RANGE
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+CALIBRATION_DIR = os.path.join(ML_DIR, "calibrations")
+REFERENCE_NAME = "calibration_reference.json"   # next to a model: ranges it was trained on
+
+CHANNELS = ["F1", "F2", "F3", "F4", "F5", "X", "Y", "Z"]
+N_FLEX = 5
+POSES = {
+    "open": "open your hand flat, fingers straight",
+    "fist": "close your hand into a tight fist",
+}
+TILT_POSE = ("tilt", "slowly rotate your wrist through every direction")
+
+
+class ChannelNormalizer:
+    """
+    minimum, range: per-channel vectors, output = (x - minimum) / range
+    decimals      : round the output like normalize() did (None = no rounding)
+    """
+
+    def __init__(self, minimum, range, decimals=None):
+        self.minimum = np.asarray(minimum, dtype=np.float64).reshape(-1)
+        self.range = np.asarray(range, dtype=np.float64).reshape(-1)
+        if np.any(self.range == 0):
+            raise ValueError("calibration range is 0 for channel(s) "
+                             f"{np.flatnonzero(self.range == 0).tolist()}")
+        self.decimals = decimals
+
+    @classmethod
+    def legacy(cls, decimals=None):
+        """the old hard-coded constants: flex 100 / 700, IMU -1 / 2"""
+        return cls([FLEX_MIN] * N_FLEX + [IMU_MIN] * 3,
+                   [FLEX_RANGE] * N_FLEX + [IMU_RANGE] * 3, decimals)
+
+    @classmethod
+    def from_profile(cls, profile, decimals=None):
+        lo = np.asarray(profile["min"], dtype=np.float64)
+        hi = np.asarray(profile["max"], dtype=np.float64)
+        return cls(lo, hi - lo, decimals)
+
+    def transform(self, X, out=None):
+        """X: one frame (8,) or frames (n, 8); returns float64 of the same shape"""
+        X = np.asarray(X, dtype=np.float64)
+        out = np.subtract(X, self.minimum, out=out)
+        out /= self.range
+        if self.decimals is not None:
+            np.round(out, self.decimals, out=out)
+        return out
+
+    def remap_to(self, reference):
+        """
+        per-channel (scale, offset) so that x * scale + offset puts this glove's
+        [min, max] onto the reference's [min, max]
+        """
+        scale = reference.range / self.range
+        offset = reference.minimum - self.minimum * scale
+        return scale, offset
+
+
+# ── profiles ─────────────────────────────────────────────────────────────────
+def profile_path(glove):
+    """glove id -> calibrations/<glove>.json (paths are returned as they are)"""
+    if glove.endswith(".json") or os.sep in glove:
+        return glove
+    return os.path.join(CALIBRATION_DIR, f"{glove}.json")
+
+
+def load_profile(glove):
+    with open(profile_path(glove)) as f:
+        return json.load(f)
+
+
+def save_profile(profile, path=None):
+    path = path or profile_path(profile["glove"])
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(profile, f, indent=2)
+    return path
+
+
+def make_profile(glove, lo, hi, source, calibrated=CHANNELS, **extra):
+    """calibrated: channels whose min / max were measured (the rest are placeholders)"""
+    lo, hi = np.asarray(lo, dtype=np.float64), np.asarray(hi, dtype=np.float64)
+    # a dead / stuck sensor has no range; keep it at 1 so it normalizes to a constant
+    dead = hi <= lo
+    hi = np.where(dead, lo + 1.0, hi)
+    profile = {
+        "glove": glove,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "source": source,
+        "channels": CHANNELS,
+        "min": lo.round(4).tolist(),
+        "max": hi.round(4).tolist(),
+        "dead_channels": [CHANNELS[i] for i in np.flatnonzero(dead)],
+        "calibrated": list(calibrated),
+    }
+    profile.update(extra)
+    return profile
+
+
+def calibrated_channels(profile):
+    """
+    boolean mask of the channels a profile actually measured. older profiles
+    have no "calibrated" list; a capture without the tilt pose only measured
+    the flex sensors
+    """
+    names = profile.get("calibrated")
+    if names is None:
+        poses = profile.get("poses") or {}
+        names = CHANNELS[:N_FLEX] if profile.get("source") == "capture" \
+            and TILT_POSE[0] not in poses else CHANNELS
+    return np.isin(CHANNELS, names)
+
+
+def profile_from_frames(glove, X, lo_pct=1.0, hi_pct=99.0, source="data"):
+    """robust per-channel range of recorded frames (n, 8)"""
+    X = np.asarray(X, dtype=np.float64).reshape(-1, len(CHANNELS))
+    lo, hi = np.percentile(X, [lo_pct, hi_pct], axis=0)
+    return make_profile(glove, lo, hi, source, frames=len(X),
+                        percentiles=[lo_pct, hi_pct])
+
+
+def read_csv_frames(paths):
+    """the 8 sensor columns of recorded CSVs (header F1..Z,Gesture) as an (n, 8) array"""
+    rows = []
+    for path in paths:
+        with open(path, newline="") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for rec in reader:
+                try:
+                    rows.append([float(v) for v in rec[:8]])
+                except (ValueError, IndexError):
+                    continue
+    return np.array(rows, dtype=np.float64).reshape(-1, len(CHANNELS))
+
+
+# ── capture ──────────────────────────────────────────────────────────────────
+def collect_frames(ser, seconds, decoder=None):
+    """reads frames from an open serial port for `seconds`, returns (n, 8)"""
+    from frameProtocol import FrameDecoder
+    decoder = decoder or FrameDecoder()
+    chunks, end = [], time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        data = ser.read(ser.in_waiting or 1)
+        if data:
+            frames = decoder.feed(data)
+            if len(frames):
+                chunks.append(np.array(frames, dtype=np.float64))
+    return np.concatenate(chunks) if chunks else np.zeros((0, len(CHANNELS)))
+
+
+def capture(ser, glove, rounds=2, seconds=2.0, imu=False, prompt=input):
+    """
+    walks the user through every pose `rounds` times and returns a profile.
+    flex min / max come from the per-pose medians (so a twitch doesn't
+    stretch the range); the IMU keeps the legacy range unless imu=True adds
+    a tilt pose, whose 2nd / 98th percentiles are used instead
+    """
+    poses = list(POSES.items()) + ([TILT_POSE] if imu else [])
+    medians, tilt, counts = {p: [] for p, _ in poses}, [], {p: 0 for p, _ in poses}
+
+    ser.reset_input_buffer()
+    for r in range(rounds):
+        for pose, how in poses:
+            prompt(f"[{r + 1}/{rounds}] {pose}: {how}, then press Enter and hold it ")
+            X = collect_frames(ser, seconds)
+            if not len(X):
+                raise RuntimeError("no frames received from the glove; check the port")
+            print(f"   {len(X)} frames")
+            counts[pose] += len(X)
+            if pose == TILT_POSE[0]:
+                tilt.append(X)
+            else:
+                medians[pose].append(np.median(X, axis=0))
+
+    flex = np.array([m for p in POSES for m in medians[p]])
+    legacy = ChannelNormalizer.legacy()
+    lo, hi = legacy.minimum.copy(), legacy.minimum + legacy.range
+    lo[:N_FLEX], hi[:N_FLEX] = flex[:, :N_FLEX].min(axis=0), flex[:, :N_FLEX].max(axis=0)
+    if tilt:
+        T = np.concatenate(tilt)
+        lo[N_FLEX:], hi[N_FLEX:] = np.percentile(T[:, N_FLEX:], [2, 98], axis=0)
+
+    pose_info = {p: {"frames": counts[p],
+                     "median": np.mean(medians[p], axis=0).round(3).tolist() if medians[p] else None}
+                 for p, _ in poses}
+    calibrated = CHANNELS if tilt else CHANNELS[:N_FLEX]
+    return make_profile(glove, lo, hi, "capture", calibrated, rounds=rounds, seconds=seconds,
+                        poses=pose_info)
+
+
+# ── interpreters ─────────────────────────────────────────────────────────────
+def load_reference(model_dir):
+    """ranges the model in model_dir was trained with (calibration_reference.json), or None"""
+    path = os.path.join(model_dir, REFERENCE_NAME)
+    return ChannelNormalizer.from_profile(load_profile(path)) if os.path.exists(path) else None
+
+
+def apply_calibration(preprocess, glove, reference):
+    """
+    preprocess: the model's FusedPreprocessor (or None for raw input)
+    glove     : glove id / profile path (None or "" = no calibration)
+    reference : ChannelNormalizer of the ranges the model was trained on
+                (ChannelNormalizer.legacy() for the normalize() models)
+    returns a FusedPreprocessor that first maps this glove's ranges onto the
+    reference, then runs the model's own preprocessing. channels the profile
+    didn't measure (the IMU after a capture without --imu) pass through as is
+    """
+    if not glove:
+        return preprocess
+    if reference is None:
+        print(f"⚠️  no {REFERENCE_NAME} for this model, GLOVE_ID={glove} ignored")
+        return preprocess
+    profile = load_profile(glove)
+    scale, offset = ChannelNormalizer.from_profile(profile).remap_to(reference)
+    measured = calibrated_channels(profile)
+    scale, offset = np.where(measured, scale, 1.0), np.where(measured, offset, 0.0)
+    print(f"🧤 calibration: {profile['glove']} ({profile['source']}, {profile['created']}), "
+          f"channels {[c for c, m in zip(CHANNELS, measured) if m]}")
+    if preprocess is None:
+        return FusedPreprocessor(scale, offset)
+    return preprocess.compose_input(scale, offset)
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser(description="Per-glove calibration profiles")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    cap = sub.add_parser("capture", help="record open hand / fist poses from the glove")
+    cap.add_argument("--glove", required=True, help="profile name, e.g. left01")
+    cap.add_argument("--port", default=os.environ.get("GLOVE_PORT", "COM4"))
+    cap.add_argument("--baud", type=int, default=9600)
+    cap.add_argument("--rounds", type=int, default=2, help="times through every pose")
+    cap.add_argument("--seconds", type=float, default=2.0, help="seconds per pose")
+    cap.add_argument("--imu", action="store_true", help="also calibrate the IMU with a tilt pose")
+
+    fit = sub.add_parser("fit-csv", help="profile from recorded CSVs (robust percentiles)")
+    fit.add_argument("--glove", required=True)
+    fit.add_argument("--out", help="write here instead of calibrations/<glove>.json")
+    fit.add_argument("--low", type=float, default=1.0)
+    fit.add_argument("--high", type=float, default=99.0)
+    fit.add_argument("csv", nargs="+")
+
+    show = sub.add_parser("show", help="print a profile (or list all)")
+    show.add_argument("glove", nargs="?")
+
+    app = sub.add_parser("apply", help="write a normalized copy of a recorded CSV")
+    app.add_argument("--glove", help="profile (default: the legacy 100/700, -1/2 constants)")
+    app.add_argument("input")
+    app.add_argument("output")
+
+    args = ap.parse_args()
+
+    if args.cmd == "capture":
+        import serial
+        with serial.Serial(args.port, args.baud, timeout=0.1) as ser:
+            time.sleep(2)
+            profile = capture(ser, args.glove, args.rounds, args.seconds, args.imu)
+        print(f"💾 saved {save_profile(profile)}")
+        print(f"   min {profile['min']}\n   max {profile['max']}")
+        if profile["dead_channels"]:
+            print(f"⚠️  no range on {profile['dead_channels']}; check those sensors")
+
+    elif args.cmd == "fit-csv":
+        X = read_csv_frames(args.csv)
+        profile = profile_from_frames(args.glove, X, args.low, args.high)
+        profile["files"] = [os.path.basename(p) for p in args.csv]
+        print(f"💾 saved {save_profile(profile, args.out)}  ({len(X)} frames)")
+        print(f"   min {profile['min']}\n   max {profile['max']}")
+
+    elif args.cmd == "show":
+        if not args.glove:
+            names = sorted(f[:-5] for f in os.listdir(CALIBRATION_DIR) if f.endswith(".json")) \
+                if os.path.isdir(CALIBRATION_DIR) else []
+            print("\n".join(names) or "no profiles yet")
+        else:
+            print(json.dumps(load_profile(args.glove), indent=2))
+
+    elif args.cmd == "apply":
+        norm = ChannelNormalizer.from_profile(load_profile(args.glove), decimals=3) \
+            if args.glove else ChannelNormalizer.legacy(decimals=3)
+        with open(args.input, newline="") as f:
+            rows = [r for r in csv.reader(f)]
+        header, rows = rows[0], [r for r in rows[1:] if len(r) >= 9]
+        X = norm.transform(np.array([r[:8] for r in rows], dtype=np.float64))
+        with open(args.output, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(header)
+            for vals, r in zip(X.tolist(), rows):
+                w.writerow(vals + r[8:])
+        print(f"💾 {len(rows)} rows -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
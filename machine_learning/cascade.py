@@ -0,0 +1,525 @@
+# two-stage (cascade) inference: a tiny first stage, the full model for hard frames
+
+# most frames come from the middle of a held sign, where any model gets them
+# right; only frames near a gesture boundary need the whole forest / MLP.
+# fit() builds a first stage on every recorded row (datasetCache, all sources
+# and classes: the variant's own, other signs and the frames in between), on
+# the model's own input (after the scaler / normalize step), and teaches it
+# the full model's decisions, Unknown included, so it copies the model
+# instead of competing with it:
+#   tree      depth-limited DecisionTreeClassifier (--depth, default 6),
+#             margin = top minus second class share of the frame's leaf
+#   centroid  nearest class centroid in standardized feature space,
+#             margin = 1 - nearest distance / second nearest distance
+# the recording runs (one file, one label) are dealt into five parts, so
+# neighbouring, nearly equal frames never sit on both sides of a split. one
+# part is kept for `report`; every other part is scored by a stage fitted on
+# the remaining three, and on those scores the margin threshold is the lowest
+# at which the first stage's answers, after the confidence threshold the
+# interpreters apply (below it a class share reads as Unknown), still agree
+# with the full model's on --agreement (99.5%) of the frames it answers. the
+# saved stage is then fitted on every row. `report` fits one on the four
+# parts and gives the numbers on the fifth, split into the rows the model was
+# trained on (trainModels.TRAIN_DEFAULTS) and the rest.
+#
+# CascadeModel has predict_proba like the model it wraps, so the interpreters
+# only swap their model: a frame whose first-stage margin reaches the
+# threshold gets the first stage's class shares, every other frame (and every
+# frame the first stage would call Unknown) runs the full model.
+#
+# cascade.bundle (modelBundle format) keeps the stage, the threshold and the
+# sha1 of the model files it was fitted against; a cascade whose model has
+# changed since is not loaded. models on temporal features aren't supported.
+#
+# usage:
+#   python machine_learning/cascade.py fit --variant rf_raw       # <interpreter dir>/cascade.bundle
+#   python machine_learning/cascade.py report --variant rf_raw    # answered early, agreement, µs saved
+#   GLOVE_CASCADE=1 python "machine_learning/working interpreter/New_Interpreter1.py"
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from modelBundle import file_sha1, read_bundle, write_bundle
+
+CASCADE_NAME = "cascade.bundle"
+MODEL_FILES = ("model.bundle", "gesture_model.pkl")
+# recording runs go to parts 0..4 in turn; part 0 is only used by report
+SPLIT = 5
+REPORT_PART = 0
+
+
+# ── first stages ─────────────────────────────────────────────────────────────
+class TinyTree:
+    """
+    one small decision tree as flat arrays (leaves point at themselves)
+    value: (n_nodes, n_targets) class shares per node, the last target is Unknown
+    """
+    kind = "tree"
+
+    def __init__(self, left, right, feature, threshold, value):
+        self.left = np.asarray(left, dtype=np.int64)
+        self.right = np.asarray(right, dtype=np.int64)
+        self.feature = np.asarray(feature, dtype=np.int64)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.depth = self._depth()
+        n_classes = self.value.shape[1] - 1
+        top2 = np.sort(self.value, axis=1)[:, -2:] if n_classes else np.zeros((len(self.value), 2))
+        self.node_margin = top2[:, 1] - top2[:, 0]
+        # never answer Unknown early: the full model decides those
+        self.node_margin[np.argmax(self.value, axis=1) == n_classes] = -np.inf
+        self.node_probs = np.ascontiguousarray(self.value[:, :n_classes])
+        self.node_probs.flags.writeable = False
+        # python lists: one frame walks ~depth nodes, cheaper than numpy calls
+        self._walk = (self.left.tolist(), self.right.tolist(), self.feature.tolist(),
+                      self.threshold.tolist(), self.node_margin.tolist())
+
+    def _depth(self):
+        depth, node = 0, np.zeros(1, dtype=np.int64)
+        level = node
+        while True:
+            inner = level[self.left[level] != level]
+            if not len(inner):
+                return depth
+            level = np.concatenate([self.left[inner], self.right[inner]])
+            depth += 1
+
+    @classmethod
+    def fit(cls, X, y, n_targets, depth=6):
+        from sklearn.tree import DecisionTreeClassifier
+        tree = DecisionTreeClassifier(max_depth=depth, min_samples_leaf=3, random_state=0)
+        tree.fit(X, y)
+        t = tree.tree_
+        own = np.arange(t.node_count)
+        leaf = t.children_left == -1
+        value = np.zeros((t.node_count, n_targets))
+        counts = t.value[:, 0, :]
+        value[:, tree.classes_] = counts / counts.sum(axis=1, keepdims=True)
+        return cls(np.where(leaf, own, t.children_left), np.where(leaf, own, t.children_right),
+                   np.where(leaf, 0, t.feature), np.where(leaf, np.inf, t.threshold), value)
+
+    def arrays(self):
+        return {"left": self.left, "right": self.right, "feature": self.feature,
+                "threshold": self.threshold, "value": self.value}
+
+    def score(self, X):
+        """(n, d) model input -> (class shares (n, n_classes), margin (n,))"""
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        rows = np.arange(len(X))
+        node = np.zeros(len(X), dtype=np.int64)
+        for _ in range(self.depth):
+            go_right = X[rows, self.feature[node]] > self.threshold[node]
+            node = np.where(go_right, self.right[node], self.left[node])
+        return self.node_probs[node], self.node_margin[node]
+
+    def score_one(self, x):
+        """one frame (d,) -> (class shares (1, n_classes) read-only, margin)"""
+        left, right, feature, threshold, margin = self._walk
+        x = x.tolist()
+        node = 0
+        while left[node] != node:
+            node = right[node] if x[feature[node]] > threshold[node] else left[node]
+        return self.node_probs[node:node + 1], margin[node]
+
+
+class CentroidStage:
+    """nearest class centroid after scaling every feature to unit std"""
+    kind = "centroid"
+
+    def __init__(self, centroids, scale, labels, n_classes):
+        self.centroids = np.asarray(centroids, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.labels = np.asarray(labels, dtype=np.int64)
+        onehot = np.zeros((len(self.labels), n_classes))
+        known = self.labels < n_classes
+        onehot[np.flatnonzero(known), self.labels[known]] = 1.0
+        self.onehot = onehot
+        self.onehot.flags.writeable = False
+        self.known = known
+
+    @classmethod
+    def fit(cls, X, y, n_targets, **_):
+        X = np.asarray(X, dtype=np.float64)
+        std = X.std(axis=0)
+        scale = 1.0 / np.where(std > 0, std, 1.0)
+        labels = np.unique(y)
+        centroids = np.stack([X[y == c].mean(axis=0) for c in labels]) * scale
+        return cls(centroids, scale, labels, n_targets - 1)
+
+    def arrays(self):
+        return {"centroids": self.centroids, "scale": self.scale, "labels": self.labels}
+
+    def _pick(self, d2):
+        order = np.argsort(d2, axis=-1)
+        rows = np.arange(d2.shape[0])
+        first, second = order[:, 0], order[:, 1] if d2.shape[1] > 1 else order[:, 0]
+        margin = 1.0 - np.sqrt(d2[rows, first] / np.maximum(d2[rows, second], 1e-300))
+        margin[~self.known[first]] = -np.inf
+        return self.onehot[first], margin
+
+    def score(self, X):
+        Z = np.asarray(X, dtype=np.float64) * self.scale
+        d2 = ((Z[:, None, :] - self.centroids[None, :, :]) ** 2).sum(axis=-1)
+        return self._pick(d2)
+
+    def score_one(self, x):
+        z = np.asarray(x, dtype=np.float64) * self.scale
+        d2 = ((self.centroids - z) ** 2).sum(axis=1)
+        probs, margin = self._pick(d2[None, :])
+        return probs, float(margin[0])
+
+
+STAGES = {"tree": TinyTree, "centroid": CentroidStage}
+
+
+# ── the cascade ──────────────────────────────────────────────────────────────
+class CascadeModel:
+    """
+    stage : TinyTree / CentroidStage
+    model : the full model (CompiledForest, MLPForward, sklearn, ...)
+    margin: first-stage margin from which a frame is answered early
+    anything else (classes_, n_features_in_, ...) comes from the full model
+    """
+
+    def __init__(self, stage, model, margin):
+        self.stage = stage
+        self.model = model
+        self.margin = margin
+        self.early = 0
+        self.full = 0
+
+    def __getattr__(self, name):
+        return getattr(self.__dict__["model"], name)
+
+    def predict_proba(self, X):
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if len(X) == 1:
+            probs, margin = self.stage.score_one(X[0])
+            if margin >= self.margin:
+                self.early += 1
+                return probs
+            self.full += 1
+            return self.model.predict_proba(X)
+        probs, margins = self.stage.score(X)
+        hard = margins < self.margin
+        out = np.array(probs, dtype=np.float64)
+        if hard.any():
+            out[hard] = self.model.predict_proba(X[hard])
+        n_hard = int(hard.sum())
+        self.full += n_hard
+        self.early += len(X) - n_hard
+        return out
+
+    def stats(self):
+        total = self.early + self.full
+        return {"early": self.early, "full": self.full,
+                "early_rate": self.early / total if total else 0.0}
+
+
+# ── fit / save / load ────────────────────────────────────────────────────────
+def _model_sources(model_dir):
+    return {name: file_sha1(os.path.join(model_dir, name))
+            for name in MODEL_FILES if os.path.exists(os.path.join(model_dir, name))}
+
+
+def pick_margin(margins, agree, target=0.995):
+    """lowest margin threshold whose answered frames agree >= target (inf: none does)"""
+    order = np.argsort(-margins, kind="stable")
+    m, a = margins[order], agree[order]
+    ok = np.cumsum(a) / np.arange(1, len(a) + 1) >= target
+    # a threshold has to take every frame with the same margin
+    last_of_value = np.append(m[1:] != m[:-1], True)
+    good = np.flatnonzero(ok & last_of_value & np.isfinite(m))
+    return float(m[good[-1]]) if len(good) else float("inf")
+
+
+def recorded_rows():
+    """
+    every recorded row and its part of the split. whole recording runs (one
+    file, one label) go to the parts in turn, sorted by label so the runs of
+    one sign land in different parts; neighbouring, nearly equal frames never
+    end up on both sides
+    """
+    from datasetCache import load_dataset
+    from temporalFeatures import runs
+    ds = load_dataset()
+    y = np.asarray(ds.y)
+    pieces = runs(np.stack([np.asarray(ds.row_file), y], axis=1))
+    order = np.argsort([y[start] for start, _ in pieces], kind="stable")
+    part = np.empty(len(ds), dtype=np.int64)
+    for i, run in enumerate(order.tolist()):
+        start, stop = pieces[run]
+        part[start:stop] = i % SPLIT
+    return ds, part
+
+
+def trained_on(ds, variant):
+    """True for the rows the variant's model is trained on (trainModels.TRAIN_DEFAULTS)"""
+    from datasetCache import normalize_label
+    from trainModels import TRAIN_DEFAULTS
+    defaults = TRAIN_DEFAULTS[variant]
+    keep = np.isin(ds.sources, defaults["sources"].split(","))
+    if defaults["classes"]:
+        names = {normalize_label(c) for c in defaults["classes"].split(",")}
+        keep &= np.isin([normalize_label(str(c)) for c in ds.labels], list(names))
+    return keep
+
+
+def stage_input(pipeline, X):
+    """rows as the model sees them (after the scaler / normalize step)"""
+    from trainModels import preprocess_rows
+    return preprocess_rows(pipeline.preprocess, X)
+
+
+def decide(probs, threshold):
+    """argmax per row, len(classes) (Unknown) where the top share is below threshold"""
+    probs = np.asarray(probs)
+    idx = np.argmax(probs, axis=1)
+    idx[probs[np.arange(len(idx)), idx] < threshold] = probs.shape[1]
+    return idx
+
+
+def decisions(pipeline, Xin):
+    """the full model's answer per row, len(classes) = Unknown"""
+    return decide(pipeline.model.predict_proba(Xin), pipeline.threshold)
+
+
+def cross_fit(fit_stage, Xin, target, part, parts):
+    """
+    class shares and margins for the rows of `parts`, each part scored by a
+    stage fitted on the other ones (rows of other parts come back empty)
+    fit_stage: fit_stage(X, y) -> TinyTree / CentroidStage
+    """
+    probs, margins = None, np.full(len(Xin), -np.inf)
+    for k in parts:
+        rows = part == k
+        fitted = np.isin(part, parts) & ~rows
+        stage = fit_stage(Xin[fitted], target[fitted])
+        p, margins[rows] = stage.score(Xin[rows])
+        if probs is None:
+            probs = np.zeros((len(Xin), p.shape[1]))
+        probs[rows] = p
+    return probs, margins
+
+
+def fit(variant, artifact_dir=None, stage="tree", depth=6, agreement=0.995, threshold=0.75):
+    """
+    fits a first stage for the variant's model (see the top of the file)
+    returns (CascadeModel, header with the held-out numbers)
+    """
+    from gesturePipeline import load_pipeline, variant_dir
+    from temporalFeatures import TemporalPreprocessor
+    artifact_dir = artifact_dir or variant_dir(variant)
+    pipeline = load_pipeline(variant, artifact_dir, threshold=threshold)
+    if isinstance(pipeline.preprocess, TemporalPreprocessor):
+        raise ValueError("cascades on temporal-feature models are not supported")
+
+    ds, part = recorded_rows()
+    Xin = stage_input(pipeline, ds.X)
+    target = decisions(pipeline, Xin)
+    n_targets = len(pipeline.classes) + 1
+    fit_stage = lambda X, y: STAGES[stage].fit(X, y, n_targets, depth=depth)
+    held = part != REPORT_PART
+
+    probs, margins = cross_fit(fit_stage, Xin, target, part,
+                               [k for k in range(SPLIT) if k != REPORT_PART])
+    probs, margins = probs[held], margins[held]
+    # what the interpreter makes of an early answer: its shares go through the same threshold
+    agree = decide(probs, threshold) == target[held]
+    margin = pick_margin(margins, agree, agreement)
+    served = margins >= margin
+    first = fit_stage(Xin, target)
+    header = {
+        "kind": "cascade",
+        "stage": stage,
+        "variant": variant,
+        "depth": getattr(first, "depth", None),
+        "margin": margin,
+        "target_agreement": agreement,
+        "threshold": threshold,
+        "classes": [str(c) for c in pipeline.classes],
+        "n_features_in": int(Xin.shape[1]),
+        # fitted on scaled / normalized rows: raw frames would land in the wrong leaves
+        "preprocessed": pipeline.preprocess is not None,
+        "max_depth": depth,
+        "fitted_rows": len(Xin),
+        # margins of rows scored by stages that never saw their recording
+        "cross_fitted": {"rows": int(held.sum()), "served": float(served.mean()),
+                     "agreement": float(agree[served].mean()) if served.any() else None},
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "sources": _model_sources(artifact_dir),
+    }
+    return CascadeModel(first, pipeline.model, margin), header
+
+
+def save(cascade, header, path):
+    arrays = cascade.stage.arrays()
+    write_bundle(path, header, arrays)
+    return path
+
+
+def load_cascade(model_dir, model, path=None, preprocessed=None):
+    """
+    CascadeModel around `model` from <model_dir>/cascade.bundle, or None if
+    there is none, the model files changed since it was fitted or the
+    interpreter feeds raw frames (preprocessed=False) to a cascade fitted on
+    scaled ones
+    """
+    path = path or os.path.join(model_dir, CASCADE_NAME)
+    if not os.path.exists(path):
+        print(f"⚠️  no {CASCADE_NAME} in {model_dir}, run: python machine_learning/cascade.py fit")
+        return None
+    header, arrays = read_bundle(path, mmap=False)
+    if header.get("kind") != "cascade":
+        raise ValueError(f"{path}: not a cascade bundle")
+    changed = [name for name, sha in header.get("sources", {}).items()
+               if os.path.exists(os.path.join(model_dir, name))
+               and file_sha1(os.path.join(model_dir, name)) != sha]
+    if changed:
+        print(f"⚠️  {CASCADE_NAME} was fitted for another model ({', '.join(changed)} changed), "
+              f"not used; re-run cascade.py fit")
+        return None
+    if preprocessed is False and header.get("preprocessed"):
+        print(f"⚠️  {CASCADE_NAME} expects scaled frames and this interpreter sends raw ones, not used")
+        return None
+    n_classes = len(header["classes"])
+    if header["stage"] == "tree":
+        stage = TinyTree(arrays["left"], arrays["right"], arrays["feature"], arrays["threshold"],
+                         arrays["value"])
+    else:
+        stage = CentroidStage(arrays["centroids"], arrays["scale"], arrays["labels"], n_classes)
+    return CascadeModel(stage, model, header["margin"])
+
+
+def cascade_from_env(model_dir, model, preprocess=None):
+    """the interpreters' hook: GLOVE_CASCADE=1 wraps model in its cascade (else returns model)"""
+    if os.environ.get("GLOVE_CASCADE", "0") in ("", "0"):
+        return model
+    from temporalFeatures import TemporalPreprocessor
+    if isinstance(preprocess, TemporalPreprocessor):
+        print("⚠️  GLOVE_CASCADE ignored: this model uses temporal features")
+        return model
+    cascade = load_cascade(model_dir, model, preprocessed=preprocess is not None)
+    if cascade is None:
+        return model
+    if not np.isfinite(cascade.margin):
+        print(f"⚠️  GLOVE_CASCADE ignored: this {CASCADE_NAME} never answers early "
+              f"(no margin reached the agreement it was fitted for)")
+        return model
+    print(f"🪜 cascade: {cascade.stage.kind} first stage, margin ≥ {cascade.margin:.3f} answers early")
+    return cascade
+
+
+# ── report ───────────────────────────────────────────────────────────────────
+def per_frame_us(model, Xin, repeats=3):
+    """mean µs of predict_proba on one (1, d) frame at a time, best of repeats"""
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        for i in range(len(Xin)):
+            model.predict_proba(Xin[i:i + 1])
+        best = min(best, time.perf_counter() - t0)
+    return best / len(Xin) * 1e6
+
+
+def report(variant, cascade, threshold=0.75, depth=6, limit=2000):
+    """
+    on the report part of the recorded runs, with the cascade's stage kind
+    and margin but a stage fitted on the other four parts, per group:
+    "unseen" rows the model wasn't trained on, "trained" rows it was, and
+    "all": answered early, agreement with the full model (all frames and the
+    early ones), accuracy where the label is one of the model's classes; plus
+    µs per frame with / without the saved cascade
+    """
+    from gesturePipeline import load_pipeline
+    from datasetCache import normalize_label
+    pipeline = load_pipeline(variant, threshold=threshold)
+    ds, part = recorded_rows()
+    rows = part == REPORT_PART
+    Xall = stage_input(pipeline, ds.X)
+    target = decisions(pipeline, Xall)
+    first = STAGES[cascade.stage.kind].fit(Xall[~rows], target[~rows], len(pipeline.classes) + 1,
+                                           depth=depth)
+    held = CascadeModel(first, pipeline.model, cascade.margin)
+    Xin, full = Xall[rows], target[rows]
+    casc = decide(held.predict_proba(Xin), threshold)
+    served = first.score(Xin)[1] >= cascade.margin
+
+    names = [normalize_label(str(c)) for c in pipeline.classes]
+    truth = np.array([names.index(normalize_label(str(c))) if normalize_label(str(c)) in names else -1
+                      for c in ds.classes.tolist()]).take(ds.y[rows])
+    seen = trained_on(ds, variant)[rows]
+    groups = {}
+    for group, keep in (("unseen", ~seen), ("trained", seen), ("all", np.ones(len(Xin), dtype=bool))):
+        early, known = keep & served, keep & (truth >= 0)
+        groups[group] = {
+            "frames": int(keep.sum()),
+            "served_early": float(served[keep].mean()) if keep.any() else None,
+            "agreement": float(np.mean(casc[keep] == full[keep])) if keep.any() else None,
+            "agreement_early": float(np.mean(casc[early] == full[early])) if early.any() else None,
+            "accuracy_full": float(np.mean(full[known] == truth[known])) if known.any() else None,
+            "accuracy_cascade": float(np.mean(casc[known] == truth[known])) if known.any() else None,
+        }
+    sample = Xin[np.linspace(0, len(Xin) - 1, min(limit, len(Xin))).astype(int)]
+    return {"groups": groups, "us_full": per_frame_us(pipeline.model, sample),
+            "us_cascade": per_frame_us(cascade, sample)}
+
+
+def pct(value, digits=1):
+    return "-" if value is None else f"{value:.{digits}%}"
+
+
+def main():
+    from gesturePipeline import VARIANTS, load_pipeline, variant_dir
+    ap = argparse.ArgumentParser(description="Cheap first stage + full model fallback")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    for name in ("fit", "report"):
+        p = sub.add_parser(name)
+        p.add_argument("--variant", default="rf_raw", help="rf_scaler, rf_raw, mlp or all")
+        p.add_argument("--stage", default="tree", choices=list(STAGES))
+        p.add_argument("--depth", type=int, default=6, help="tree stage depth")
+        p.add_argument("--agreement", type=float, default=0.995,
+                       help="held-out agreement with the full model the early answers need")
+        p.add_argument("--threshold", type=float, default=0.75)
+    args = ap.parse_args()
+
+    variants = list(VARIANTS) if args.variant == "all" else args.variant.split(",")
+    for v in variants:
+        d = variant_dir(v)
+        if args.cmd == "fit":
+            cascade, header = fit(v, d, args.stage, args.depth, args.agreement, args.threshold)
+            path = save(cascade, header, os.path.join(d, CASCADE_NAME))
+            h = header["cross_fitted"]
+            agree = f"{h['agreement']:.2%}" if h["agreement"] is not None else "-"
+            print(f"🪜 {v:<10} -> {path}: {args.stage}, margin ≥ {header['margin']:.3f}; cross-fitted "
+                  f"{h['rows']} rows: {h['served']:.0%} answered early, {agree} agree with the model")
+            if not np.isfinite(header["margin"]):
+                print(f"   ⚠️  no margin reaches {args.agreement:.1%} agreement, the cascade would "
+                      f"never answer early (GLOVE_CASCADE ignores it); try a lower --agreement")
+            continue
+        cascade = load_cascade(d, load_pipeline(v).model)
+        if cascade is None:
+            return 1
+        r = report(v, cascade, args.threshold, args.depth)
+        saved = r["us_full"] - r["us_cascade"]
+        print(f"📊 {v}: recording runs neither fitted on nor used for the margin\n"
+              f"   {'rows':<8} {'frames':>6} {'early':>7} {'identical':>10} {'early ok':>9} "
+              f"{'acc full':>9} {'acc casc':>9}")
+        for group, g in r["groups"].items():
+            print(f"   {group:<8} {g['frames']:>6} {pct(g['served_early']):>7} {pct(g['agreement'], 2):>10} "
+                  f"{pct(g['agreement_early'], 2):>9} {pct(g['accuracy_full']):>9} "
+                  f"{pct(g['accuracy_cascade']):>9}")
+        print(f"   µs per frame: {r['us_full']:.1f} full, {r['us_cascade']:.1f} cascade, "
+              f"{saved:.1f} saved ({saved / r['us_full']:.0%})")
+        print("   unseen: rows the model wasn't trained on (other sources / signs, transitions)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
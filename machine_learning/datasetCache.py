@@ -0,0 +1,350 @@
+# consolidated dataset cache for every recorded gesture file
+
+# the notebooks read each <gesture>_data.csv with pandas and concatenate them
+# on every run, and the label names don't agree between folders (" Dale_New"
+# with a leading space, "Mom1_New" for Mom). build() parses each file once
+# into machine_learning/dataset_cache/:
+#
+#   files/<sha1>.npy          float32 (n, 8) rows of one source file
+#   files/<sha1>.labels.npy   its raw Gesture column
+#   features.npy              float32 (n, 8) rows of every file, in manifest order
+#   labels.npy                int16 index into manifest["classes"]
+#   rows_file.npy             int16 index into manifest["files"] (where each row came from)
+#   manifest.json             classes, label rules, and per file: path, source,
+#                             sha1, size, mtime, rows and first row
+#
+# a rebuild only stats the files; a file is hashed again when its size or
+# mtime changed and parsed again only when its hash did. load_dataset()
+# memory-maps the three arrays, so loading takes milliseconds.
+#
+# labels are normalized with normalize_label(): surrounding spaces and the
+# "_New" suffix are removed and LABEL_ALIASES maps the odd ones ("Mom1" -> "Mom").
+# the raw label and the source of every row are kept, so training on one
+# folder only is still possible (Dataset.select(sources=["new"])).
+#
+# usage:
+#   python machine_learning/datasetCache.py build --sessions ~/Downloads/recordings
+#   python machine_learning/datasetCache.py info
+#
+#   from datasetCache import load_dataset
+#   ds = load_dataset()                    # ds.X (n, 8) float32, ds.y, ds.classes
+
+import os
+import sys
+import csv
+import glob
+import json
+import time
+import hashlib
+import argparse
+
+import numpy as np
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(ML_DIR)
+CACHE_DIR = os.path.join(ML_DIR, "dataset_cache")
+FORMAT_VERSION = 1
+
+DATA_SOURCES = {
+    "data": os.path.join(ML_DIR, "data"),
+    "new": os.path.join(REPO_DIR, "New_Data"),
+}
+CHANNELS = ["F1", "F2", "F3", "F4", "F5", "X", "Y", "Z"]
+LABEL_SUFFIXES = ("_New",)
+LABEL_ALIASES = {"Mom1": "Mom"}
+
+
+def normalize_label(raw):
+    """" Dale_New" -> "Dale", "Mom1_New" -> "Mom" """
+    label = raw.strip()
+    for suffix in LABEL_SUFFIXES:
+        if label.endswith(suffix):
+            label = label[:-len(suffix)]
+    return LABEL_ALIASES.get(label, label)
+
+
+class Dataset:
+    """
+    X       : (n, 8) float32 features (memory-mapped, read only)
+    y       : (n,) int16 index into classes
+    classes : sorted label names (same order LabelEncoder gives)
+    files   : the manifest's file table
+    row_file: (n,) index into files for every row
+    """
+
+    def __init__(self, X, y, classes, files, row_file):
+        self.X = X
+        self.y = y
+        self.classes = np.asarray(classes)
+        self.files = files
+        self.row_file = row_file
+
+    def __len__(self):
+        return len(self.y)
+
+    @property
+    def labels(self):
+        """label name of every row"""
+        return self.classes.take(self.y)
+
+    @property
+    def sources(self):
+        """source ("data", "new", "session") of every row"""
+        return np.asarray([f["source"] for f in self.files]).take(self.row_file)
+
+    def counts(self):
+        return dict(zip(self.classes.tolist(), np.bincount(self.y, minlength=len(self.classes)).tolist()))
+
+    def select(self, sources=None, classes=None):
+        """
+        rows from the given sources and/or classes, as a new (in-memory) Dataset;
+        with classes, y is re-indexed into the sorted selection
+        """
+        keep = np.ones(len(self.y), dtype=bool)
+        if sources is not None:
+            ok = np.array([f["source"] in sources for f in self.files], dtype=bool)
+            keep &= ok.take(self.row_file)
+        new_classes = self.classes
+        remap = np.arange(len(self.classes), dtype=np.int16)
+        if classes is not None:
+            new_classes = np.array(sorted(set(classes) & set(self.classes.tolist())))
+            wanted = np.isin(self.classes, new_classes)
+            keep &= wanted.take(self.y)
+            remap[wanted] = np.arange(len(new_classes), dtype=np.int16)
+        return Dataset(np.asarray(self.X[keep]), remap.take(self.y[keep]), new_classes,
+                       self.files, np.asarray(self.row_file[keep]))
+
+
+# ── parsing ──────────────────────────────────────────────────────────────────
+def _parse_csv(path):
+    """returns (values float32 (n, 8), raw labels, skipped rows)"""
+    rows, labels, skipped = [], [], 0
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for rec in reader:
+            if len(rec) < 9:
+                skipped += 1
+                continue
+            try:
+                rows.append([float(v) for v in rec[:8]])
+            except ValueError:
+                skipped += 1
+                continue
+            labels.append(rec[8])
+    return np.array(rows, dtype=np.float32).reshape(-1, 8), np.array(labels, dtype=str), skipped
+
+
+def _parse_session(path):
+    """labelled rows of a sessionRecorder .glv (unlabeled rows are left out)"""
+    from sessionRecorder import load_session
+    records, meta = load_session(path, mmap=False)
+    labelled = records[records["label"] >= 0]
+    names = np.array(meta["labels"], dtype=str)
+    return (np.ascontiguousarray(labelled["values"], dtype=np.float32),
+            names.take(labelled["label"].astype(np.int64)), len(records) - len(labelled))
+
+
+def read_recording(path):
+    """one .csv or .glv file, uncached -> (values float32 (n, 8), normalized labels)"""
+    values, raw, _ = (_parse_session if path.endswith(".glv") else _parse_csv)(path)
+    return values, np.array([normalize_label(label) for label in raw.tolist()], dtype=str)
+
+
+def _source_files(sources, sessions):
+    """[(source, absolute path)] in a stable order"""
+    found = []
+    for src in sources:
+        for path in sorted(glob.glob(os.path.join(DATA_SOURCES[src], "*.csv"))):
+            found.append((src, path))
+    for folder in sessions or ():
+        for path in sorted(glob.glob(os.path.join(os.path.expanduser(folder), "*.glv"))):
+            found.append(("session", path))
+    return found
+
+
+def _content_sha1(source, path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    if source == "session":
+        # the label names live in the .json next to the rows
+        with open(os.path.splitext(path)[0] + ".json", "rb") as f:
+            h.update(json.dumps(json.load(f).get("labels")).encode())
+    return h.hexdigest()
+
+
+def _rel(path):
+    path = os.path.abspath(path)
+    return os.path.relpath(path, REPO_DIR) if path.startswith(REPO_DIR + os.sep) else path
+
+
+def _save(path, array):
+    tmp = path + ".tmp.npy"
+    np.save(tmp, array)
+    os.replace(tmp, path)
+
+
+# ── build / load ─────────────────────────────────────────────────────────────
+def read_manifest(cache_dir=CACHE_DIR):
+    try:
+        with open(os.path.join(cache_dir, "manifest.json")) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("format") == FORMAT_VERSION else None
+
+
+def build(sources=("data", "new"), sessions=None, cache_dir=CACHE_DIR, verbose=False):
+    """
+    brings the cache up to date with the gesture files
+    sources : keys of DATA_SOURCES to include
+    sessions: folders of sessionRecorder .glv files to include
+    returns (manifest, stats) with stats = {"hashed", "parsed", "reused", "written"}
+    """
+    files_dir = os.path.join(cache_dir, "files")
+    os.makedirs(files_dir, exist_ok=True)
+    old = read_manifest(cache_dir) or {"files": [], "key": None}
+    known = {f["path"]: f for f in old["files"]}
+    stats = {"hashed": 0, "parsed": 0, "reused": 0, "written": False}
+
+    entries = []
+    for source, path in _source_files(sources, sessions):
+        st = os.stat(path)
+        rel = _rel(path)
+        prev = known.get(rel)
+        if prev and prev["size"] == st.st_size and prev["mtime_ns"] == st.st_mtime_ns:
+            sha = prev["sha1"]
+        else:
+            sha = _content_sha1(source, path)
+            stats["hashed"] += 1
+
+        chunk = os.path.join(files_dir, sha + ".npy")
+        if prev and prev["sha1"] == sha and os.path.exists(chunk):
+            skipped = prev["skipped"]
+            stats["reused"] += 1
+        else:
+            values, raw, skipped = (_parse_session if source == "session" else _parse_csv)(path)
+            _save(chunk, values)
+            _save(os.path.join(files_dir, sha + ".labels.npy"), raw)
+            stats["parsed"] += 1
+            if verbose:
+                print(f"📄 parsed {rel}: {len(values)} rows" + (f", {skipped} skipped" if skipped else ""))
+        entries.append({"path": rel, "source": source, "sha1": sha, "size": st.st_size,
+                        "mtime_ns": st.st_mtime_ns, "skipped": skipped})
+
+    rules = {"suffixes": list(LABEL_SUFFIXES), "aliases": LABEL_ALIASES}
+    key = hashlib.sha1(json.dumps([[e["path"], e["sha1"]] for e in entries] + [rules])
+                       .encode()).hexdigest()
+    if key == old["key"] and os.path.exists(os.path.join(cache_dir, "features.npy")):
+        # stat info may have changed (touch, checkout) even though nothing else did
+        if any(e["mtime_ns"] != known[e["path"]]["mtime_ns"] for e in entries):
+            old["files"] = [dict(known[e["path"]], mtime_ns=e["mtime_ns"]) for e in entries]
+            _write_manifest(cache_dir, old)
+        return old, stats
+
+    # consolidate: concatenate the per-file chunks and index the labels
+    values, raws = [], []
+    for e in entries:
+        values.append(np.load(os.path.join(files_dir, e["sha1"] + ".npy")))
+        raws.append(np.load(os.path.join(files_dir, e["sha1"] + ".labels.npy")))
+    raw_all = np.concatenate(raws) if raws else np.zeros(0, dtype=str)
+    uniq_raw, raw_idx = np.unique(raw_all, return_inverse=True)
+    norm = np.array([normalize_label(r) for r in uniq_raw.tolist()], dtype=str)
+    classes, norm_idx = np.unique(norm, return_inverse=True)
+
+    start = 0
+    for e, v, r in zip(entries, values, raws):
+        e["rows"], e["start"] = len(v), start
+        names, counts = np.unique(r, return_counts=True)
+        e["labels"] = {n: int(c) for n, c in zip(names.tolist(), counts.tolist())}
+        start += len(v)
+
+    _save(os.path.join(cache_dir, "features.npy"),
+          np.concatenate(values) if values else np.zeros((0, 8), dtype=np.float32))
+    _save(os.path.join(cache_dir, "labels.npy"), norm_idx.take(raw_idx).astype(np.int16))
+    _save(os.path.join(cache_dir, "rows_file.npy"),
+          np.repeat(np.arange(len(entries), dtype=np.int16), [e["rows"] for e in entries]))
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "built": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "key": key,
+        "channels": CHANNELS,
+        "classes": classes.tolist(),
+        "label_map": dict(zip(uniq_raw.tolist(), norm.tolist())),
+        "rules": rules,
+        "rows": start,
+        "files": entries,
+    }
+    _write_manifest(cache_dir, manifest)
+    stats["written"] = True
+
+    # chunks of files that are gone or changed
+    live = {e["sha1"] for e in entries}
+    for p in glob.glob(os.path.join(files_dir, "*.npy")):
+        if os.path.basename(p).split(".")[0] not in live:
+            os.remove(p)
+    return manifest, stats
+
+
+def _write_manifest(cache_dir, manifest):
+    path = os.path.join(cache_dir, "manifest.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def load_dataset(cache_dir=CACHE_DIR, refresh=True, sources=("data", "new"), sessions=None):
+    """
+    refresh: run build() first (only stats the files when nothing changed);
+             False loads whatever is cached
+    returns a Dataset with memory-mapped X / y
+    """
+    manifest = build(sources, sessions, cache_dir)[0] if refresh else read_manifest(cache_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"no dataset cache in {cache_dir}, run: "
+                                f"python machine_learning/datasetCache.py build")
+    X = np.load(os.path.join(cache_dir, "features.npy"), mmap_mode="r")
+    y = np.load(os.path.join(cache_dir, "labels.npy"), mmap_mode="r")
+    row_file = np.load(os.path.join(cache_dir, "rows_file.npy"), mmap_mode="r")
+    return Dataset(X, y, manifest["classes"], manifest["files"], row_file)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build / inspect the consolidated gesture dataset")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="bring the cache up to date")
+    b.add_argument("--sources", default="data,new", help="data, new or data,new")
+    b.add_argument("--sessions", action="append", help="folder of .glv sessions (repeatable)")
+    b.add_argument("--cache", default=CACHE_DIR)
+    inf = sub.add_parser("info", help="classes, rows and files in the cache")
+    inf.add_argument("--cache", default=CACHE_DIR)
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        t0 = time.perf_counter()
+        manifest, stats = build([s for s in args.sources.split(",") if s], args.sessions,
+                                args.cache, verbose=True)
+        print(f"📦 {manifest['rows']} rows, {len(manifest['classes'])} classes, "
+              f"{len(manifest['files'])} files ({stats['parsed']} parsed, {stats['reused']} reused, "
+              f"{stats['hashed']} hashed) in {(time.perf_counter() - t0) * 1e3:.1f} ms"
+              + ("" if stats["written"] else " — already up to date"))
+        return 0
+
+    t0 = time.perf_counter()
+    ds = load_dataset(args.cache, refresh=False)
+    ms = (time.perf_counter() - t0) * 1e3
+    print(f"📦 {len(ds)} rows, {len(ds.classes)} classes (loaded in {ms:.1f} ms)")
+    for name, n in ds.counts().items():
+        print(f"   {name:<12} {n}")
+    print("files:")
+    for f in ds.files:
+        raw = ", ".join(f"{k!r}" for k in f["labels"])
+        print(f"   {f['source']:<8} {f['path']:<40} {f['rows']:>6}  {raw}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+# compiled RandomForest inference for gesture_model.pkl
+
+# sklearn's predict_proba spends most of a single-frame call on input validation,
+# thread dispatch and per-tree python overhead, not on walking the trees.
+# compile_forest() copies every estimators_[i].tree_ into one flat set of NumPy
+# arrays (all trees back to back) and walks every tree at once, one depth level
+# per step, for a single 1x8 frame or a whole batch of frames.
+
+# probabilities are bit-for-bit identical to RandomForestClassifier.predict_proba:
+#   - input is cast to float32 first, same as sklearn's tree code
+#   - each leaf is normalized the same way DecisionTreeClassifier.predict_proba does
+#   - trees are summed in estimator order, then divided by the number of trees
+
+import numpy as np
+
+
+class CompiledForest:
+    """
+    Flat array copy of a fitted RandomForestClassifier.
+
+    children  : (n_nodes, 2) int64   global index of left / right child
+                                     (leaves point at themselves)
+    feature   : (n_nodes,)   int64   feature tested at each node (0 for leaves)
+    threshold : (n_nodes,)   float64 split threshold (+inf for leaves)
+    value     : (n_nodes, n_classes) float64 normalized class distribution
+    roots     : (n_trees,)   int64   global index of each tree's root node
+    """
+
+    def __init__(self, children, feature, threshold, value, roots, max_depth,
+                 n_features_in, classes):
+        self.children  = np.ascontiguousarray(children, dtype=np.int64)
+        self.feature   = np.ascontiguousarray(feature, dtype=np.int64)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.value     = np.ascontiguousarray(value, dtype=np.float64)
+        self.roots     = np.ascontiguousarray(roots, dtype=np.int64)
+        self.max_depth = int(max_depth)
+        self.n_features_in_ = int(n_features_in)
+        self.classes_  = np.asarray(classes)
+        self.n_trees   = len(self.roots)
+
+    @property
+    def n_classes(self):
+        return self.value.shape[1]
+
+    @property
+    def nbytes(self):
+        return (self.children.nbytes + self.feature.nbytes + self.threshold.nbytes
+                + self.value.nbytes + self.roots.nbytes)
+
+    def apply(self, X):
+        """
+        X: (n_rows, n_features) or (n_features,) array
+        returns (n_trees, n_rows) global leaf index reached in every tree
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, but the forest "
+                             f"expects {self.n_features_in_}")
+
+        n_rows = X.shape[0]
+        # float32 -> float64 is exact, and matches sklearn comparing the float32
+        # sample against the float64 threshold
+        Xd   = X.astype(np.float64)
+        rows = np.arange(n_rows)
+
+        node = np.repeat(self.roots[:, None], n_rows, axis=1)
+        for _ in range(self.max_depth):
+            go_right = Xd[rows, self.feature[node]] > self.threshold[node]
+            node = self.children[node, go_right.view(np.int8)]
+        return node
+
+    def predict_proba(self, X):
+        """
+        X: (n_rows, n_features) or (n_features,) array
+        returns (n_rows, n_classes) probabilities, same as sklearn
+        """
+        leaves = self.apply(X)
+        # reducing over the leading (tree) axis adds the trees one after the
+        # other, which is the same order sklearn accumulates them in
+        proba = np.add.reduce(self.value[leaves], axis=0)
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+def compile_forest(model):
+    """
+    model: fitted sklearn RandomForestClassifier (single output)
+    returns a CompiledForest with the same predict_proba
+    """
+    if getattr(model, "n_outputs_", 1) != 1:
+        raise ValueError("only single-output forests can be compiled")
+
+    n_classes = int(model.n_classes_)
+    children, feature, threshold, value, roots = [], [], [], [], []
+    offset, max_depth = 0, 0
+
+    for est in model.estimators_:
+        tree = est.tree_
+        n = tree.node_count
+        left  = tree.children_left.astype(np.int64)
+        right = tree.children_right.astype(np.int64)
+        leaf  = left == -1
+
+        own = np.arange(n, dtype=np.int64)
+        left  = np.where(leaf, own, left) + offset
+        right = np.where(leaf, own, right) + offset
+
+        # leaf distribution, normalized exactly like DecisionTreeClassifier
+        proba = tree.value[:, 0, :n_classes].astype(np.float64)
+        normalizer = proba.sum(axis=1)[:, None]
+        normalizer[normalizer == 0.0] = 1.0
+        proba = proba / normalizer
+
+        children.append(np.stack([left, right], axis=1))
+        feature.append(np.where(leaf, 0, tree.feature).astype(np.int64))
+        threshold.append(np.where(leaf, np.inf, tree.threshold))
+        value.append(proba)
+        roots.append(offset)
+
+        offset += n
+        max_depth = max(max_depth, int(tree.max_depth))
+
+    return CompiledForest(
+        children  = np.concatenate(children),
+        feature   = np.concatenate(feature),
+        threshold = np.concatenate(threshold),
+        value     = np.concatenate(value),
+        roots     = np.array(roots, dtype=np.int64),
+        max_depth = max_depth,
+        n_features_in = model.n_features_in_,
+        classes   = model.classes_,
+    )
+
+
+def load_compiled_forest(model_pkl):
+    """
+    model_pkl: path to a pickled RandomForestClassifier (e.g. gesture_model.pkl)
+    returns (sklearn_model, compiled_forest)
+    """
+    import joblib
+    model = joblib.load(model_pkl)
+    return model, compile_forest(model)
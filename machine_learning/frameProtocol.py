@@ -0,0 +1,270 @@
+# host side of the glove's serial protocol
+
+# sensorReadings.ino can send two formats:
+#
+# ASCII (default), one line per sample, exactly as printed by the firmware:
+#   " 801, 802, 0, 795, 881, 2.32, 9.58, -0.60\r\n"
+#
+# binary (BINARY_FRAMES 1 in the sketch), 19 bytes per sample, little endian:
+#   offset  size  field
+#   0       1     sync byte 0xA5 (never appears in the ASCII output)
+#   1       1     sequence number, wraps at 256
+#   2       10    5 x uint16 flex readings (thumb, index, middle, ring, pinky)
+#   12      6     3 x int16 accel X/Y/Z in 0.01 m/s^2
+#   18      1     CRC-8 (poly 0x07, init 0) over bytes 1..17
+#
+# FrameDecoder takes whatever bytes the port returned (any size, frames may be
+# split across reads), and returns the complete samples as an (n, 8) float32
+# array. Corrupted binary frames are skipped by searching for the next sync
+# byte with a good CRC, and gaps in the sequence numbers are counted as drops.
+# ASCII reads are split into lines (parse_ascii_chunk), the unfinished last
+# line waits in the buffer for the next read.
+#
+# reading everything pending instead of one readline() per frame:
+#   decoder = FrameDecoder("ascii")
+#   frames = decoder.feed(ser.read(ser.in_waiting or 1))    # (n, 8) float32
+
+import struct
+from collections import deque
+
+import numpy as np
+
+SYNC = 0xA5
+FRAME_LEN = 19
+ACCEL_SCALE = 100.0          # accel is sent as int16 hundredths of m/s^2
+N_VALUES = 8
+FAST_MIN_LINES = 2        # parse_ascii_chunk: chunks up to this many lines go line by line
+FAST_BLOCK = 64           # lines per np.array call, a broken field costs one block
+
+FRAME_STRUCT = struct.Struct("<BB5H3hB")
+FRAME_DTYPE = np.dtype([
+    ("sync",  "u1"),
+    ("seq",   "u1"),
+    ("flex",  "<u2", (5,)),
+    ("accel", "<i2", (3,)),
+    ("crc",   "u1"),
+])
+
+
+def _crc8_table(poly=0x07):
+    table = np.zeros(256, dtype=np.uint8)
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) if crc & 0x80 else (crc << 1)
+        table[i] = crc & 0xFF
+    return table
+
+
+CRC8_TABLE = _crc8_table()
+
+
+def crc8(data):
+    """CRC-8 of a bytes-like object, same as crc8() in sensorReadings.ino"""
+    crc = 0
+    for b in bytes(data):
+        crc = int(CRC8_TABLE[crc ^ b])
+    return crc
+
+
+def crc8_rows(rows):
+    """CRC-8 of every row of a 2-D uint8 array at once"""
+    crc = np.zeros(len(rows), dtype=np.uint8)
+    for col in range(rows.shape[1]):
+        crc = CRC8_TABLE[crc ^ rows[:, col]]
+    return crc
+
+
+def parse_ascii_chunk(chunk):
+    """
+    chunk: bytes made of whole lines ("\n" separated, the last "\n" optional)
+    returns (values, banners, malformed): the (n, 8) float32 samples in order,
+    and how many status lines / broken lines were skipped (blank lines aren't counted)
+
+    lines with 8 fields are converted FAST_BLOCK at a time by np.array; the
+    others can't be samples and are only counted. a block with a field that
+    isn't a number is parsed again line by line, and so is a chunk of one or
+    two lines (what a read at 9600 baud usually holds)
+    """
+    lines = bytes(chunk).decode("utf-8", errors="ignore").split("\n")
+    if len(lines) <= FAST_MIN_LINES:
+        return _parse_lines(lines)
+    clean = [line for line in lines if line.count(",") == N_VALUES - 1]
+    banners = malformed = 0
+    if len(clean) < len(lines):
+        _, banners, malformed = _parse_lines([line for line in lines
+                                              if line.count(",") != N_VALUES - 1])
+    parts = [np.empty(0, dtype=np.float32)]
+    for i in range(0, len(clean), FAST_BLOCK):
+        block = clean[i:i + FAST_BLOCK]
+        try:
+            parts.append(np.array(",".join(block).split(","), dtype=np.float32))
+        except ValueError:
+            values, b, m = _parse_lines(block)
+            parts.append(values.reshape(-1))
+            banners, malformed = banners + b, malformed + m
+    return np.concatenate(parts).reshape(-1, N_VALUES), banners, malformed
+
+
+def _parse_lines(lines):
+    """parse_ascii_chunk one line at a time, skipping and counting the bad ones"""
+    rows, banners, malformed = [], 0, 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        # status text from setup(): "Initializing MPU6050...", "MPU6050 connected!"
+        if "," not in line or "Initializing" in line:
+            banners += 1
+            continue
+        parts = line.split(",")
+        if len(parts) != N_VALUES:
+            malformed += 1
+            continue
+        try:
+            rows.append([float(x) for x in parts])
+        except ValueError:
+            malformed += 1
+    return np.array(rows, dtype=np.float32).reshape(-1, N_VALUES), banners, malformed
+
+
+def encode_frame(seq, flex, accel):
+    """
+    seq  : int, wrapped to 0..255
+    flex : 5 ints (analogRead values)
+    accel: 3 floats in m/s^2
+    returns the 19 byte binary frame the firmware would send
+    """
+    accel_i = [int(round(a * ACCEL_SCALE)) for a in accel]
+    body = FRAME_STRUCT.pack(SYNC, seq & 0xFF, *[int(f) for f in flex], *accel_i, 0)[:-1]
+    return body + bytes([crc8(body[1:])])
+
+
+def encode_ascii(values):
+    """one sample as the firmware prints it in ASCII mode"""
+    flex = ", ".join(str(int(v)) for v in values[:5])
+    accel = ", ".join(f"{v:.2f}" for v in values[5:])
+    return f" {flex}, {accel}\r\n".encode()
+
+
+class FrameDecoder:
+    """
+    mode: "ascii", "binary" or "auto" (picks binary as soon as a sync byte
+          shows up, otherwise ASCII, and sticks with the first format that
+          produced a valid sample)
+
+    counters:
+      frames     samples decoded
+      crc_errors binary candidates that failed the CRC
+      skipped    bytes thrown away while resynchronizing
+      dropped    samples missing according to the sequence numbers
+      malformed  ASCII lines that were not 8 numbers (banners excluded)
+      banners    "Initializing..." / other status lines skipped
+    """
+
+    def __init__(self, mode="auto", keep_missing=256):
+        if mode not in ("auto", "ascii", "binary"):
+            raise ValueError(f"unknown mode {mode!r}")
+        self.mode = mode
+        self.buf = bytearray()
+        self.last_seq = None
+        self.missing = deque(maxlen=keep_missing)   # recently dropped sequence numbers
+        self.seq = np.empty(0, dtype=np.uint8)      # sequence numbers of the last feed()
+        self.frames = 0
+        self.crc_errors = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.malformed = 0
+        self.banners = 0
+
+    def counters(self):
+        return {
+            "mode": self.mode,
+            "frames": self.frames,
+            "crc_errors": self.crc_errors,
+            "skipped": self.skipped,
+            "dropped": self.dropped,
+            "malformed": self.malformed,
+            "banners": self.banners,
+        }
+
+    def feed(self, data):
+        """
+        data: bytes just read from the port (may be empty or a partial frame)
+        returns (n, 8) float32 array of the complete samples, oldest first
+        """
+        self.buf += data
+        mode = self.mode
+        if mode == "auto":
+            mode = "binary" if SYNC in self.buf else "ascii"
+
+        out = self._decode_binary() if mode == "binary" else self._decode_ascii()
+        if self.mode == "auto" and len(out):
+            self.mode = mode
+        self.frames += len(out)
+        return out
+
+    # ── binary ────────────────────────────────────────────────────────────────
+    def _decode_binary(self):
+        raw = np.frombuffer(bytes(self.buf), dtype=np.uint8)
+        n = len(raw)
+        starts = np.flatnonzero(raw == SYNC)
+        full = starts[starts + FRAME_LEN <= n]
+
+        accepted = []
+        next_free = 0
+        if len(full):
+            windows = np.lib.stride_tricks.sliding_window_view(raw, FRAME_LEN)[full]
+            good = crc8_rows(windows[:, 1:-1]) == windows[:, -1]
+            for pos, ok in zip(full.tolist(), good.tolist()):
+                if pos < next_free:
+                    continue            # sync byte inside a frame we already took
+                if not ok:
+                    self.crc_errors += 1
+                    continue
+                self.skipped += pos - next_free
+                accepted.append(pos)
+                next_free = pos + FRAME_LEN
+
+        # keep a trailing frame that hasn't fully arrived yet, drop the rest
+        partial = starts[(starts >= next_free) & (starts + FRAME_LEN > n)]
+        keep_from = int(partial[0]) if len(partial) else n
+        self.skipped += keep_from - next_free
+        del self.buf[:keep_from]
+
+        if not accepted:
+            self.seq = np.empty(0, dtype=np.uint8)
+            return np.empty((0, N_VALUES), dtype=np.float32)
+
+        idx = np.asarray(accepted)
+        frames = raw[idx[:, None] + np.arange(FRAME_LEN)].copy().view(FRAME_DTYPE).reshape(-1)
+        self._track_sequence(frames["seq"])
+
+        out = np.empty((len(frames), N_VALUES), dtype=np.float32)
+        out[:, :5] = frames["flex"]
+        out[:, 5:] = frames["accel"]
+        out[:, 5:] /= ACCEL_SCALE
+        return out
+
+    def _track_sequence(self, seq):
+        self.seq = seq
+        first_prev = (int(seq[0]) - 1) & 0xFF if self.last_seq is None else self.last_seq
+        prev = np.concatenate(([first_prev], seq[:-1].astype(np.int64)))
+        gaps = (seq.astype(np.int64) - prev - 1) & 0xFF
+        for i in np.flatnonzero(gaps).tolist():
+            self.dropped += int(gaps[i])
+            self.missing.extend((int(prev[i]) + k) & 0xFF for k in range(1, int(gaps[i]) + 1))
+        self.last_seq = int(seq[-1])
+
+    # ── ASCII ─────────────────────────────────────────────────────────────────
+    def _decode_ascii(self):
+        end = self.buf.rfind(b"\n")
+        if end < 0:
+            return np.empty((0, N_VALUES), dtype=np.float32)
+        chunk = bytes(self.buf[:end])
+        del self.buf[:end + 1]
+
+        out, banners, malformed = parse_ascii_chunk(chunk)
+        self.banners += banners
+        self.malformed += malformed
+        return out
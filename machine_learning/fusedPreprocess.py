@@ -0,0 +1,105 @@
+# fused normalize + scale preprocessing
+
+# the interpreters used to run, per frame:
+#   normalize(raw[:5], 100, 700) + normalize(raw[5:], -1, 2)   (python loops)
+#   pd.DataFrame(...) so the scaler sees column names
+#   scaler.transform(...)                                       (MinMaxScaler)
+# both steps are affine per feature, so they fold into one
+#   x * scale + offset
+# that is precomputed once as float32 and applied in place on a reused buffer.
+
+# note: normalize() also rounds to 3 decimals; the fused transform skips that
+# rounding (it is finer than one ADC step of the flex sensors anyway).
+
+import numpy as np
+
+# constants used by normalizeFunction.normalize during data collection
+FLEX_MIN, FLEX_RANGE = 100.0, 700.0
+IMU_MIN,  IMU_RANGE  = -1.0, 2.0
+
+N_FEATURES = 8
+
+
+class FusedPreprocessor:
+    """
+    scale, offset: per-feature float32 vectors, output = x * scale + offset
+    """
+
+    def __init__(self, scale, offset):
+        self.scale  = np.ascontiguousarray(scale, dtype=np.float32).reshape(1, -1)
+        self.offset = np.ascontiguousarray(offset, dtype=np.float32).reshape(1, -1)
+        self.n_features = self.scale.shape[1]
+        self._frame = np.empty((1, self.n_features), dtype=np.float32)
+        self._batch = np.empty((0, self.n_features), dtype=np.float32)
+
+    @classmethod
+    def from_scaler(cls, scaler=None, norm_min=None, norm_range=None, n_features=N_FEATURES):
+        """
+        scaler    : fitted MinMaxScaler (or None for no scaling)
+        norm_min  : per-feature minimum used by normalize() (None = no normalize step)
+        norm_range: per-feature range used by normalize()
+        """
+        if norm_min is None:
+            a = np.ones(n_features)
+            b = np.zeros(n_features)
+        else:
+            # (x - min) / range  ==  x * (1/range) + (-min/range)
+            norm_min   = np.broadcast_to(np.asarray(norm_min, dtype=np.float64), (n_features,))
+            norm_range = np.broadcast_to(np.asarray(norm_range, dtype=np.float64), (n_features,))
+            a = 1.0 / norm_range
+            b = -norm_min / norm_range
+
+        if scaler is not None:
+            # MinMaxScaler: y * scale_ + min_
+            a, b = a * scaler.scale_, b * scaler.scale_ + scaler.min_
+
+        return cls(a, b)
+
+    def compose_input(self, scale, offset):
+        """
+        new FusedPreprocessor that applies x * scale + offset first (e.g. a
+        calibration remap, see calibration.py), then this one
+        """
+        a = np.asarray(scale, dtype=np.float64) * self.scale[0]
+        b = np.asarray(offset, dtype=np.float64) * self.scale[0] + self.offset[0]
+        return FusedPreprocessor(a, b)
+
+    def transform(self, X):
+        """
+        X: float32 (n, n_features) array, transformed IN PLACE and returned.
+        Anything else (lists, float64, 1-D frames) is first copied into an
+        internal buffer, which is reused on the next call.
+        """
+        if not (isinstance(X, np.ndarray) and X.dtype == np.float32 and X.ndim == 2
+                and X.flags.c_contiguous and X.flags.writeable):
+            X = self._copy_in(X)
+        np.multiply(X, self.scale, out=X)
+        np.add(X, self.offset, out=X)
+        return X
+
+    def transform_frame(self, raw_values):
+        """
+        raw_values: the 8 values of one frame (list or array)
+        returns a (1, n_features) float32 view of the reused frame buffer
+        """
+        self._frame[0] = raw_values
+        return self.transform(self._frame)
+
+    def _copy_in(self, X):
+        X = np.asarray(X)
+        rows = X.reshape(-1, self.n_features)
+        if len(rows) == 1:
+            buf = self._frame
+        else:
+            if len(self._batch) < len(rows):
+                self._batch = np.empty((len(rows), self.n_features), dtype=np.float32)
+            buf = self._batch[:len(rows)]
+        buf[...] = rows
+        return buf
+
+
+def mlp_preprocessor(scaler):
+    """Normalize (flex 100/700, IMU -1/2) then scale, as the MLP interpreter does."""
+    norm_min   = [FLEX_MIN] * 5 + [IMU_MIN] * 3
+    norm_range = [FLEX_RANGE] * 5 + [IMU_RANGE] * 3
+    return FusedPreprocessor.from_scaler(scaler, norm_min, norm_range)
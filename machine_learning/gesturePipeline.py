@@ -0,0 +1,112 @@
+# the three interpreter variants as one reusable prediction pipeline
+
+# every interpreter does the same thing per frame: optional preprocessing,
+# predict_proba, argmax, threshold, class name. what differs is where the
+# artifacts live and whether normalize() / scaler.pkl run first:
+#
+#   rf_scaler  Interpreter/Interpret.py                  RandomForest, scaler.pkl
+#   rf_raw     working interpreter/New_Interpreter1*.py  RandomForest, raw values
+#   mlp        MLP Interpreter (WIP)/Interpret*.py       MLP, normalize + scaler.pkl
+#
+# benchmarks and offline tools load a GesturePipeline instead of copying the
+# per-script code, so they measure / score exactly what the scripts run.
+
+import os
+import warnings
+
+import numpy as np
+
+from fusedPreprocess import FusedPreprocessor, mlp_preprocessor
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+
+VARIANTS = {
+    "rf_scaler": {"dir": "Interpreter",           "scaler": True,  "normalize": False, "smoothing": "none"},
+    "rf_raw":    {"dir": "working interpreter",   "scaler": False, "normalize": False, "smoothing": "majority"},
+    "mlp":       {"dir": "MLP Interpreter (WIP)", "scaler": True,  "normalize": True,  "smoothing": "vote"},
+}
+
+
+class GesturePipeline:
+    """
+    model     : anything with predict_proba (sklearn model, CompiledForest, ...)
+    preprocess: FusedPreprocessor or None (raw values go straight to the model)
+    classes   : encoder.classes_, indexed by the argmax of predict_proba
+    source    : the file the model was loaded from (model.bundle or gesture_model.pkl)
+    """
+
+    def __init__(self, model, preprocess, classes, threshold=0.75, name="", source=None):
+        self.model = model
+        self.preprocess = preprocess
+        self.classes = np.asarray(classes)
+        self.threshold = threshold
+        self.name = name
+        self.source = source
+
+    def predict_proba(self, X):
+        """X: (n, 8) raw frames -> (n, n_classes) probabilities"""
+        if self.preprocess is not None:
+            X = self.preprocess.transform(X)
+        else:
+            X = np.asarray(X, dtype=np.float32).reshape(-1, 8)
+        return self.model.predict_proba(X)
+
+    def decide(self, probs):
+        """probs -> (gestures, confidences); gestures below threshold are "Unknown" """
+        idx  = np.argmax(probs, axis=1)
+        conf = probs[np.arange(len(idx)), idx]
+        names = self.classes.take(idx).astype(object)
+        names[conf < self.threshold] = "Unknown"
+        return names, conf
+
+    def predict(self, X):
+        return self.decide(self.predict_proba(X))
+
+
+def variant_dir(variant):
+    return os.path.join(ML_DIR, VARIANTS[variant]["dir"])
+
+
+def load_pipeline(variant, artifact_dir=None, compiled=True, threshold=0.75, bundle=True, mmap=True):
+    """
+    variant     : "rf_scaler", "rf_raw" or "mlp"
+    artifact_dir: folder with gesture_model.pkl / scaler.pkl / label_encoder.pkl
+                  (defaults to the variant's interpreter folder)
+    compiled    : use forestEngine for RandomForest models
+    bundle      : load model.bundle instead of the pickles when the folder has
+                  one that matches the pickles (ignored with compiled=False),
+                  like the scripts do
+    mmap        : memory-map the bundle (False reads it into memory)
+    """
+    cfg = VARIANTS[variant]
+    artifact_dir = artifact_dir or variant_dir(variant)
+
+    bundle_path = os.path.join(artifact_dir, "model.bundle")
+    if bundle and compiled and os.path.exists(bundle_path):
+        from modelBundle import load_current_bundle
+        b = load_current_bundle(bundle_path, mmap)
+        if b is not None:
+            return GesturePipeline(b.model, b.preprocess, b.classes, threshold, name=variant,
+                                   source=bundle_path)
+
+    import joblib
+    with warnings.catch_warnings():
+        # pickles were written by another sklearn version
+        warnings.simplefilter("ignore", UserWarning)
+        model   = joblib.load(os.path.join(artifact_dir, "gesture_model.pkl"))
+        encoder = joblib.load(os.path.join(artifact_dir, "label_encoder.pkl"))
+        scaler  = joblib.load(os.path.join(artifact_dir, "scaler.pkl")) if cfg["scaler"] else None
+
+    if compiled and hasattr(model, "estimators_"):
+        from forestEngine import compile_forest
+        model = compile_forest(model)
+
+    if cfg["normalize"]:
+        preprocess = mlp_preprocessor(scaler)
+    elif scaler is not None:
+        preprocess = FusedPreprocessor.from_scaler(scaler)
+    else:
+        preprocess = None
+
+    return GesturePipeline(model, preprocess, encoder.classes_, threshold, name=variant,
+                           source=os.path.join(artifact_dir, "gesture_model.pkl"))
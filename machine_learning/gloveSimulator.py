@@ -0,0 +1,293 @@
+# virtual glove: replays recorded CSVs over a pseudo-terminal
+
+# the interpreters and gestureDataCollection.py open a serial port, so this
+# opens a pty and writes recorded samples to it in exactly the firmware's
+# format (" 801, 802, 0, 795, 881, 2.32, 9.58, -0.60\r\n", or binary frames).
+# point any script at the printed port with GLOVE_PORT=<path>.
+#
+# usage (Linux / macOS, ptys are not available on Windows):
+#   python machine_learning/gloveSimulator.py --rate 2
+#   python machine_learning/gloveSimulator.py --rate 2000 --jitter 0.2 --malformed 0.01 \
+#          --schedule "Dale:3,ILoveYou:2,Paws_Up:2" --link /tmp/glove --truth truth.csv
+#
+# the same thing is available in-process for benchmarks:
+#   sim = GloveSimulator(rate=500, schedule=[("Dale", 2.0)]); port = sim.start(); ...; sim.stop()
+
+import os
+import sys
+import csv
+import glob
+import time
+import errno
+import argparse
+import threading
+
+import numpy as np
+
+from frameProtocol import encode_ascii, encode_frame
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIRS = {
+    "data": os.path.join(ML_DIR, "data"),
+    "new":  os.path.join(os.path.dirname(ML_DIR), "New_Data"),
+}
+BANNER = b"Initializing MPU6050...\r\nMPU6050 connected!\r\n"
+
+
+def load_recordings(sources=("data", "new")):
+    """
+    returns {gesture: (n, 8) float array} from every CSV in the chosen sources,
+    keyed by the Gesture column with surrounding spaces removed
+    """
+    rows = {}
+    for src in sources:
+        for path in sorted(glob.glob(os.path.join(DATA_DIRS[src], "*.csv"))):
+            with open(path, newline="") as f:
+                reader = csv.reader(f)
+                next(reader, None)
+                for rec in reader:
+                    if len(rec) < 9:
+                        continue
+                    try:
+                        values = [float(v) for v in rec[:8]]
+                    except ValueError:
+                        continue
+                    rows.setdefault(rec[8].strip(), []).append(values)
+    return {g: np.array(v) for g, v in rows.items()}
+
+
+def parse_schedule(text):
+    """'Dale:3,ILoveYou:2' -> [('Dale', 3.0), ('ILoveYou', 2.0)]"""
+    schedule = []
+    for item in text.split(","):
+        name, _, secs = item.strip().rpartition(":")
+        schedule.append((name.strip(), float(secs)))
+    return schedule
+
+
+class GloveSimulator:
+    """
+    rate        samples per second (virtual clock, 2 Hz .. several kHz)
+    jitter      +/- fraction of the sample period added to each interval
+    malformed   probability that a sample is sent as a broken line
+    banner_every re-send the "Initializing..." banner every N seconds (0 = only at start)
+    schedule    [(gesture, seconds), ...] played in a loop; default is every
+                recorded gesture for `hold` seconds each
+    binary      send binary frames (BINARY_FRAMES 1) instead of ASCII
+    duration    stop after this many virtual seconds (None = run until stop())
+    truth_path  optional CSV of (seq, t, gesture, malformed) for every sample sent
+    """
+
+    def __init__(self, rate=2.0, jitter=0.0, malformed=0.0, banner_every=0.0,
+                 schedule=None, hold=2.0, sources=("data", "new"), binary=False,
+                 duration=None, seed=0, truth_path=None, recordings=None):
+        self.recordings = recordings if recordings is not None else load_recordings(sources)
+        if not self.recordings:
+            raise RuntimeError("no recorded gestures found")
+        if schedule is None:
+            schedule = [(g, hold) for g in sorted(self.recordings)]
+        for g, _ in schedule:
+            if g not in self.recordings:
+                raise KeyError(f"no recording for gesture {g!r}; have {sorted(self.recordings)}")
+
+        self.rate = float(rate)
+        self.jitter = float(jitter)
+        self.malformed = float(malformed)
+        self.banner_every = float(banner_every)
+        self.schedule = schedule
+        self.binary = binary
+        self.duration = duration
+        self.rng = np.random.default_rng(seed)
+        self.truth_path = truth_path
+
+        self.cycle = sum(secs for _, secs in schedule)
+        self.cursor = {g: 0 for g in self.recordings}
+        self.master = self.slave = None
+        self.port = None
+        self._thread = None
+        self._stop = threading.Event()
+
+        # counters
+        self.sent = 0
+        self.injected = 0
+        self.dropped_bytes = 0
+
+    # ── pty ──────────────────────────────────────────────────────────────────
+    def open(self, link=None):
+        import pty
+        import tty
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)            # no echo / newline translation
+        os.set_blocking(self.master, False)
+        self.port = os.ttyname(self.slave)
+        if link:
+            if os.path.islink(link):
+                os.remove(link)
+            os.symlink(self.port, link)
+            self.port = link
+        return self.port
+
+    def close(self):
+        for fd in (self.master, self.slave):
+            if fd is not None:
+                os.close(fd)
+        self.master = self.slave = None
+
+    def _write(self, data):
+        # like the real UART: if nobody drains the port, bytes are lost
+        try:
+            n = os.write(self.master, data)
+        except OSError as e:
+            if e.errno not in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EIO):
+                raise
+            n = 0
+        self.dropped_bytes += len(data) - n
+
+    # ── samples ──────────────────────────────────────────────────────────────
+    def gesture_at(self, t):
+        t = t % self.cycle if self.cycle > 0 else 0.0
+        for g, secs in self.schedule:
+            if t < secs:
+                return g
+            t -= secs
+        return self.schedule[-1][0]
+
+    def next_sample(self, t):
+        """returns (bytes, gesture, is_malformed) for the sample at virtual time t"""
+        g = self.gesture_at(t)
+        rows = self.recordings[g]
+        row = rows[self.cursor[g] % len(rows)]
+        self.cursor[g] += 1
+
+        if self.binary:
+            data = encode_frame(self.sent, row[:5], row[5:])
+        else:
+            data = encode_ascii(row)
+
+        bad = self.malformed > 0 and self.rng.random() < self.malformed
+        if bad:
+            data = self._break(data)
+            self.injected += 1
+        self.sent += 1
+        return data, g, bad
+
+    def _break(self, data):
+        kind = self.rng.integers(4)
+        if self.binary:
+            data = bytearray(data)
+            data[self.rng.integers(2, len(data) - 1)] ^= 0xFF      # flips the CRC check
+            return bytes(data)
+        if kind == 0:
+            return data[:len(data) // 2] + b"\r\n"                  # truncated line
+        if kind == 1:
+            return data.replace(b", ", b", x", 1)                  # non-numeric field
+        if kind == 2:
+            return data.rsplit(b", ", 1)[0] + b"\r\n"               # missing field
+        return b"\r\n"                                              # empty line
+
+    # ── streaming ────────────────────────────────────────────────────────────
+    def run(self):
+        truth = open(self.truth_path, "w", newline="") if self.truth_path else None
+        if truth:
+            truth.write("seq,t,gesture,malformed\n")
+
+        period = 1.0 / self.rate
+        start = time.perf_counter()
+        t_virtual = 0.0
+        next_banner = self.banner_every if self.banner_every > 0 else None
+        self._write(BANNER)
+
+        try:
+            while not self._stop.is_set():
+                if self.duration is not None and t_virtual >= self.duration:
+                    break
+                now = time.perf_counter() - start
+                if now < t_virtual:
+                    time.sleep(min(t_virtual - now, 0.005))
+                    continue
+
+                # send everything that is due in one write (needed above ~1 kHz)
+                out = bytearray()
+                while t_virtual <= now and len(out) < 4096:
+                    if next_banner is not None and t_virtual >= next_banner:
+                        out += BANNER
+                        next_banner += self.banner_every
+                    data, g, bad = self.next_sample(t_virtual)
+                    out += data
+                    if truth:
+                        truth.write(f"{self.sent - 1},{t_virtual:.6f},{g},{int(bad)}\n")
+                    step = period
+                    if self.jitter > 0:
+                        step *= 1.0 + self.jitter * self.rng.uniform(-1.0, 1.0)
+                    t_virtual += step
+                self._write(bytes(out))
+        finally:
+            if truth:
+                truth.close()
+
+    def start(self, link=None):
+        """opens the pty (if needed), streams on a background thread, returns the port path"""
+        if self.master is None:
+            self.open(link)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.close()
+
+    def counters(self):
+        return {"sent": self.sent, "malformed": self.injected, "dropped_bytes": self.dropped_bytes}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay recorded glove CSVs over a pseudo-terminal")
+    ap.add_argument("--rate", type=float, default=2.0, help="samples per second (firmware is ~2 Hz)")
+    ap.add_argument("--jitter", type=float, default=0.0, help="+/- fraction of the period")
+    ap.add_argument("--malformed", type=float, default=0.0, help="probability of a broken line")
+    ap.add_argument("--banner-every", type=float, default=0.0, help="resend the banner every N s")
+    ap.add_argument("--schedule", help='e.g. "Dale:3,ILoveYou:2" (gesture:seconds, looped)')
+    ap.add_argument("--hold", type=float, default=2.0, help="seconds per gesture without --schedule")
+    ap.add_argument("--sources", default="data,new", help="data, new or data,new")
+    ap.add_argument("--binary", action="store_true", help="send binary frames instead of ASCII")
+    ap.add_argument("--duration", type=float, help="stop after N seconds")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--link", help="also expose the port as this symlink (e.g. /tmp/glove)")
+    ap.add_argument("--truth", help="write seq,t,gesture,malformed per sample to this CSV")
+    ap.add_argument("--list", action="store_true", help="list recorded gestures and exit")
+    args = ap.parse_args()
+
+    sources = [s.strip() for s in args.sources.split(",") if s.strip()]
+    if args.list:
+        for g, rows in sorted(load_recordings(sources).items()):
+            print(f"{g:<16} {len(rows)} samples")
+        return
+
+    sim = GloveSimulator(
+        rate=args.rate, jitter=args.jitter, malformed=args.malformed,
+        banner_every=args.banner_every,
+        schedule=parse_schedule(args.schedule) if args.schedule else None,
+        hold=args.hold, sources=sources, binary=args.binary,
+        duration=args.duration, seed=args.seed, truth_path=args.truth,
+    )
+    port = sim.open(args.link)
+    print(f"🧤 virtual glove on {port}  ({args.rate:g} Hz)")
+    print(f"   run an interpreter with: GLOVE_PORT={port} python ...")
+
+    try:
+        sim.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"\n🛑 stopped: {sim.counters()}")
+        sim.close()
+        if args.link and os.path.islink(args.link):
+            os.remove(args.link)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+# swap in a retrained model while an interpreter keeps running
+
+# replacing the model used to mean restarting the script: the serial port
+# was opened again, the Arduino reset wait (time.sleep(2)) sat through
+# again, and the GUI window started over. ModelReloader watches the
+# interpreter's folder (the files predictionCache.artifact_paths lists) on a
+# background thread. when they change and then stay unchanged for `settle`
+# seconds (a trainer writes several files) it:
+#   load      the folder like the interpreter does: model.bundle or the
+#             pickles (gesturePipeline.load_pipeline), GLOVE_ID calibration,
+#             the GLOVE_CASCADE first stage
+#   validate  classes present and unique, finite probabilities that sum to 1
+#             with one column per class, on a few probe frames (the min / mid
+#             / max of calibration_reference.json)
+#   warm up   one frame through transform_frame + predict_proba, like live
+# a new model that fails any of these is never swapped in: the interpreter
+# keeps the one it has, and the same files aren't tried again until they
+# change. the loop only calls poll() between frames; it returns None (one
+# attribute check) or the new (model, preprocess, encoder) to rebind, so no
+# frame waits for a load. if the first prediction after a swap raises, the
+# next poll() hands back the previous model (rollback).
+#
+#   stats()   reloads, failures, rollbacks, load / warm-up ms, wait_ms (ready
+#             -> swapped at a frame boundary), swap_us, first_predict_ms
+#             (the first live prediction of the new model); on /metrics as
+#             glove_reload_*
+#
+# put a new model.bundle in with a rename (mv, os.replace; modelBundle.py
+# export and trainModels.py --install write it that way), not by copying over
+# it: the bundle loaded at startup is memory-mapped, and truncating it in
+# place (cp new old) kills the interpreter with SIGBUS. reloaded bundles are
+# read into memory instead.
+#
+# usage (interpreters; on by default, GLOVE_RELOAD=<seconds between checks>,
+# 0 turns it off):
+#   reloader = reloader_from_env(BASE_DIR, "rf_raw", (model, preprocess, encoder), cache)
+#   ...
+#   state = reloader.poll()                      # once per frame
+#   if state is not None:
+#       model, preprocess, encoder = state
+#       smoother = make_smoother(...)            # old votes belong to the old model
+
+import os
+import time
+import threading
+
+import numpy as np
+
+from calibration import ChannelNormalizer, apply_calibration, load_reference
+from predictionCache import artifact_paths, fingerprint
+from temporalFeatures import TemporalPreprocessor
+
+
+def load_state(model_dir, variant, raw_frames=False):
+    """
+    (model, preprocess, encoder) the way the interpreters build them at startup;
+    raw_frames: the script sends raw frames to the model although the
+    variant scales them (Interpreter/New_Interpreter.py), so only a temporal
+    model's window is kept from the variant's preprocessing
+    """
+    from gesturePipeline import load_pipeline
+    from modelBundle import ClassLabels
+    from cascade import cascade_from_env
+    pipeline = load_pipeline(variant, model_dir, mmap=False)
+    preprocess = pipeline.preprocess
+    if raw_frames and not isinstance(preprocess, TemporalPreprocessor):
+        preprocess = None
+    preprocess = apply_calibration(preprocess, os.environ.get("GLOVE_ID"), load_reference(model_dir))
+    model = cascade_from_env(model_dir, pipeline.model, preprocess)
+    return model, preprocess, ClassLabels(pipeline.classes)
+
+
+def probe_frames(model_dir):
+    """min, mid and max frame of the model's training ranges (legacy constants if unknown)"""
+    ref = load_reference(model_dir) or ChannelNormalizer.legacy()
+    lo, hi = ref.minimum, ref.minimum + ref.range
+    return np.stack([lo, (lo + hi) / 2, hi]).astype(np.float32)
+
+
+def validate(state, probes):
+    """raises ValueError when the state can't serve frames; returns the warm-up seconds"""
+    model, pre, encoder = state
+    classes = np.asarray(encoder.classes_)
+    if not len(classes) or len(set(classes.tolist())) != len(classes):
+        raise ValueError(f"label encoder has no or duplicate classes: {classes.tolist()}")
+
+    X = np.array(probes, dtype=np.float32)
+    # a fresh window for the check, the live one stays empty
+    check = pre.copy() if isinstance(pre, TemporalPreprocessor) else pre
+    probs = np.asarray(model.predict_proba(check.transform(X) if check is not None else X))
+    if probs.shape != (len(X), len(classes)):
+        raise ValueError(f"model returns {probs.shape[-1]} probabilities for {len(classes)} classes")
+    if not np.all(np.isfinite(probs)) or np.abs(probs.sum(axis=1) - 1).max() > 1e-3:
+        raise ValueError("model probabilities are not finite or don't sum to 1")
+
+    t = time.perf_counter()
+    x = pre.transform_frame(X[0]) if pre is not None else X[:1]
+    model.predict_proba(x)
+    warm = time.perf_counter() - t
+    if isinstance(pre, TemporalPreprocessor):
+        pre.reset()
+    return warm
+
+
+class _FirstPrediction:
+    """wraps a freshly swapped model to time its first live call (and roll back if it raises)"""
+
+    def __init__(self, model, reloader):
+        self.model = model
+        self.reloader = reloader
+        self.pending = True
+
+    def __getattr__(self, name):
+        return getattr(self.__dict__["model"], name)
+
+    def predict_proba(self, X):
+        if not self.pending:
+            return self.model.predict_proba(X)
+        self.pending = False
+        t = time.perf_counter()
+        try:
+            probs = self.model.predict_proba(X)
+        except Exception as e:
+            self.reloader.rollback(e)
+            raise
+        self.reloader.first_prediction(time.perf_counter() - t)
+        return probs
+
+
+class ModelReloader:
+    """
+    model_dir: the interpreter's folder
+    load     : load(model_dir) -> (model, preprocess, encoder)
+    state    : what the interpreter runs now (kept for rollback)
+    cache    : its PredictionCache, cleared on every swap
+    interval : seconds between checks of the files
+    settle   : seconds the files must stay unchanged before loading
+    """
+
+    def __init__(self, model_dir, load, state, cache=None, interval=1.0, settle=0.5):
+        self.model_dir = model_dir
+        self.load = load
+        self.current = tuple(state)
+        self.previous = None
+        self.cache = cache
+        self.interval = interval
+        self.settle = settle
+        self.paths = artifact_paths(model_dir)
+        self.probes = probe_frames(model_dir)
+        self.pending = None              # (state, "reload" | "rollback", ready time)
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.version = 1
+        self.reloads = self.failures = self.rollbacks = 0
+        self.last = {"load_ms": 0.0, "warmup_ms": 0.0, "wait_ms": 0.0, "swap_us": 0.0,
+                     "first_predict_ms": 0.0}
+        self.last_error = None
+
+    # ── watcher thread ──
+    def start(self):
+        self.thread = threading.Thread(target=self._watch, name="model-reload", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _watch(self):
+        seen = fingerprint(self.paths)
+        while not self.stop_event.wait(self.interval):
+            now = fingerprint(self.paths)
+            if now == seen:
+                continue
+            while not self.stop_event.wait(self.settle):
+                again = fingerprint(self.paths)
+                if again == now:
+                    break
+                now = again
+            seen = now
+            self.reload()
+
+    def reload(self):
+        """load + validate + warm up the folder's files now; True if a swap is pending"""
+        t = time.perf_counter()
+        try:
+            state = tuple(self.load(self.model_dir))
+            loaded = time.perf_counter()
+            warm = validate(state, self.probes)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            print(f"❌ model reload failed, keeping the current model: {self.last_error}")
+            return False
+        self.last["load_ms"] = (loaded - t) * 1e3
+        self.last["warmup_ms"] = warm * 1e3
+        model, pre, encoder = state
+        with self.lock:
+            self.pending = ((_FirstPrediction(model, self), pre, encoder), "reload", time.perf_counter())
+        print(f"🔄 new model loaded ({self.last['load_ms']:.1f} ms, warm-up "
+              f"{self.last['warmup_ms']:.2f} ms), swapping at the next frame")
+        return True
+
+    # ── interpreter side ──
+    def poll(self):
+        """between frames: None, or the (model, preprocess, encoder) to use from now on"""
+        if self.pending is None:
+            return None
+        t = time.perf_counter()
+        with self.lock:
+            state, kind, ready = self.pending
+            self.pending = None
+        if kind == "reload":
+            self.previous = self.current
+            self.reloads += 1
+            self.version += 1
+        self.current = state
+        if self.cache is not None:
+            self.cache.invalidate()
+        done = time.perf_counter()
+        self.last["wait_ms"] = (t - ready) * 1e3
+        self.last["swap_us"] = (done - t) * 1e6
+        if kind == "reload":
+            print(f"🔄 model v{self.version} in use (swap {self.last['swap_us']:.0f} µs, "
+                  f"{self.last['wait_ms']:.1f} ms after it was ready)")
+        return state
+
+    def first_prediction(self, seconds):
+        self.last["first_predict_ms"] = seconds * 1e3
+        print(f"⏱  first prediction of model v{self.version}: {seconds * 1e3:.2f} ms")
+
+    def rollback(self, error):
+        """the new model failed live: the next poll() returns the previous one"""
+        if self.previous is None:
+            return
+        self.rollbacks += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+        print(f"↩️  model v{self.version} failed ({self.last_error}), rolling back")
+        with self.lock:
+            self.pending = (self.previous, "rollback", time.perf_counter())
+        self.previous = None
+
+    def stats(self):
+        return {"version": self.version, "reloads": self.reloads, "failures": self.failures,
+                "rollbacks": self.rollbacks, **self.last}
+
+    def cascade_stats(self):
+        """stats() of the CascadeModel in use (the swapped-in one after a reload), {} without one"""
+        from cascade import CascadeModel
+        model = self.current[0]
+        if isinstance(model, _FirstPrediction):
+            model = model.model
+        return model.stats() if isinstance(model, CascadeModel) else {}
+
+
+def reloader_from_env(model_dir, variant, state, cache=None, raw_frames=False):
+    """
+    the interpreters' reloader for gesturePipeline variant `variant`
+    (raw_frames: see load_state); GLOVE_RELOAD=<seconds> between checks
+    (default 1), 0 = never reload (poll() then always returns None)
+    """
+    interval = float(os.environ.get("GLOVE_RELOAD", "1") or 0)
+    reloader = ModelReloader(model_dir, lambda d: load_state(d, variant, raw_frames), state, cache,
+                             interval=interval or 1.0)
+    if interval > 0:
+        reloader.start()
+    return reloader
@@ -0,0 +1,295 @@
+# metrics for the live interpreters
+
+# the interpreters used to print several lines per frame ("Raw line from glove",
+# "Input dtype", "Prediction: ..."), and writing to the console was a large
+# share of the loop. now they count into a Registry instead:
+#   glove_frames_total              sensor frames handed to the model
+#   glove_malformed_total           lines that were not 8 numbers
+#   glove_banners_total             "Initializing..." / status / empty lines skipped
+#                                   (scripts on SerialReader get these two from
+#                                   the decoder: glove_reader_decoder_skipped, ...)
+#   glove_prediction_errors_total   frames the model raised on
+#   glove_predictions_total{gesture="..."}   per-frame predictions, so the
+#                                   Unknown rate is the "Unknown" share of them
+#   glove_confidence                histogram of the top probability
+#   glove_stage_seconds{stage="..."}  histogram per stage (parse, preprocess,
+#                                   predict, smooth)
+# plus gauges from registry.collect() callbacks (SerialReader.counters,
+# TkRenderer.stats, ...), which only run when someone reads the metrics.
+#
+# endpoint (a daemon thread, localhost only):
+#   http://127.0.0.1:9108/metrics        Prometheus text format
+#   http://127.0.0.1:9108/metrics.json   the same as JSON, with p50 / p95
+#   GLOVE_METRICS_PORT=<port> picks another port, 0 turns it off
+# console output, GLOVE_VERBOSE:
+#   0  (default) startup, errors and smoothed gesture CHANGES
+#   1  + the smoothed gesture of every frame (the old output)
+#   2  + raw lines, skipped lines, input dtype and every raw prediction
+# per-frame output is gated with a plain `if VERBOSE >= n: print(...)`, so
+# nothing is formatted when it's off
+#
+# the endpoint thread reads the counters while the inference loop adds
+# labels to them; exports go through snapshot(), a copy taken in one step
+# (dict() of a dict doesn't run python code, so the GIL keeps it whole), and
+# the loop never takes a lock
+#
+# usage:
+#   from metrics import InterpreterMetrics, VERBOSE
+#   metrics = InterpreterMetrics().start()
+#   t = time.perf_counter(); ...; t = metrics.stage("predict", t)
+#   metrics.prediction(gesture, confidence)
+#   if VERBOSE >= 2:
+#       print("Input dtype:", X.dtype)
+
+import os
+import sys
+import json
+import time
+import atexit
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+VERBOSE = int(os.environ.get("GLOVE_VERBOSE") or 0)
+METRICS_PORT = int(os.environ.get("GLOVE_METRICS_PORT") or 9108)
+if os.environ.get("GLOVE_METRICS_PORT") == "0":
+    METRICS_PORT = 0
+
+LATENCY_BUCKETS = (5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 5e-2)
+CONFIDENCE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.75, 0.8, 0.9, 0.95, 1.0)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, label=None):
+        self.name, self.help, self.label = name, help, label
+        self.values = {} if label else {"": 0}   # label value ("" without a label) -> count
+
+    def inc(self, n=1, label=""):
+        self.values[label] = self.values.get(label, 0) + n
+
+    def snapshot(self):
+        """label -> count, copied in one step (see the top of the file)"""
+        return dict(self.values)
+
+    def total(self):
+        return sum(self.snapshot().values())
+
+    def to_dict(self):
+        values = self.snapshot()
+        return values if self.label else values.get("", 0)
+
+
+class Histogram:
+    """fixed buckets, cumulative like Prometheus (le = upper bound, inclusive)"""
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets, label=None):
+        self.name, self.help, self.label = name, help, label
+        self.buckets = tuple(buckets)
+        self.series = {}                # label value -> [bucket counts (+inf last), sum, count]
+
+    def observe(self, value, label=""):
+        s = self.series.get(label)
+        if s is None:
+            s = self.series[label] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        s[0][bisect.bisect_left(self.buckets, value)] += 1
+        s[1] += value
+        s[2] += 1
+
+    def snapshot(self):
+        """label -> (bucket counts, sum, count), copied like Counter.snapshot"""
+        return {label: (list(s[0]), s[1], s[2]) for label, s in dict(self.series).items()}
+
+    def quantile(self, q, label="", series=None):
+        """
+        estimate, interpolated inside the bucket (the top bucket reports its lower bound)
+        series: a snapshot() to read instead of the live series
+        """
+        s = (series if series is not None else self.series).get(label)
+        if not s or not s[2]:
+            return 0.0
+        rank, seen = q * s[2], 0
+        for i, n in enumerate(s[0]):
+            if n and seen + n >= rank:
+                lo = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lo
+                return lo + (self.buckets[i] - lo) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+    def to_dict(self):
+        out = {}
+        series = self.snapshot()
+        for label, (counts, total, n) in series.items():
+            out[label] = {"count": n, "sum": total, "mean": total / n if n else 0.0,
+                          "p50": self.quantile(0.5, label, series),
+                          "p95": self.quantile(0.95, label, series)}
+        return out if self.label else out.get("", {"count": 0})
+
+
+class Registry:
+    """named counters / histograms plus collect() callbacks, exported on demand"""
+
+    def __init__(self, prefix="glove_"):
+        self.prefix = prefix
+        self.metrics = {}
+        self.collectors = {}
+        self.server = None
+
+    def counter(self, name, help, label=None):
+        return self.metrics.setdefault(name, Counter(name, help, label))
+
+    def histogram(self, name, help, buckets, label=None):
+        return self.metrics.setdefault(name, Histogram(name, help, buckets, label))
+
+    def collect(self, name, fn):
+        """fn() -> dict, its numeric values are exported as <prefix><name>_<key> gauges"""
+        self.collectors[name] = fn
+
+    def _collected(self):
+        out = {}
+        for name, fn in list(self.collectors.items()):
+            try:
+                values = fn()
+            except Exception:
+                continue
+            out[name] = {k: v for k, v in values.items()
+                         if isinstance(v, (int, float)) and not isinstance(v, bool)}
+        return out
+
+    def to_dict(self):
+        out = {name: m.to_dict() for name, m in list(self.metrics.items())}
+        out.update(self._collected())
+        return out
+
+    def prometheus(self):
+        lines = []
+        for name, m in list(self.metrics.items()):
+            full = self.prefix + name
+            lines += [f"# HELP {full} {m.help}", f"# TYPE {full} {m.kind}"]
+            if m.kind == "counter":
+                for label, v in sorted(m.snapshot().items()):
+                    lines.append(f"{full}{_labels(m.label, label)} {v}")
+                continue
+            for label, (counts, total, n) in sorted(m.snapshot().items()):
+                cum = 0
+                for bound, c in zip(m.buckets + (float("inf"),), counts):
+                    cum += c
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{full}_bucket{_labels(m.label, label, le)} {cum}")
+                lines.append(f"{full}_sum{_labels(m.label, label)} {total}")
+                lines.append(f"{full}_count{_labels(m.label, label)} {n}")
+        for name, values in self._collected().items():
+            for key, v in values.items():
+                full = f"{self.prefix}{name}_{key}"
+                lines += [f"# TYPE {full} gauge", f"{full} {v}"]
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=METRICS_PORT, host="127.0.0.1"):
+        """starts the /metrics endpoint on a daemon thread; returns the server or None"""
+        if not port or self.server is not None:
+            return self.server
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body, ctype = json.dumps(registry.to_dict()).encode(), "application/json"
+                elif self.path.startswith("/metrics"):
+                    body, ctype = registry.prometheus().encode(), "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass                    # no console line per scrape
+
+        try:
+            self.server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            print(f"⚠️  metrics endpoint not started on {host}:{port}: {e}")
+            return None
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"📈 metrics on http://{host}:{port}/metrics (and /metrics.json)")
+        return self.server
+
+
+def _labels(name, value, le=None):
+    parts = []
+    if name:
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        parts.append(f'{name}="{escaped}"')
+    if le is not None:
+        parts.append(f'le="{le}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class InterpreterMetrics:
+    """the standard interpreter metrics on one Registry"""
+
+    def __init__(self, registry=None):
+        r = self.registry = registry or Registry()
+        self.frames = r.counter("frames_total", "sensor frames handed to the model")
+        self.malformed = r.counter("malformed_total", "lines that were not 8 numbers")
+        self.banners = r.counter("banners_total", "Initializing / status / empty lines skipped")
+        self.errors = r.counter("prediction_errors_total", "frames the model raised on")
+        self.predictions = r.counter("predictions_total", "per-frame predictions", label="gesture")
+        self.confidence = r.histogram("confidence", "top class probability", CONFIDENCE_BUCKETS)
+        self.stages = r.histogram("stage_seconds", "time per pipeline stage", LATENCY_BUCKETS,
+                                  label="stage")
+        self.last_gesture = None
+        self.started = time.perf_counter()
+        self._decoded = (0, 0)
+
+    def stage(self, stage, t0):
+        """records perf_counter() - t0 for `stage`, returns now (the next stage's t0)"""
+        t1 = time.perf_counter()
+        self.stages.observe(t1 - t0, stage)
+        return t1
+
+    def decoded(self, decoder, frames):
+        """counts one FrameDecoder.feed() result: its frames and the lines it skipped"""
+        self.frames.inc(len(frames))
+        banners, malformed = decoder.banners, decoder.malformed
+        self.banners.inc(banners - self._decoded[0])
+        self.malformed.inc(malformed - self._decoded[1])
+        self._decoded = (banners, malformed)
+
+    def prediction(self, gesture, confidence=None):
+        self.predictions.inc(label=str(gesture))
+        if confidence is not None:
+            self.confidence.observe(float(confidence))
+
+    def gesture_changed(self, smoothed):
+        """True when the smoothed gesture differs from the previous frame's"""
+        changed = smoothed != self.last_gesture
+        self.last_gesture = smoothed
+        return changed
+
+    def unknown_rate(self):
+        total = self.predictions.total()
+        return self.predictions.snapshot().get("Unknown", 0) / total if total else 0.0
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        series = self.stages.snapshot()
+        stages = " ".join(f"{s} {self.stages.quantile(0.5, s, series) * 1e6:.0f}µs" for s in series)
+        return (f"📈 {self.frames.total()} frames ({self.frames.total() / elapsed:.1f}/s), "
+                f"{self.malformed.total()} malformed, {self.banners.total()} skipped, "
+                f"{self.errors.total()} errors, Unknown {self.unknown_rate():.0%}"
+                + (f" | p50 {stages}" if stages else ""))
+
+    def start(self, port=METRICS_PORT):
+        """serves the endpoint and prints summary() when the script exits"""
+        self.registry.serve(port)
+        atexit.register(lambda: print(self.summary(), file=sys.stderr))
+        return self
@@ -0,0 +1,236 @@
+# plain NumPy forward pass for the MLP interpreter's gesture_model.pkl
+
+# MLPClassifier.predict_proba is a handful of matrix products; calling it
+# through sklearn costs input validation on every frame and needs sklearn
+# (and a version-matched pickle) at startup. MLPForward holds just the
+# weights, so it can be built from a fitted model or from the arrays in a
+# model bundle (modelBundle.py) without importing sklearn at all.
+#
+# the layer outputs go into buffers kept per thread (one set for single
+# frames, one for the largest batch so far, up to MAX_PREALLOC_ROWS rows), so
+# a frame allocates nothing but the returned probabilities.
+#
+# QuantizedMLP stores the weights as int8 with one scale per layer (a 4x
+# smaller bundle, `modelBundle.py export --int8`). the hidden layers' inputs
+# are rounded to int8 per row (scale = row max / 127) and the int8 x int8
+# products are summed in float32 with BLAS: numpy has no int8 matmul, and the
+# sums are exact as long as n_in * 127 * 127 < 2**24 (n_in <= 1040). the
+# first layer is different: raw frames mix flex readings around 800 with
+# accel around 1, so its input stays float and its weights get one scale per
+# input channel (folded into the input) instead of one for the layer.
+# benchmarks/mlpBenchmark.py prints accuracy and speed of both against
+# sklearn: on scaled input (every MLP interpreter) int8 agrees with sklearn
+# on 99.5-100% of frames; an MLP on unscaled raw frames is too sensitive for
+# it (~80%). it is about half the speed of float32, still ~3.5x sklearn.
+
+import threading
+
+import numpy as np
+
+MAX_PREALLOC_ROWS = 4096
+MAX_INT8_INPUTS = 1040
+
+
+def _relu(x):
+    np.maximum(x, 0.0, out=x)
+    return x
+
+
+def _tanh(x):
+    np.tanh(x, out=x)
+    return x
+
+
+def _logistic(x):
+    # same formulation as scipy.special.expit, which sklearn uses
+    np.negative(x, out=x)
+    np.exp(x, out=x)
+    x += 1.0
+    np.reciprocal(x, out=x)
+    return x
+
+
+def _identity(x):
+    return x
+
+
+def _softmax(x):
+    # keepdims: half the cost of [:, None] on a single frame
+    x -= x.max(axis=1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=1, keepdims=True)
+    return x
+
+
+ACTIVATIONS = {"relu": _relu, "tanh": _tanh, "logistic": _logistic,
+               "identity": _identity, "softmax": _softmax}
+
+
+class MLPForward:
+    """
+    weights       : list of (n_in, n_out) arrays, one per layer (MLPClassifier.coefs_)
+    biases        : list of (n_out,) arrays (MLPClassifier.intercepts_)
+    activation    : hidden activation ("relu", "tanh", "logistic", "identity")
+    out_activation: "softmax" (multiclass) or "logistic" (binary)
+    """
+
+    def __init__(self, weights, biases, activation="relu", out_activation="softmax",
+                 classes=None):
+        # weights keep the dtype they were trained in (float32 for gesture_model.pkl)
+        self.weights = [np.asarray(w) for w in weights]
+        self.biases  = [np.asarray(b) for b in biases]
+        self.activation = activation
+        self.out_activation = out_activation
+        self._hidden = ACTIVATIONS[activation]
+        self._out    = ACTIVATIONS[out_activation]
+        self.n_features_in_ = self.weights[0].shape[0]
+        self.classes_ = np.arange(self.n_classes) if classes is None else np.asarray(classes)
+        self._local = threading.local()
+        # input dtype -> buffer dtype (np.result_type costs ~1 µs per frame)
+        self._dtypes = {np.dtype(t): np.result_type(t, self.weights[0].dtype)
+                        for t in (np.float32, np.float64)}
+
+    @property
+    def n_classes(self):
+        n_out = self.weights[-1].shape[1]
+        return 2 if n_out == 1 else n_out
+
+    @property
+    def nbytes(self):
+        return sum(w.nbytes for w in self.weights) + sum(b.nbytes for b in self.biases)
+
+    def predict_proba(self, X):
+        """
+        X: (n_rows, n_features) or (n_features,) array (already preprocessed)
+        returns (n_rows, n_classes) probabilities, same as MLPClassifier
+        """
+        # like sklearn: float32 input stays float32, anything else becomes float64
+        X = np.asarray(X)
+        if X.dtype != np.float32:
+            X = X.astype(np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, but the MLP "
+                             f"expects {self.n_features_in_}")
+
+        ws = self._workspace(len(X), self._dtypes[X.dtype])
+        a = X
+        last = len(self.weights) - 1
+        for i in range(last + 1):
+            a = self._layer(i, a, ws)
+            a = self._out(a) if i == last else self._hidden(a)
+
+        if a.shape[1] == 1:
+            # binary: sklearn returns [1 - p, p]
+            p = a.ravel()
+            return np.vstack([1.0 - p, p]).T
+        # the buffer is reused by the next call
+        return a.copy()
+
+    def _layer(self, i, a, ws):
+        out = ws["out"][i]
+        np.matmul(a, self.weights[i], out=out)
+        out += self.biases[i]
+        return out
+
+    # ── preallocated activations ──
+    def _alloc(self, n, dtype):
+        return {"out": [np.empty((n, w.shape[1]), dtype) for w in self.weights]}
+
+    def _workspace(self, n, dtype):
+        """this thread's buffers for n rows (views of bigger ones when needed)"""
+        if n > MAX_PREALLOC_ROWS:
+            return self._alloc(n, dtype)
+        spaces = self._local.__dict__.setdefault("spaces", {})
+        key = (dtype, n == 1)
+        ws = spaces.get(key)
+        if ws is None or ws["rows"] < n:
+            ws = spaces[key] = dict(self._alloc(n, dtype), rows=n)
+        if ws["rows"] == n:
+            return ws
+        return {k: [b[:n] for b in bufs] for k, bufs in ws.items() if k != "rows"}
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+class QuantizedMLP(MLPForward):
+    """
+    qweights: list of (n_in, n_out) int8 arrays
+    scales  : per layer, weight = qweight * scale; (n_in,) per input channel
+              for the first layer, one float for the others
+    (the rest as MLPForward)
+    """
+
+    def __init__(self, qweights, scales, biases, activation="relu", out_activation="softmax",
+                 classes=None):
+        self.qweights = [np.asarray(q, dtype=np.int8) for q in qweights]
+        self.scales = [np.asarray(s, dtype=np.float32).reshape(-1) for s in scales]
+        self.scales[0] = self.scales[0].reshape(1, -1)
+        if max(q.shape[0] for q in self.qweights) > MAX_INT8_INPUTS:
+            raise ValueError(f"int8 layers need <= {MAX_INT8_INPUTS} inputs for exact float32 sums")
+        # int-valued float32 copies: exact int8 products through BLAS
+        super().__init__([q.astype(np.float32) for q in self.qweights],
+                         [np.asarray(b, dtype=np.float32) for b in biases],
+                         activation, out_activation, classes)
+
+    @classmethod
+    def from_float(cls, mlp):
+        """MLPForward -> QuantizedMLP, symmetric scales max|W| / 127 (per input channel in layer 0)"""
+        qweights, scales = [], []
+        for i, w in enumerate(mlp.weights):
+            w = np.asarray(w, dtype=np.float64)
+            scale = np.abs(w).max(axis=1, keepdims=True) if i == 0 else np.abs(w).max()
+            scale = np.where(scale > 0, scale, 127.0) / 127
+            qweights.append(np.clip(np.rint(w / scale), -127, 127).astype(np.int8))
+            scales.append(scale)
+        return cls(qweights, scales, mlp.biases, mlp.activation, mlp.out_activation, mlp.classes_)
+
+    @property
+    def nbytes(self):
+        return sum(q.nbytes for q in self.qweights) + sum(s.nbytes for s in self.scales) \
+            + sum(b.nbytes for b in self.biases)
+
+    def _alloc(self, n, dtype):
+        ws = super()._alloc(n, np.float32)
+        ws["q"] = [np.empty((n, w.shape[0]), np.float32) for w in self.weights]
+        ws["s"] = [np.empty((n, 1), np.float32) for _ in self.weights]
+        return ws
+
+    def _layer(self, i, a, ws):
+        out = ws["out"][i]
+        q, s = ws["q"][i], ws["s"][i]
+        if i == 0:
+            np.multiply(a, self.scales[0], out=q)
+            np.matmul(q, self.weights[0], out=out)
+            out += self.biases[0]
+            return out
+        # per-row input scale, then the input rounded to int8 steps
+        np.abs(a, out=q)
+        np.max(q, axis=1, keepdims=True, out=s)
+        s *= 1 / 127
+        np.maximum(s, np.finfo(np.float32).tiny, out=s)
+        np.divide(a, s, out=q)
+        np.rint(q, out=q)
+        np.matmul(q, self.weights[i], out=out)
+        s *= self.scales[i]
+        out *= s
+        out += self.biases[i]
+        return out
+
+
+def compile_mlp(model):
+    """
+    model: fitted sklearn MLPClassifier
+    returns an MLPForward with the same predict_proba
+    """
+    return MLPForward(model.coefs_, model.intercepts_, model.activation,
+                      model.out_activation_, model.classes_)
+
+
+def quantize_mlp(model):
+    """fitted MLPClassifier or MLPForward -> QuantizedMLP"""
+    if not isinstance(model, MLPForward):
+        model = compile_mlp(model)
+    return QuantizedMLP.from_float(model)
@@ -0,0 +1,348 @@
+# single-file model bundle: weights, preprocessing, schema and labels
+
+# every interpreter used to joblib.load three pickles at startup
+# (gesture_model.pkl, scaler.pkl, label_encoder.pkl), which pulls in sklearn
+# and only works with a matching sklearn version. export() turns them into one
+# file that needs nothing but NumPy to read:
+#
+#   magic   b"GLOVEBND"                        8 bytes
+#   version uint32 little endian               4 bytes
+#   length  uint32 little endian               4 bytes   (of the JSON header)
+#   header  JSON, utf-8                                  (kind, classes, features,
+#                                                         array offsets, sources)
+#   arrays  raw little endian arrays, each 64-byte aligned
+#
+# load_bundle() memory-maps the file, so arrays are paged in only when the
+# model touches them and nothing is unpickled. the header keeps the sha1 of
+# every source pickle: load_current_bundle() (what the interpreters and
+# gesturePipeline use) skips a bundle whose pickles were retrained since, so
+# the old workflow of only writing gesture_model.pkl / scaler.pkl still works.
+#
+# usage:
+#   python machine_learning/modelBundle.py export --variant all     # writes <interpreter dir>/model.bundle
+#   python machine_learning/modelBundle.py export --variant mlp --int8
+#   python machine_learning/modelBundle.py info "machine_learning/Interpreter/model.bundle"
+
+import os
+import sys
+import json
+import time
+import struct
+import hashlib
+import argparse
+
+import numpy as np
+
+from fusedPreprocess import FusedPreprocessor
+
+MAGIC = b"GLOVEBND"
+FORMAT_VERSION = 1
+ALIGN = 64
+BUNDLE_NAME = "model.bundle"
+_PREFIX = struct.Struct("<8sII")
+
+
+class ClassLabels:
+    """stands in for the LabelEncoder: classes_ and inverse_transform"""
+
+    def __init__(self, classes):
+        self.classes_ = np.asarray(classes)
+
+    def inverse_transform(self, idx):
+        return self.classes_.take(np.asarray(idx, dtype=np.int64))
+
+
+class ModelBundle:
+    """
+    header    : the JSON header (dict)
+    model     : CompiledForest or MLPForward, with predict_proba
+    preprocess: FusedPreprocessor or None (raw values go straight to the model)
+    encoder   : ClassLabels (encoder.classes_ like the pickled LabelEncoder)
+    features  : feature names in input order
+    """
+
+    def __init__(self, path, header, model, preprocess, classes, features):
+        self.path = path
+        self.header = header
+        self.model = model
+        self.preprocess = preprocess
+        self.encoder = ClassLabels(classes)
+        self.classes = self.encoder.classes_
+        self.features = features
+
+    @property
+    def kind(self):
+        return self.header["kind"]
+
+
+# ── raw format ───────────────────────────────────────────────────────────────
+def _pad(n):
+    return -n % ALIGN
+
+
+def write_bundle(path, header, arrays):
+    """
+    header: JSON-serializable dict (an "arrays" table is added)
+    arrays: {name: ndarray}, written C-contiguous little endian
+    """
+    arrays = {k: np.ascontiguousarray(v) for k, v in arrays.items()}
+    table, offset = {}, 0
+    for name, a in arrays.items():
+        a = a.astype(a.dtype.newbyteorder("<"), copy=False)
+        arrays[name] = a
+        table[name] = {"dtype": a.dtype.str, "shape": list(a.shape), "offset": offset}
+        offset += a.nbytes + _pad(a.nbytes)
+
+    header = dict(header, format=FORMAT_VERSION, arrays=table)
+    blob = json.dumps(header, indent=1).encode("utf-8")
+    # offsets in the table are relative to the (aligned) end of the header
+    blob += b" " * _pad(_PREFIX.size + len(blob))
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, len(blob)))
+        f.write(blob)
+        for a in arrays.values():
+            f.write(a.tobytes())
+            f.write(b"\0" * _pad(a.nbytes))
+    os.replace(tmp, path)
+
+
+def read_bundle(path, mmap=True):
+    """returns (header, {name: array}); arrays are read-only memmap views when mmap=True"""
+    with open(path, "rb") as f:
+        prefix = f.read(_PREFIX.size)
+        if len(prefix) < _PREFIX.size:
+            raise ValueError(f"{path}: not a model bundle (file too short)")
+        magic, version, length = _PREFIX.unpack(prefix)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a model bundle (bad magic {magic!r})")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"{path}: bundle format {version} is newer than this "
+                             f"reader ({FORMAT_VERSION}); update modelBundle.py")
+        header = json.loads(f.read(length))
+        data_start = _PREFIX.size + length
+        if not mmap:
+            raw = f.read()
+
+    if mmap:
+        size = os.path.getsize(path) - data_start
+        raw = np.memmap(path, dtype=np.uint8, mode="r", offset=data_start, shape=(size,)) \
+            if size else np.zeros(0, dtype=np.uint8)
+    else:
+        raw = np.frombuffer(raw, dtype=np.uint8)
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        start = spec["offset"]
+        arrays[name] = raw[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+    return header, arrays
+
+
+# ── load ─────────────────────────────────────────────────────────────────────
+def load_bundle(path, mmap=True):
+    """path: model.bundle written by export(); returns a ModelBundle"""
+    header, arrays = read_bundle(path, mmap)
+
+    if header["kind"] == "forest":
+        from forestEngine import CompiledForest
+        m = header["model"]
+        model = CompiledForest(arrays["children"], arrays["feature"], arrays["threshold"],
+                               arrays["value"], arrays["roots"], m["max_depth"],
+                               m["n_features_in"], arrays["model_classes"])
+    elif header["kind"] == "mlp":
+        from mlpEngine import MLPForward, QuantizedMLP
+        m = header["model"]
+        n = m["n_layers"]
+        weights = [arrays[f"W{i}"] for i in range(n)]
+        biases = [arrays[f"b{i}"] for i in range(n)]
+        if m.get("quantized") == "int8":
+            model = QuantizedMLP(weights, [arrays[f"S{i}"] for i in range(n)], biases,
+                                 m["activation"], m["out_activation"], arrays["model_classes"])
+        else:
+            model = MLPForward(weights, biases, m["activation"], m["out_activation"],
+                               arrays["model_classes"])
+    else:
+        raise ValueError(f"{path}: unknown model kind {header['kind']!r}")
+
+    preprocess = None
+    if "pre_scale" in arrays:
+        preprocess = FusedPreprocessor(arrays["pre_scale"], arrays["pre_offset"])
+    if header.get("temporal"):
+        # trained on sliding-window features: frames go through TemporalFeatures first
+        from temporalFeatures import TemporalPreprocessor
+        preprocess = TemporalPreprocessor(header["temporal"]["window"], preprocess)
+
+    return ModelBundle(path, header, model, preprocess, header["classes"], header["features"])
+
+
+# ── export ───────────────────────────────────────────────────────────────────
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def export(artifact_dir, out_path=None, scaler=True, normalize=False, features=None, extra=None,
+           int8=False):
+    """
+    artifact_dir: folder with gesture_model.pkl / label_encoder.pkl (/ scaler.pkl)
+    scaler      : fold scaler.pkl into the bundle's preprocessing
+    normalize   : fold the normalize() step (flex 100/700, IMU -1/2) in first
+    features    : feature names, when they aren't the 8 channels
+    extra       : more header keys (e.g. "temporal" from trainModels.py)
+    int8        : MLP weights as int8 + one scale per layer (mlpEngine.QuantizedMLP)
+    returns the path written (default <artifact_dir>/model.bundle)
+    """
+    import warnings
+    import joblib
+    import sklearn
+    from fusedPreprocess import FLEX_MIN, FLEX_RANGE, IMU_MIN, IMU_RANGE
+
+    out_path = out_path or os.path.join(artifact_dir, BUNDLE_NAME)
+    sources = {name: os.path.join(artifact_dir, name)
+               for name in ("gesture_model.pkl", "label_encoder.pkl", "scaler.pkl")
+               if name != "scaler.pkl" or scaler}
+
+    with warnings.catch_warnings():
+        # pickles were written by another sklearn version
+        warnings.simplefilter("ignore", UserWarning)
+        model   = joblib.load(sources["gesture_model.pkl"])
+        encoder = joblib.load(sources["label_encoder.pkl"])
+        sk_scaler = joblib.load(sources["scaler.pkl"]) if scaler else None
+
+    n_features = int(model.n_features_in_)
+    if sk_scaler is not None and hasattr(sk_scaler, "feature_names_in_"):
+        features = [str(f) for f in sk_scaler.feature_names_in_]
+    features = features or ["F1", "F2", "F3", "F4", "F5", "X", "Y", "Z"][:n_features]
+
+    arrays = {}
+    if hasattr(model, "estimators_"):
+        from forestEngine import compile_forest
+        f = compile_forest(model)
+        kind = "forest"
+        info = {"type": type(model).__name__, "n_trees": f.n_trees, "max_depth": f.max_depth,
+                "n_features_in": f.n_features_in_, "n_nodes": len(f.feature)}
+        arrays.update(children=f.children, feature=f.feature, threshold=f.threshold,
+                      value=f.value, roots=f.roots)
+    elif hasattr(model, "coefs_"):
+        kind = "mlp"
+        info = {"type": type(model).__name__, "n_layers": len(model.coefs_),
+                "hidden_layer_sizes": [int(w.shape[1]) for w in model.coefs_[:-1]],
+                "activation": model.activation, "out_activation": model.out_activation_,
+                "n_features_in": n_features}
+        weights = model.coefs_
+        if int8:
+            from mlpEngine import quantize_mlp
+            q = quantize_mlp(model)
+            weights = q.qweights
+            arrays.update({f"S{i}": scale for i, scale in enumerate(q.scales)})
+            info["quantized"] = "int8"
+        for i, (w, b) in enumerate(zip(weights, model.intercepts_)):
+            arrays[f"W{i}"], arrays[f"b{i}"] = w, b
+    else:
+        raise TypeError(f"don't know how to bundle a {type(model).__name__}")
+    if int8 and kind != "mlp":
+        print(f"⚠️  --int8 is for MLP models, {os.path.basename(out_path)} keeps float {kind} arrays")
+    arrays["model_classes"] = np.asarray(model.classes_)
+
+    preprocessing = {"normalize": None, "scaler": None}
+    if normalize or sk_scaler is not None:
+        norm_min = norm_range = None
+        if normalize:
+            norm_min   = [FLEX_MIN] * 5 + [IMU_MIN] * 3
+            norm_range = [FLEX_RANGE] * 5 + [IMU_RANGE] * 3
+            preprocessing["normalize"] = {"min": norm_min, "range": norm_range}
+        if sk_scaler is not None:
+            preprocessing["scaler"] = {"type": type(sk_scaler).__name__,
+                                       "scale_": sk_scaler.scale_.tolist(),
+                                       "min_": sk_scaler.min_.tolist()}
+        fused = FusedPreprocessor.from_scaler(sk_scaler, norm_min, norm_range, n_features)
+        arrays["pre_scale"], arrays["pre_offset"] = fused.scale[0], fused.offset[0]
+
+    header = {
+        "kind": kind,
+        "model": info,
+        "classes": [str(c) for c in encoder.classes_],
+        "features": features,
+        "preprocessing": preprocessing,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "sklearn": sklearn.__version__,
+        "sources": {name: file_sha1(p) for name, p in sources.items()},
+    }
+    header.update(extra or {})
+    write_bundle(out_path, header, arrays)
+    return out_path
+
+
+def stale_sources(bundle):
+    """names of the source pickles that changed since the bundle was exported"""
+    base = os.path.dirname(os.path.abspath(bundle.path))
+    changed = []
+    for name, sha in bundle.header.get("sources", {}).items():
+        p = os.path.join(base, name)
+        if os.path.exists(p) and file_sha1(p) != sha:
+            changed.append(name)
+    return changed
+
+
+def load_current_bundle(path, mmap=True):
+    """
+    load_bundle(path) for the interpreters: None when there is no bundle, or
+    when a source pickle was retrained after the export (the caller then
+    loads the pickles, so a stale bundle is never served)
+    """
+    if not os.path.exists(path):
+        return None
+    bundle = load_bundle(path, mmap)
+    changed = stale_sources(bundle)
+    if changed:
+        print(f"⚠️  {path} is older than {', '.join(changed)}, using the pickles "
+              f"(re-export: python machine_learning/modelBundle.py export)")
+        return None
+    return bundle
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Export / inspect single-file model bundles")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    ex = sub.add_parser("export", help="write model.bundle from the pickles")
+    ex.add_argument("--variant", default="all", help="rf_scaler, rf_raw, mlp or all")
+    ex.add_argument("--dir", help="artifact folder (overrides the variant's folder)")
+    ex.add_argument("--out", help="output path (default <dir>/model.bundle)")
+    ex.add_argument("--int8", action="store_true", help="int8 MLP weights (4x smaller, see mlpEngine.py)")
+
+    inf = sub.add_parser("info", help="print a bundle's header")
+    inf.add_argument("path")
+
+    args = ap.parse_args()
+
+    if args.cmd == "info":
+        bundle = load_bundle(args.path)
+        h = dict(bundle.header)
+        h.pop("arrays")
+        print(json.dumps(h, indent=2))
+        print(f"arrays: {', '.join(bundle.header['arrays'])}")
+        changed = stale_sources(bundle)
+        print(f"⚠️  out of date, re-export: {changed} changed" if changed else "✅ matches the pickles")
+        return 0
+
+    from gesturePipeline import VARIANTS, variant_dir
+    variants = list(VARIANTS) if args.variant == "all" else args.variant.split(",")
+    for v in variants:
+        cfg = VARIANTS[v]
+        d = args.dir or variant_dir(v)
+        t0 = time.perf_counter()
+        path = export(d, args.out, scaler=cfg["scaler"], normalize=cfg["normalize"], int8=args.int8)
+        print(f"📦 {v:<10} -> {path}  ({os.path.getsize(path) / 1024:.0f} KiB, "
+              f"{time.perf_counter() - t0:.2f} s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+# model selection under a latency / memory budget
+
+# trainModels.py picks the most accurate candidate, but the interpreters run
+# one predict per frame on a laptop (or smaller), so the cheapest model that is
+# accurate enough is usually the better choice. this script:
+#   1. cross-validates a shrinking ladder of every model kind (forests with
+#      fewer / shallower trees, MLPs with smaller layers, SVC) on the cached
+#      folds from trainModels.py, over the process pool
+#   2. measures each candidate the way the interpreters run it (FusedPreprocessor
+#      + CompiledForest / MLPForward, sklearn for SVC), one process at a time:
+#        single  p50 / p95 of one frame: preprocess + predict_proba + argmax
+#        batch   cost per frame of a 64-frame predict_proba
+#        memory  bytes of the runtime model (pickle size for SVC)
+#   3. prints a table with the Pareto front (★: nothing else is at least as
+#      accurate, as fast and as small) and exports the most accurate candidate
+#      within the budget, with --tolerance preferring a cheaper one that is
+#      nearly as accurate
+#
+# usage:
+#   python machine_learning/modelSelection.py --variant rf_scaler --budget-us 200
+#   python machine_learning/modelSelection.py --variant mlp --budget-us 100 --budget-kb 64 --install
+#   python machine_learning/modelSelection.py --variant rf_raw --dry-run     # table only
+
+import os
+import sys
+import json
+import time
+import pickle
+import argparse
+
+import numpy as np
+
+from datasetCache import load_dataset
+from gesturePipeline import VARIANTS, variant_dir
+from trainModels import (INSTALLABLE, MODELS_DIR, TRAIN_DEFAULTS, build_folds, candidates, describe,
+                         fit_preprocessing, installable, model_input, run_grid, write_artifacts)
+
+# from the largest model down; every point is one candidate
+LADDERS = {
+    "rf":          {"n_estimators": [200, 100, 50, 25, 10, 5], "max_depth": [None, 12, 8, 6, 4]},
+    "extra_trees": {"n_estimators": [200, 100, 50, 25, 10, 5], "max_depth": [None, 12, 8, 6, 4]},
+    "mlp":         {"hidden_layer_sizes": [(128, 64), (64, 32), (64,), (32,), (16,), (8,)]},
+    "svc":         {"C": [1.0, 10.0], "gamma": ["scale"]},
+}
+BATCH = 64
+
+
+def runtime_model(fitted):
+    """what an interpreter would run for this fitted sklearn model"""
+    if hasattr(fitted, "estimators_") and hasattr(fitted.estimators_[0], "tree_"):
+        from forestEngine import compile_forest
+        return compile_forest(fitted)
+    if hasattr(fitted, "coefs_"):
+        from mlpEngine import compile_mlp
+        return compile_mlp(fitted)
+    return fitted
+
+
+def model_size(fitted, engine):
+    """(bytes, short description)"""
+    if hasattr(engine, "roots"):
+        return engine.nbytes, f"{engine.n_trees} trees, depth {engine.max_depth}"
+    if hasattr(engine, "weights"):
+        return engine.nbytes, "layers " + "-".join(str(w.shape[1]) for w in engine.weights[:-1])
+    svc = getattr(fitted, "calibrated_classifiers_", [None])[0]
+    n_sv = len(svc.estimator.support_) if svc is not None else 0
+    return len(pickle.dumps(fitted)), f"{n_sv} support vectors"
+
+
+def measure(engine, preprocess, rows, repeats=1000, warmup=50):
+    """single-frame p50 / p95 and batched per-frame cost, in microseconds"""
+    n = len(rows)
+    single = np.empty(repeats)
+    for i in range(-warmup, repeats):
+        x = rows[i % n]
+        t = time.perf_counter_ns()
+        X = preprocess.transform_frame(x) if preprocess is not None else x.reshape(1, -1)
+        int(np.argmax(engine.predict_proba(X)[0]))
+        if i >= 0:
+            single[i] = time.perf_counter_ns() - t
+
+    batches = max(repeats // BATCH, 10)
+    t = time.perf_counter_ns()
+    for i in range(batches):
+        X = rows.take(np.arange(i * BATCH, (i + 1) * BATCH) % n, axis=0)
+        if preprocess is not None:
+            X = preprocess.transform(X)
+        np.argmax(engine.predict_proba(X), axis=1)
+    batch = (time.perf_counter_ns() - t) / (batches * BATCH)
+
+    p50, p95 = np.percentile(single, [50, 95]) / 1e3
+    return float(p50), float(p95), batch / 1e3
+
+
+def pareto(rows):
+    """indices nobody beats on accuracy, p95 latency and memory at once"""
+    front = []
+    for i, a in enumerate(rows):
+        dominated = any(
+            b["accuracy"] >= a["accuracy"] and b["p95_us"] <= a["p95_us"] and b["bytes"] <= a["bytes"]
+            and (b["accuracy"] > a["accuracy"] or b["p95_us"] < a["p95_us"] or b["bytes"] < a["bytes"])
+            for j, b in enumerate(rows) if j != i)
+        if not dominated:
+            front.append(i)
+    return front
+
+
+def choose(rows, budget_us=None, budget_kb=None, tolerance=0.0, allowed=None):
+    """
+    most accurate row within the budgets; with tolerance, the fastest row whose
+    accuracy is within `tolerance` of that. returns an index or None
+    allowed: allowed(row) -> False leaves the row out (e.g. not installable)
+    """
+    ok = [i for i, r in enumerate(rows)
+          if (allowed is None or allowed(r))
+          and (budget_us is None or r["p95_us"] <= budget_us)
+          and (budget_kb is None or r["bytes"] <= budget_kb * 1024)]
+    if not ok:
+        return None
+    best = max(rows[i]["accuracy"] for i in ok)
+    near = [i for i in ok if rows[i]["accuracy"] >= best - tolerance - 1e-12]
+    return min(near, key=lambda i: (rows[i]["p95_us"], -rows[i]["accuracy"], rows[i]["bytes"]))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Accuracy vs inference cost, with a latency budget")
+    ap.add_argument("--variant", default="rf_scaler", choices=list(VARIANTS))
+    ap.add_argument("--models", default="rf,svc,mlp", help=f"comma separated from {', '.join(LADDERS)}")
+    ap.add_argument("--sources", help="dataset sources (default per variant)")
+    ap.add_argument("--classes", help="comma separated labels (default per variant, 'all' for all)")
+    ap.add_argument("--folds", type=int, default=5)
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="worker processes for CV")
+    ap.add_argument("--temporal", type=int, help="sliding-window features over N frames")
+    ap.add_argument("--budget-us", type=float, help="p95 single-frame latency budget (µs)")
+    ap.add_argument("--budget-kb", type=float, help="model memory budget (KiB)")
+    ap.add_argument("--tolerance", type=float, default=0.0,
+                    help="accuracy a cheaper model may lose (e.g. 0.005)")
+    ap.add_argument("--repeats", type=int, default=1000, help="timed single-frame calls per candidate")
+    ap.add_argument("--out", help="artifact folder (default models/<variant>/)")
+    ap.add_argument("--install", action="store_true", help="write into the interpreter folder")
+    ap.add_argument("--dry-run", action="store_true", help="print the table, export nothing")
+    args = ap.parse_args()
+
+    defaults = TRAIN_DEFAULTS[args.variant]
+    sources = (args.sources or defaults["sources"]).split(",")
+    classes = args.classes or defaults["classes"]
+    models = args.models.split(",")
+    if args.install and not any(installable(args.variant, m) for m in models):
+        print(f"❌ not installing: the {args.variant} interpreters only run "
+              f"{', '.join(INSTALLABLE[args.variant])} models, use --out for {', '.join(models)}")
+        return 1
+    ds = load_dataset().select(sources=sources,
+                               classes=None if classes in (None, "all") else classes.split(","))
+    folder, _ = build_folds(ds, args.variant, args.folds, temporal=args.temporal)
+    cands = candidates(models, LADDERS)
+    print(f"📦 {len(ds)} rows, {len(ds.classes)} classes; {len(cands)} candidates x "
+          f"{args.folds} folds on {args.jobs} process(es)")
+
+    t0 = time.perf_counter()
+    results, wall = run_grid(folder, cands, args.folds, args.jobs, keep_fold=0)
+    print(f"⏱  cross-validation {wall:.1f} s; timing each candidate ({args.repeats} frames)...")
+
+    # latency is measured here, one candidate at a time, so workers don't skew it
+    _, preprocess = fit_preprocessing(args.variant, model_input(ds, args.temporal), args.temporal)
+    if args.temporal:
+        from temporalFeatures import TemporalPreprocessor
+        preprocess = TemporalPreprocessor(args.temporal, preprocess)
+    frames = np.array(ds.X, dtype=np.float32)
+    rows = []
+    for (name, params), r in zip(cands, results):
+        fitted = r.pop("fitted")
+        engine = runtime_model(fitted)
+        p50, p95, batch = measure(engine, preprocess, frames, args.repeats)
+        nbytes, size = model_size(fitted, engine)
+        rows.append(dict(r, p50_us=p50, p95_us=p95, batch_us=batch, bytes=nbytes, size=size))
+    print(f"   done in {time.perf_counter() - t0:.1f} s\n")
+
+    front = set(pareto(rows))
+    # --install only picks from the models the variant's interpreters can run
+    allowed = (lambda r: installable(args.variant, r["model"])) if args.install else None
+    pick = choose(rows, args.budget_us, args.budget_kb, args.tolerance, allowed)
+    order = sorted(range(len(rows)), key=lambda i: (rows[i]["p95_us"], -rows[i]["accuracy"]))
+    print(f"   {'candidate':<48} {'accuracy':>14} {'p50 µs':>8} {'p95 µs':>8} "
+          f"{'batch µs':>9} {'KiB':>8}  size")
+    for i in order:
+        r = rows[i]
+        over = (args.budget_us is not None and r["p95_us"] > args.budget_us) or \
+               (args.budget_kb is not None and r["bytes"] > args.budget_kb * 1024)
+        mark = "👉" if i == pick else ("★ " if i in front else "  ")
+        note = "  (over budget)" if over else ""
+        if allowed is not None and not allowed(r):
+            note += f"  (not installable for {args.variant})"
+        print(f"{mark} {describe(r['model'], r['params']):<48} {r['accuracy']:>7.4f} ±{r['std']:.3f} "
+              f"{r['p50_us']:>8.1f} {r['p95_us']:>8.1f} {r['batch_us']:>9.2f} "
+              f"{r['bytes'] / 1024:>8.1f}  {r['size']}{note}")
+    print("\n★ Pareto front (accuracy / p95 latency / memory)")
+
+    if pick is None:
+        only = f" among the {', '.join(INSTALLABLE[args.variant])} models" if allowed else ""
+        print(f"❌ nothing{only} meets the budget (p95 ≤ {args.budget_us} µs, ≤ {args.budget_kb} KiB)")
+        return 1
+    r = rows[pick]
+    print(f"👉 {describe(r['model'], r['params'])}: accuracy {r['accuracy']:.4f}, "
+          f"p95 {r['p95_us']:.1f} µs, {r['bytes'] / 1024:.1f} KiB")
+    if args.dry_run:
+        return 0
+
+    out_dir = variant_dir(args.variant) if args.install else \
+        (args.out or os.path.join(MODELS_DIR, args.variant))
+    written = write_artifacts(out_dir, args.variant, ds, r["model"], r["params"], args.temporal)
+    report = {
+        "variant": args.variant,
+        "selected": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "budget_us": args.budget_us,
+        "budget_kb": args.budget_kb,
+        "tolerance": args.tolerance,
+        "temporal": args.temporal,
+        "chosen": pick,
+        "pareto": sorted(front),
+        "candidates": rows,
+    }
+    with open(os.path.join(out_dir, "selection_report.json"), "w") as f:
+        json.dump(report, f, indent=1, default=str)
+    print(f"💾 {out_dir}: {', '.join(written + ['selection_report.json'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
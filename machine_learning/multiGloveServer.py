@@ -0,0 +1,375 @@
+# several gloves, one process, one model
+
+# every interpreter script serves one glove: its own process, its own copy of
+# the model and a blocking ser.readline(). this serves N serial ports (real
+# gloves or gloveSimulator.py ptys) from one asyncio loop:
+#   - each port is read as soon as it has bytes (loop.add_reader, or polling
+#     where the loop can't watch serial handles, e.g. Windows) and decoded with
+#     its own FrameDecoder (ASCII or binary frames)
+#   - decoded frames wait per glove; a single batcher takes what every glove
+#     has waiting (round robin, up to --max-batch frames) and scores it with ONE
+#     predict_proba on the shared model
+#   - preprocessing (GLOVE_ID calibration, temporal windows) and smoothing stay
+#     per glove, so gloves never see each other's state
+#   - per glove: frames/s, queue depth (now / max), frames dropped when the
+#     queue is full, decoder drops / malformed lines, latency from the bytes
+#     arriving to the smoothed result (p50 / p95), printed every --report-every
+#     seconds and available from MultiGloveServer.stats()
+#
+# usage:
+#   python machine_learning/multiGloveServer.py --variant rf_raw --port /dev/ttyUSB0 --port /dev/ttyUSB1=left01
+#       (PORT=GLOVE_ID applies that glove's calibration profile)
+#   python machine_learning/multiGloveServer.py --variant rf_scaler --simulate 8 --sim-rate 50
+#       (8 virtual gloves from gloveSimulator.py in this process)
+#
+# in code:
+#   server = MultiGloveServer(load_pipeline("rf_raw"), on_result=callback)
+#   server.add("/dev/ttyUSB0", glove="left01"); asyncio.run(server.run())
+#   callback(glove, label, score, gesture) is called whenever a glove's smoothed label changes
+#   on_frames(glove, values, gestures, confidences) gets every scored chunk (predictionStream.py)
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+from collections import deque
+
+import numpy as np
+
+from batchInference import BatchStats
+from calibration import apply_calibration, load_reference
+from frameProtocol import FrameDecoder
+from gesturePipeline import VARIANTS, load_pipeline, variant_dir
+from smoothing import make_smoother
+
+
+class Glove:
+    """one serial device: decoder, its own preprocessing / smoothing state and stats"""
+
+    def __init__(self, name, port, ser, preprocess, smoother, max_pending=1024):
+        self.name = name
+        self.port = port
+        self.ser = ser
+        self.preprocess = preprocess
+        self.smoother = smoother
+        self.decoder = FrameDecoder()
+        self.pending = deque()          # (frames (n, 8), t_arrival) waiting for the model
+        self.n_pending = 0
+        self.max_pending = max_pending
+        self.max_queue = 0
+        self.overflow = 0               # frames thrown away because the queue was full
+        self.read_errors = 0
+        self.stats = BatchStats()
+        self.label, self.score = "Unknown", 0.0
+        self.watched = False            # read through loop.add_reader (else polled)
+
+    def feed(self, data, t_arrival):
+        frames = self.decoder.feed(data)
+        if not len(frames):
+            return 0
+        self.pending.append((frames, t_arrival))
+        self.n_pending += len(frames)
+        # like FrameRing's drop-oldest: a stalled model never grows memory
+        while self.n_pending > self.max_pending and len(self.pending) > 1:
+            old, _ = self.pending.popleft()
+            self.n_pending -= len(old)
+            self.overflow += len(old)
+        self.max_queue = max(self.max_queue, self.n_pending)
+        return len(frames)
+
+    def summary(self):
+        s = self.stats.summary()
+        c = self.decoder.counters()
+        return {
+            "port": self.port,
+            "frames_per_s": s["frames_per_s"],
+            "latency_ms_p50": s["latency_ms_p50"],
+            "latency_ms_p95": s["latency_ms_p95"],
+            "frames_total": s["frames_total"],
+            "queue": self.n_pending,
+            "max_queue": self.max_queue,
+            "overflow": self.overflow,
+            "dropped": c["dropped"],
+            "malformed": c["malformed"],
+            "read_errors": self.read_errors,
+            "label": self.label,
+        }
+
+
+class MultiGloveServer:
+    """
+    pipeline    : GesturePipeline (load_pipeline), loaded once for every glove
+    smoothing   : smoothing.py name ("vote", "prob+hysteresis", ...), per glove
+    max_batch   : most frames in one predict_proba
+    batch_window: seconds to wait after the first frame so other gloves' frames
+                  join the same batch (0 = score whatever is waiting right away)
+    shared      : False scores every glove with its own predict_proba (what N
+                  interpreter processes do), for comparison
+    on_result   : callback(glove, label, score, gesture) on smoothed label changes
+    on_frames   : callback(glove, raw values (n, 8), gestures, confidences) per
+                  scored chunk, after smoothing (glove.label is up to date)
+    """
+
+    def __init__(self, pipeline, smoothing="vote", window=5, reference=None, baud=9600,
+                 max_batch=512, batch_window=0.002, max_pending=1024, poll_interval=0.002,
+                 shared=True, on_result=None, on_frames=None):
+        self.pipeline = pipeline
+        self.smoothing = smoothing
+        self.window = window
+        self.reference = reference
+        self.baud = baud
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.max_pending = max_pending
+        self.poll_interval = poll_interval
+        self.shared = shared
+        self.on_result = on_result
+        self.on_frames = on_frames
+        self.gloves = []
+        self.batches = BatchStats()     # batch sizes / latency over every glove
+        self.predict_calls = 0
+        self._next = 0                  # round robin start
+        self._wake = None
+        self._running = False
+
+    # ── devices ──────────────────────────────────────────────────────────────
+    def add(self, port, name=None, glove=None, ser=None):
+        """opens `port` (or uses an open `ser`); glove: calibration profile id"""
+        if ser is None:
+            import serial
+            ser = serial.Serial(port, self.baud, timeout=0)
+        preprocess = self.pipeline.preprocess
+        if hasattr(preprocess, "copy"):
+            preprocess = preprocess.copy()          # temporal window: one per glove
+        preprocess = apply_calibration(preprocess, glove, self.reference)
+        smoother = make_smoother(self.smoothing, classes=self.pipeline.classes, window=self.window)
+        g = Glove(name or f"glove{len(self.gloves)}", port, ser, preprocess, smoother, self.max_pending)
+        self.gloves.append(g)
+        return g
+
+    def _read(self, g):
+        try:
+            data = g.ser.read(g.ser.in_waiting or 1)
+        except Exception:
+            g.read_errors += 1
+            return
+        if data and g.feed(data, time.perf_counter()):
+            self._wake.set()
+
+    async def _poll(self, g):
+        while self._running:
+            if g.ser.in_waiting:
+                self._read(g)
+                await asyncio.sleep(0)
+            else:
+                await asyncio.sleep(self.poll_interval)
+
+    # ── scoring ──────────────────────────────────────────────────────────────
+    def _take(self):
+        """(glove, raw frames, model input, t_arrival) chunks, round robin over the gloves"""
+        taken, n = [], 0
+        count = len(self.gloves)
+        for k in range(count):
+            g = self.gloves[(self._next + k) % count]
+            while g.pending and n < self.max_batch:
+                frames, t = g.pending.popleft()
+                g.n_pending -= len(frames)
+                raw = frames
+                if g.preprocess is not None:
+                    # FusedPreprocessor works in place, keep the values if someone wants them
+                    X = g.preprocess.transform(frames.copy() if self.on_frames else frames)
+                else:
+                    X = frames
+                taken.append((g, raw, X, t))
+                n += len(frames)
+        self._next = (self._next + 1) % max(count, 1)
+        return taken
+
+    def _score(self):
+        taken = self._take()
+        if not taken:
+            return
+        if self.shared:
+            probs = self.pipeline.model.predict_proba(np.concatenate([X for _, _, X, _ in taken]))
+            self.predict_calls += 1
+        else:
+            probs = np.concatenate([self.pipeline.model.predict_proba(X) for _, _, X, _ in taken])
+            self.predict_calls += len(taken)
+        names, conf = self.pipeline.decide(probs)
+
+        t_done = time.perf_counter()
+        i = 0
+        for g, raw, _, t in taken:
+            n = len(raw)
+            for j in range(i, i + n):
+                label, score = g.smoother.update(names[j], probs[j])
+                if label != g.label and self.on_result is not None:
+                    self.on_result(g, label, score, names[j])
+                g.label, g.score = label, score
+            if self.on_frames is not None:
+                self.on_frames(g, raw, names[i:i + n], conf[i:i + n])
+            g.stats.record([t] * n, t_done)
+            i += n
+        self.batches.record([t for _, raw, _, t in taken for _ in range(len(raw))], t_done)
+
+    async def _batcher(self):
+        while self._running:
+            await self._wake.wait()
+            self._wake.clear()
+            if self.batch_window > 0:
+                await asyncio.sleep(self.batch_window)      # readers keep filling the queues
+            self._score()
+            if any(g.pending for g in self.gloves):
+                self._wake.set()                            # more than max_batch was waiting
+
+    # ── reporting ────────────────────────────────────────────────────────────
+    def stats(self):
+        b = self.batches.summary()
+        return {
+            "gloves": {g.name: g.summary() for g in self.gloves},
+            "frames_per_s": b["frames_per_s"],
+            "latency_ms_p50": b["latency_ms_p50"],
+            "latency_ms_p95": b["latency_ms_p95"],
+            "mean_batch": b["mean_batch"],
+            "predict_calls": self.predict_calls,
+        }
+
+    def report(self):
+        s = self.stats()
+        print(f"📊 {len(self.gloves)} gloves | {s['frames_per_s']:.0f} frames/s | "
+              f"latency p50 {s['latency_ms_p50']:.1f} ms p95 {s['latency_ms_p95']:.1f} ms | "
+              f"avg batch {s['mean_batch']:.1f}")
+        for name, g in s["gloves"].items():
+            print(f"   {name:<10} {g['frames_per_s']:>7.1f} f/s  p50 {g['latency_ms_p50']:>6.1f} ms  "
+                  f"p95 {g['latency_ms_p95']:>6.1f} ms  queue {g['queue']:>4} (max {g['max_queue']})  "
+                  f"lost {g['overflow'] + g['dropped']}  malformed {g['malformed']}  {g['label']}")
+        self.batches.reset_window()
+        for g in self.gloves:
+            g.stats.reset_window()
+
+    async def _reporter(self, every):
+        while self._running:
+            await asyncio.sleep(every)
+            self.report()
+
+    # ── main loop ────────────────────────────────────────────────────────────
+    async def run(self, duration=None, report_every=5.0):
+        """serves every added glove until stop() (or `duration` seconds)"""
+        loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._running = True
+        tasks = [asyncio.create_task(self._batcher())]
+        for g in self.gloves:
+            try:
+                loop.add_reader(g.ser.fileno(), self._read, g)
+                g.watched = True
+            except (NotImplementedError, AttributeError, OSError, ValueError):
+                tasks.append(asyncio.create_task(self._poll(g)))
+        if report_every:
+            tasks.append(asyncio.create_task(self._reporter(report_every)))
+        try:
+            if duration is None:
+                while self._running:
+                    await asyncio.sleep(0.1)
+            else:
+                await asyncio.sleep(duration)
+        finally:
+            self._running = False
+            for g in self.gloves:
+                if g.watched:
+                    loop.remove_reader(g.ser.fileno())
+                    g.watched = False
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._score()                                   # whatever was still queued
+
+    def stop(self):
+        self._running = False
+
+    def close(self):
+        for g in self.gloves:
+            g.ser.close()
+
+
+def add_arguments(ap):
+    """the model / glove / batching options, shared with predictionStream.py"""
+    ap.add_argument("--variant", default="rf_raw", choices=list(VARIANTS))
+    ap.add_argument("--artifacts", help="model folder (default: the variant's interpreter folder)")
+    ap.add_argument("--port", action="append", default=[], help="PORT or PORT=GLOVE_ID, repeatable")
+    ap.add_argument("--baud", type=int, default=9600)
+    ap.add_argument("--simulate", type=int, default=0, help="add N virtual gloves (gloveSimulator.py)")
+    ap.add_argument("--sim-rate", type=float, default=50.0, help="samples/s per virtual glove")
+    ap.add_argument("--binary", action="store_true", help="virtual gloves send binary frames")
+    ap.add_argument("--smoothing", help="smoothing.py method (default per variant)")
+    ap.add_argument("--window", type=int, default=5)
+    ap.add_argument("--threshold", type=float, default=0.75)
+    ap.add_argument("--max-batch", type=int, default=512)
+    ap.add_argument("--batch-window", type=float, default=2.0, help="ms to wait for other gloves")
+    ap.add_argument("--per-glove", action="store_true", help="one predict_proba per glove (no sharing)")
+    ap.add_argument("--duration", type=float, help="stop after N seconds")
+    ap.add_argument("--report-every", type=float, default=5.0)
+
+
+def from_args(args, **callbacks):
+    """
+    MultiGloveServer with every --port / --simulate glove added
+    returns (server, simulators to stop() when done)
+    """
+    artifact_dir = args.artifacts or variant_dir(args.variant)
+    pipeline = load_pipeline(args.variant, artifact_dir, threshold=args.threshold)
+    server = MultiGloveServer(
+        pipeline, smoothing=args.smoothing or VARIANTS[args.variant]["smoothing"],
+        window=args.window, reference=load_reference(artifact_dir), baud=args.baud,
+        max_batch=args.max_batch, batch_window=args.batch_window / 1000.0,
+        shared=not args.per_glove, **callbacks)
+
+    for spec in args.port:
+        port, _, glove = spec.partition("=")
+        server.add(port, glove=glove or None)
+    sims = []
+    if args.simulate:
+        from gloveSimulator import GloveSimulator, load_recordings
+        recordings = load_recordings()
+        for i in range(args.simulate):
+            sim = GloveSimulator(rate=args.sim_rate, binary=args.binary, seed=i, recordings=recordings)
+            sims.append(sim)
+            server.add(sim.start(), name=f"sim{i}")
+    print(f"🧤 {len(server.gloves)} gloves on one {args.variant} model "
+          f"({'shared' if server.shared else 'per-glove'} batches)")
+    return server, sims
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve several gloves with one shared model")
+    add_arguments(ap)
+    ap.add_argument("--stats-json", help="write the final per-glove stats here")
+    ap.add_argument("--quiet", action="store_true", help="don't print label changes")
+    args = ap.parse_args()
+    if not args.port and not args.simulate:
+        ap.error("give at least one --port or --simulate N")
+
+    def on_result(g, label, score, gesture):
+        if not args.quiet and label not in ("Unknown", "Error"):
+            print(f"✅ {g.name}: {label} ({score:.2f})")
+
+    server, sims = from_args(args, on_result=on_result)
+
+    try:
+        asyncio.run(server.run(args.duration, args.report_every))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for sim in sims:
+            sim.stop()
+        server.close()
+    server.report()
+    if args.stats_json:
+        with open(args.stats_json, "w") as f:
+            json.dump(server.stats(), f, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
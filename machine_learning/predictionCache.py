@@ -0,0 +1,172 @@
+# LRU cache of predictions for repeated frames
+
+# a held sign sends nearly the same frame again and again, and every one ran
+# the whole model. PredictionCache sits in front of "raw frame ->
+# predict_proba": the 8 raw values are rounded to a step per channel and the
+# rounded ints are the key. the default steps (1 for the 10-bit flex
+# readings, 0.01 for accel) are the resolution the firmware sends, so a hit
+# returns exactly what the model would; coarser steps (e.g. 4 and 0.25)
+# trade some accuracy for more hits (benchmarks/predictionCacheBenchmark.py
+# prints hit rate against agreement for a few).
+#
+#   bounded     at most maxsize entries, least recently used goes first
+#   stats()     hits, misses, evictions, hit_rate, eviction_rate (share of
+#               misses that pushed an entry out), invalidations
+#   watch       the model files (model.bundle, gesture_model.pkl, scaler.pkl,
+#               ...): when one changes (mtime or size, checked at most every
+#               check_every seconds) the cache is cleared
+#
+# models on temporal features are never cached: their output depends on the
+# frames before, not on this one.
+#
+# usage (interpreters, off by default):
+#   GLOVE_CACHE=4096 python "machine_learning/working interpreter/New_Interpreter1.py"
+#   GLOVE_CACHE=4096 GLOVE_CACHE_STEP=4,0.25 ...      (flex step, accel step; or 8 steps)
+#
+#   cache = cache_from_env(BASE_DIR, preprocess)      # None when GLOVE_CACHE is unset
+#   key, probs = cache.lookup(raw_values)
+#   if probs is None:
+#       probs = model.predict_proba(...); cache.store(key, probs)
+
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from temporalFeatures import TemporalPreprocessor
+
+N_VALUES = 8
+N_FLEX = 5
+DEFAULT_STEPS = (1.0,) * N_FLEX + (0.01,) * (N_VALUES - N_FLEX)
+ARTIFACTS = ("model.bundle", "gesture_model.pkl", "label_encoder.pkl", "scaler.pkl",
+             "calibration_reference.json", "cascade.bundle")
+
+
+def parse_steps(text):
+    """"4,0.25" (flex, accel) or 8 comma separated steps -> tuple of 8"""
+    steps = [float(v) for v in text.split(",")]
+    if len(steps) == 2:
+        steps = [steps[0]] * N_FLEX + [steps[1]] * (N_VALUES - N_FLEX)
+    if len(steps) != N_VALUES or min(steps) <= 0:
+        raise ValueError(f"cache steps must be 2 or {N_VALUES} positive numbers, got {text!r}")
+    return tuple(steps)
+
+
+class PredictionCache:
+    """
+    maxsize    : most cached frames
+    steps      : quantization step per channel (DEFAULT_STEPS = firmware resolution)
+    watch      : files whose change clears the cache (see artifact_paths)
+    check_every: seconds between stat() calls on the watched files
+    """
+
+    def __init__(self, maxsize=4096, steps=DEFAULT_STEPS, watch=(), check_every=1.0):
+        self.maxsize = int(maxsize)
+        self.steps = tuple(float(s) for s in steps)
+        self.inv_steps = 1.0 / np.asarray(self.steps, dtype=np.float64)
+        self.entries = OrderedDict()          # key bytes -> read-only probabilities
+        self.watch = list(watch)
+        self.check_every = check_every
+        self.fingerprint = self._fingerprint()
+        self.next_check = time.monotonic() + check_every
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def key(self, raw_values):
+        q = np.rint(np.asarray(raw_values, dtype=np.float64).reshape(-1) * self.inv_steps)
+        return q.astype(np.int64).tobytes()
+
+    def lookup(self, raw_values):
+        """(key, cached probabilities or None); pass the key to store() on a miss"""
+        if self.watch and time.monotonic() >= self.next_check:
+            self.check()
+        key = self.key(raw_values)
+        probs = self.entries.get(key)
+        if probs is None:
+            self.misses += 1
+            return key, None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return key, probs
+
+    def store(self, key, probs):
+        """keeps a read-only copy of probs, returns it"""
+        probs = np.array(probs)
+        probs.flags.writeable = False
+        self.entries[key] = probs
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return probs
+
+    def predict_proba(self, raw_values, predict):
+        """predict(raw_values) -> probabilities, skipped on a hit"""
+        key, probs = self.lookup(raw_values)
+        return probs if probs is not None else self.store(key, predict(raw_values))
+
+    # ── invalidation ──
+    def _fingerprint(self):
+        return fingerprint(self.watch)
+
+    def check(self):
+        """clears the cache if a watched file changed; True if it did"""
+        self.next_check = time.monotonic() + self.check_every
+        fingerprint = self._fingerprint()
+        if fingerprint == self.fingerprint:
+            return False
+        self.fingerprint = fingerprint
+        self.invalidate()
+        return True
+
+    def invalidate(self):
+        self.entries.clear()
+        self.invalidations += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "eviction_rate": self.evictions / self.misses if self.misses else 0.0,
+        }
+
+
+def fingerprint(paths):
+    """(mtime, size) per file, None for a missing one"""
+    out = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            out.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            out.append(None)
+    return out
+
+
+def artifact_paths(model_dir):
+    """the files a model folder's predictions depend on (missing ones too: appearing counts)"""
+    return [os.path.join(model_dir, name) for name in ARTIFACTS]
+
+
+def cache_from_env(model_dir, preprocess=None):
+    """
+    the interpreters' cache: GLOVE_CACHE=<max entries> turns it on,
+    GLOVE_CACHE_STEP=<flex>,<accel> (or 8 steps) sets the quantization
+    returns None when it is off or the model uses temporal features
+    """
+    size = int(os.environ.get("GLOVE_CACHE") or 0)
+    if size <= 0:
+        return None
+    if isinstance(preprocess, TemporalPreprocessor):
+        print("⚠️  GLOVE_CACHE ignored: this model uses temporal features")
+        return None
+    step = os.environ.get("GLOVE_CACHE_STEP")
+    cache = PredictionCache(size, parse_steps(step) if step else DEFAULT_STEPS,
+                            watch=artifact_paths(model_dir))
+    print(f"🗃  prediction cache: {size} frames, steps {cache.steps}")
+    return cache
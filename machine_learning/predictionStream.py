@@ -0,0 +1,241 @@
+# predictions over WebSocket for the web interface (interface/bolt)
+
+# interface/bolt/src/server.js only forwards raw serial lines, so the web UI
+# never sees a prediction. this runs the gloves through MultiGloveServer (one
+# shared model, per-glove smoothing) and pushes to every WebSocket client:
+#
+#   on connect  {"type":"connection","status":"connected","variant":"rf_raw",
+#                "classes":[...],"gloves":["sim0",...],"latest":{<glove entries as below>}}
+#   then        {"type":"prediction","version":1234,
+#                "gloves":{"sim0":{"v":[801,802,0,795,881,2.32,9.58,-0.6],
+#                                  "raw":"Dale","conf":0.93,"gesture":"Dale","score":0.8,
+#                                  "seq":5120,"t":1718000000.123}},
+#                "events":[["sim0","Dale",0.8,1718000000.1]]}
+#     v       latest sensor values of the glove (flex as int, accel 2 decimals)
+#     raw     model prediction for that frame ("Unknown" below the threshold)
+#     conf    its probability
+#     gesture / score   smoothed gesture, what the interpreters print
+#     seq     frames scored for this glove so far (gaps = coalesced frames)
+#     t       wall clock (time.time()) the frame was scored
+#     events  smoothed gesture changes since the client's last message
+#
+# messages are coalesced per client: inference only overwrites the latest
+# state per glove (and appends gesture changes to a bounded list), each client
+# has its own sender that sends whatever changed since ITS last message, at
+# most --max-hz times a second. a slow or stalled browser only makes its own
+# sender wait on its socket; it never blocks inference or the other clients,
+# and its backlog can't grow. clients that are in step share one json.dumps.
+#
+# needs `pip install websockets` (only this script does).
+# usage:
+#   python machine_learning/predictionStream.py --variant rf_raw --port COM3
+#   python machine_learning/predictionStream.py --simulate 2 --ws-port 8765     # no glove needed
+#   then connect the UI (or any client) to ws://localhost:8765
+# load test: python machine_learning/benchmarks/streamLoadTest.py
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+from collections import deque
+
+from multiGloveServer import add_arguments, from_args
+
+
+class Client:
+    """one WebSocket connection and what it has been sent"""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.sent_version = 0
+        self.messages = 0
+        self.bytes = 0
+
+
+class PredictionStream:
+    """
+    max_hz     : most messages per second to one client
+    keep_events: gesture changes kept for clients that fall behind
+    hello      : extra fields for the "connection" message (variant, classes, ...)
+    hook publish_frames / publish_result into MultiGloveServer (on_frames / on_result)
+    """
+
+    def __init__(self, max_hz=30.0, keep_events=256, hello=None):
+        self.period = 1.0 / max_hz if max_hz else 0.0
+        self.version = 0                        # bumped on every publish
+        self.gloves = {}                        # name -> (version, entry)
+        self.frames = {}                        # name -> frames scored
+        self.events = deque(maxlen=keep_events) # (version, [glove, gesture, score, t])
+        self.hello = dict(hello or {})
+        self.clients = set()
+        self._changed = None                    # future resolved on the next publish
+        self._cache_version = -1
+        self._cache = {}                        # sent_version -> message for self.version
+        # counters
+        self.published = 0
+        self.messages = 0
+        self.bytes = 0
+        self.encoded = 0
+
+    # ── inference side (never awaits) ────────────────────────────────────────
+    def publish_frames(self, g, values, gestures, confidences):
+        v = values[-1].tolist()
+        self.frames[g.name] = self.frames.get(g.name, 0) + len(values)
+        self.version += 1
+        self.gloves[g.name] = (self.version, {
+            "v": [int(x) for x in v[:5]] + [round(x, 2) for x in v[5:]],
+            "raw": str(gestures[-1]),
+            "conf": round(float(confidences[-1]), 3),
+            "gesture": str(g.label),
+            "score": round(float(g.score), 3),
+            "seq": self.frames[g.name],
+            "t": round(time.time(), 3),
+        })
+        self.published += 1
+        self._notify()
+
+    def publish_result(self, g, label, score, gesture):
+        self.version += 1
+        self.events.append((self.version, [g.name, str(label), round(float(score), 3),
+                                           round(time.time(), 3)]))
+        self._notify()
+
+    def _notify(self):
+        if self._changed is not None and not self._changed.done():
+            self._changed.set_result(None)
+
+    # ── client side ──────────────────────────────────────────────────────────
+    def message(self, since):
+        """everything that changed after version `since`, encoded once per (since, version)"""
+        if self._cache_version != self.version:
+            self._cache_version, self._cache = self.version, {}
+        data = self._cache.get(since)
+        if data is None:
+            data = json.dumps({
+                "type": "prediction",
+                "version": self.version,
+                "gloves": {name: e for name, (ver, e) in self.gloves.items() if ver > since},
+                "events": [e for ver, e in self.events if ver > since],
+            }, separators=(",", ":"))
+            self._cache[since] = data
+            self.encoded += 1
+        return data
+
+    async def _wait(self):
+        if self._changed is None or self._changed.done():
+            self._changed = asyncio.get_running_loop().create_future()
+        # shared by every sender: a cancelled client must not cancel it for the others
+        await asyncio.shield(self._changed)
+
+    async def _sender(self, c):
+        from websockets.exceptions import ConnectionClosed
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                if c.sent_version == self.version:
+                    await self._wait()
+                t0 = loop.time()
+                version = self.version
+                data = self.message(c.sent_version)
+                c.sent_version = version
+                await c.ws.send(data)           # a slow socket only holds up this client
+                c.messages += 1
+                c.bytes += len(data)
+                self.messages += 1
+                self.bytes += len(data)
+                delay = self.period - (loop.time() - t0)
+                if delay > 0:
+                    await asyncio.sleep(delay)  # changes meanwhile coalesce into one message
+        except ConnectionClosed:
+            pass
+
+    async def handler(self, ws):
+        """websockets connection handler"""
+        from websockets.exceptions import ConnectionClosed
+        c = Client(ws)
+        self.clients.add(c)
+        sender = None
+        try:
+            # the current state of every glove comes with the hello, older events don't
+            c.sent_version = self.version
+            latest = {name: e for name, (_, e) in self.gloves.items()}
+            await ws.send(json.dumps(dict({"type": "connection", "status": "connected"}, **self.hello,
+                                          latest=latest), separators=(",", ":")))
+            sender = asyncio.create_task(self._sender(c))
+            async for _ in ws:
+                pass                            # nothing is expected from clients
+        except ConnectionClosed:
+            pass
+        finally:
+            if sender is not None:
+                sender.cancel()
+            self.clients.discard(c)
+
+    def stats(self):
+        lag = [self.version - c.sent_version for c in self.clients]
+        return {
+            "clients": len(self.clients),
+            "published": self.published,
+            "messages": self.messages,
+            "bytes": self.bytes,
+            "encoded": self.encoded,
+            "max_lag": max(lag) if lag else 0,
+        }
+
+    async def reporter(self, every):
+        last = self.stats()
+        while True:
+            await asyncio.sleep(every)
+            s = self.stats()
+            d = {k: s[k] - last[k] for k in ("published", "messages", "bytes", "encoded")}
+            print(f"📡 {s['clients']} clients | {d['published'] / every:.0f} updates/s -> "
+                  f"{d['messages'] / every:.0f} messages/s, {d['bytes'] / every / 1024:.1f} KiB/s, "
+                  f"{d['encoded'] / every:.0f} encodes/s | max lag {s['max_lag']} updates")
+            last = s
+
+
+async def serve(args):
+    try:
+        import websockets
+    except ImportError:
+        print("❌ predictionStream.py needs the websockets package: pip install websockets")
+        return 1
+
+    stream = PredictionStream(args.max_hz)
+    server, sims = from_args(args, on_result=stream.publish_result, on_frames=stream.publish_frames)
+    stream.hello.update(variant=args.variant, classes=[str(c) for c in server.pipeline.classes],
+                        gloves=[g.name for g in server.gloves])
+    tasks = []
+    try:
+        async with websockets.serve(stream.handler, args.host, args.ws_port, compression=None):
+            print(f"📡 ws://{args.host}:{args.ws_port} ({args.max_hz:g} messages/s per client at most)")
+            if args.report_every:
+                tasks.append(asyncio.create_task(stream.reporter(args.report_every)))
+            await server.run(args.duration, args.report_every)
+    finally:
+        for task in tasks:
+            task.cancel()
+        for sim in sims:
+            sim.stop()
+        server.close()
+    return 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Stream glove predictions to WebSocket clients")
+    add_arguments(ap)
+    ap.add_argument("--host", default="127.0.0.1", help="0.0.0.0 to accept other machines")
+    ap.add_argument("--ws-port", type=int, default=8765)
+    ap.add_argument("--max-hz", type=float, default=30.0, help="messages per second per client")
+    args = ap.parse_args()
+    if not args.port and not args.simulate:
+        ap.error("give at least one --port or --simulate N")
+    try:
+        return asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
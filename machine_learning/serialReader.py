@@ -0,0 +1,201 @@
+# background serial reader + preallocated ring buffer of frames
+
+# the GUIs used to readline -> predict -> update -> sleep on one thread, so
+# whenever inference (or the sleep) was slower than the glove, lines piled up
+# in the OS serial buffer and the predictions fell seconds behind the hand.
+#
+# SerialReader drains the port on its own thread (FrameDecoder, so ASCII and
+# binary frames both work) into a FrameRing, a fixed NumPy array that is
+# allocated once. the consumer calls ring.latest() to score the newest frames;
+# anything older it skipped is counted as stale instead of being queued up.
+
+import time
+import threading
+
+import numpy as np
+
+from frameProtocol import FrameDecoder
+
+N_VALUES = 8
+
+
+class FrameRing:
+    """
+    capacity: frames kept
+    policy  : "drop-oldest" (reader overwrites unread frames when full) or
+              "block" (reader waits for the consumer to make room)
+
+    counters:
+      written  frames pushed by the reader
+      dropped  unread frames overwritten because the ring was full
+      stale    frames the consumer skipped to get to the newest ones
+      consumed frames handed to the consumer
+    """
+
+    def __init__(self, capacity=256, n_values=N_VALUES, policy="drop-oldest"):
+        if policy not in ("drop-oldest", "block"):
+            raise ValueError(f"unknown overflow policy {policy!r}")
+        self.capacity = int(capacity)
+        self.policy = policy
+        self.frames = np.zeros((self.capacity, n_values), dtype=np.float32)
+        self.times  = np.zeros(self.capacity, dtype=np.float64)
+        self._cond  = threading.Condition()
+        self._write = 0        # total frames ever written
+        self._read  = 0        # total frames ever consumed or skipped
+        self.written = 0
+        self.dropped = 0
+        self.stale = 0
+        self.consumed = 0
+        self.closed = False
+
+    def __len__(self):
+        return self._write - self._read
+
+    def push(self, rows, t_arrival=None):
+        """rows: (n, n_values) frames in arrival order"""
+        rows = np.asarray(rows, dtype=np.float32).reshape(-1, self.frames.shape[1])
+        if not len(rows):
+            return
+        t_arrival = time.perf_counter() if t_arrival is None else t_arrival
+
+        with self._cond:
+            if self.policy == "block":
+                for start in range(0, len(rows), self.capacity):
+                    chunk = rows[start:start + self.capacity]
+                    while self.capacity - len(self) < len(chunk) and not self.closed:
+                        self._cond.wait(0.1)
+                    if self.closed:
+                        return
+                    self._store(chunk, t_arrival)
+            else:
+                if len(rows) > self.capacity:
+                    self.dropped += len(rows) - self.capacity
+                    rows = rows[-self.capacity:]
+                overflow = len(self) + len(rows) - self.capacity
+                if overflow > 0:
+                    self._read += overflow
+                    self.dropped += overflow
+                self._store(rows, t_arrival)
+            self._cond.notify_all()
+
+    def _store(self, rows, t_arrival):
+        n = len(rows)
+        start = self._write % self.capacity
+        first = min(n, self.capacity - start)
+        self.frames[start:start + first] = rows[:first]
+        self.times[start:start + first] = t_arrival
+        if first < n:
+            self.frames[:n - first] = rows[first:]
+            self.times[:n - first] = t_arrival
+        self._write += n
+        self.written += n
+
+    def _copy_out(self, first, k, out, out_t):
+        idx = (first + np.arange(k)) % self.capacity
+        np.take(self.frames, idx, axis=0, out=out)
+        np.take(self.times, idx, out=out_t)
+
+    def latest(self, n=1, timeout=None, out=None):
+        """
+        waits (up to timeout seconds) for at least one unread frame, then
+        returns (frames, arrival_times) for the newest n unread ones, oldest
+        first. everything older is skipped and counted as stale.
+        out: optional preallocated (n, n_values) float32 array to copy into
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: len(self) > 0 or self.closed, timeout):
+                return self.frames[:0], self.times[:0]
+            avail = len(self)
+            k = min(n, avail)
+            out = np.empty((k, self.frames.shape[1]), dtype=np.float32) if out is None else out[:k]
+            out_t = np.empty(k, dtype=np.float64)
+            self._copy_out(self._write - k, k, out, out_t)
+            self.stale += avail - k
+            self.consumed += k
+            self._read = self._write
+            self._cond.notify_all()
+            return out, out_t
+
+    def pop(self, n=None, timeout=None):
+        """like latest(), but hands over the OLDEST unread frames (nothing is skipped)"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: len(self) > 0 or self.closed, timeout):
+                return self.frames[:0], self.times[:0]
+            k = len(self) if n is None else min(n, len(self))
+            out = np.empty((k, self.frames.shape[1]), dtype=np.float32)
+            out_t = np.empty(k, dtype=np.float64)
+            self._copy_out(self._read, k, out, out_t)
+            self._read += k
+            self.consumed += k
+            self._cond.notify_all()
+            return out, out_t
+
+    def close(self):
+        """wakes up a waiting consumer / blocked reader; they return right away until open()"""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def open(self):
+        """undoes close(); unread frames are kept"""
+        with self._cond:
+            self.closed = False
+
+    def counters(self):
+        return {"written": self.written, "dropped": self.dropped, "stale": self.stale,
+                "consumed": self.consumed, "unread": len(self), "capacity": self.capacity}
+
+
+class SerialReader:
+    """
+    ser    : open serial.Serial (give it a timeout so stop() can return)
+    ring   : FrameRing the frames go into
+    decoder: FrameDecoder (default: auto-detect ASCII / binary)
+    """
+
+    def __init__(self, ser, ring=None, decoder=None):
+        self.ser = ser
+        self.ring = ring if ring is not None else FrameRing()
+        self.decoder = decoder if decoder is not None else FrameDecoder()
+        self.errors = 0
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                data = self.ser.read(self.ser.in_waiting or 1)
+            except Exception as e:
+                # port went away / was closed; keep counting instead of dying silently
+                self.errors += 1
+                self.last_error = str(e)
+                time.sleep(0.1)
+                continue
+            if data:
+                t = time.perf_counter()
+                frames = self.decoder.feed(data)
+                if len(frames):
+                    self.ring.push(frames, t)
+
+    def start(self):
+        """starts (or, after stop(), restarts) the reader thread"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self.ring.open()
+            self._thread = threading.Thread(target=self.run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """stops the thread and closes the ring so a waiting consumer returns; start() reopens it"""
+        self._stop.set()
+        self.ring.close()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def counters(self):
+        c = self.ring.counters()
+        c.update({f"decoder_{k}": v for k, v in self.decoder.counters().items()})
+        c["read_errors"] = self.errors
+        return c
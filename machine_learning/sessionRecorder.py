@@ -0,0 +1,237 @@
+# buffered recording sessions: appendable binary rows + JSON metadata
+
+# gestureDataCollection.py used to print every line and writerow() every
+# sample, which can't keep up once the glove streams faster than a few
+# hundred Hz. a session instead keeps rows in a preallocated NumPy block and
+# appends whole blocks to <name>.glv, a flat file of RECORD_DTYPE rows (no
+# header, so it can be appended to and np.memmap'ed as it is). everything
+# else goes in <name>.json next to it:
+#   glove id, calibration profile, port / baud / expected rate, start and
+#   end time, the label list, labelled segments and the drop counters
+#
+# usage:
+#   python machine_learning/sessionRecorder.py info recordings/session_20260101_120000.glv
+#   python machine_learning/sessionRecorder.py export-csv recordings/session_*.glv --out machine_learning/data
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+
+import numpy as np
+
+FORMAT_VERSION = 1
+CHANNELS = ["F1", "F2", "F3", "F4", "F5", "X", "Y", "Z"]
+UNLABELED = -1
+
+RECORD_DTYPE = np.dtype([
+    ("t",      "<f8"),            # seconds since the session started (arrival time)
+    ("seq",    "<i2"),            # binary frame sequence number, -1 for ASCII
+    ("label",  "<i2"),            # index into meta["labels"], -1 = unlabeled
+    ("values", "<f4", (8,)),      # F1..F5, X, Y, Z as sent by the glove
+])
+
+
+class RateMeter:
+    """
+    measured sample rate, and for ASCII streams (no sequence numbers) an
+    estimate of the frames lost: samples the glove should have sent at the
+    expected rate minus the ones that arrived. reads come in bursts, so only
+    the running total means anything, not a single read.
+    """
+
+    def __init__(self, rate=None):
+        self.rate = rate
+        self.first_t = None
+        self.last_t = None
+        self.frames = 0
+
+    def update(self, t, n):
+        """t: perf_counter time of the read, n: frames it delivered"""
+        if not n:
+            return
+        if self.first_t is None:
+            self.first_t = t
+        else:
+            self.frames += n        # the first read only marks the start
+        self.last_t = t
+
+    @property
+    def measured(self):
+        span = (self.last_t or 0) - (self.first_t or 0)
+        return self.frames / span if span > 0 else 0.0
+
+    @property
+    def missing(self):
+        if not self.rate or self.first_t is None:
+            return 0
+        return max(0, int(round((self.last_t - self.first_t) * self.rate)) - self.frames)
+
+
+class SessionWriter:
+    """
+    path : <name>.glv (the metadata goes to <name>.json)
+    meta : dict of session metadata (glove, calibration, rate, port, ...)
+    block: rows kept in memory before one write to disk
+    """
+
+    def __init__(self, path, labels, meta=None, block=4096):
+        self.path = path
+        self.meta_path = os.path.splitext(path)[0] + ".json"
+        self.block = np.zeros(block, dtype=RECORD_DTYPE)
+        self.n = 0
+        self.rows = 0
+        self.flushes = 0
+        self.flush_seconds = 0.0
+        self.labels = list(labels)
+        self.label = UNLABELED
+        self.segments = []
+        self.counts = np.zeros(len(self.labels) + 1, dtype=np.int64)   # last slot = unlabeled
+        self.t0 = time.perf_counter()
+        self.meta = dict(meta or {}, format=FORMAT_VERSION, dtype=RECORD_DTYPE.descr,
+                         channels=CHANNELS, labels=self.labels,
+                         started=time.strftime("%Y-%m-%dT%H:%M:%S"))
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # existing sessions are appended to, never overwritten
+        if os.path.exists(path) and os.path.exists(self.meta_path):
+            with open(self.meta_path) as f:
+                old = json.load(f)
+            if old.get("labels") != self.labels:
+                raise ValueError(f"{path} was recorded with labels {old.get('labels')}")
+            self.rows = os.path.getsize(path) // RECORD_DTYPE.itemsize
+            self.segments = old.get("segments", [])
+            self.meta["started"] = old.get("started", self.meta["started"])
+        self.file = open(path, "ab")
+
+    def set_label(self, index):
+        """switch the label for the frames that follow (-1 = unlabeled)"""
+        if index == self.label:
+            return
+        self.label = index
+        self.segments.append({"label": self.labels[index] if index >= 0 else None,
+                              "row": self.rows + self.n,
+                              "t": round(time.perf_counter() - self.t0, 4)})
+
+    def append(self, frames, t_arrival, seq=None):
+        """
+        frames   : (n, 8) float32 samples
+        t_arrival: perf_counter time they arrived (scalar) or one per frame
+        seq      : optional (n,) sequence numbers (binary frames)
+        """
+        k = len(frames)
+        done = 0
+        t = np.broadcast_to(np.asarray(t_arrival, dtype=np.float64) - self.t0, (k,))
+        while done < k:
+            take = min(k - done, len(self.block) - self.n)
+            rows = self.block[self.n:self.n + take]
+            rows["values"] = frames[done:done + take]
+            rows["t"] = t[done:done + take]
+            rows["seq"] = -1 if seq is None else seq[done:done + take]
+            rows["label"] = self.label
+            self.n += take
+            done += take
+            if self.n == len(self.block):
+                self.flush()
+        self.counts[self.label] += k
+
+    def flush(self):
+        if not self.n:
+            return
+        t = time.perf_counter()
+        self.file.write(self.block[:self.n].tobytes())
+        self.file.flush()
+        self.rows += self.n
+        self.n = 0
+        self.flushes += 1
+        # metadata follows every block, so a crashed session is still readable
+        self._write_meta()
+        self.flush_seconds += time.perf_counter() - t
+
+    def _write_meta(self):
+        self.meta.update(rows=self.rows, segments=self.segments)
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(tmp, self.meta_path)
+
+    def label_counts(self):
+        out = {name: int(c) for name, c in zip(self.labels, self.counts[:-1]) if c}
+        if self.counts[-1]:
+            out["(unlabeled)"] = int(self.counts[-1])
+        return out
+
+    def close(self, **extra):
+        """flush the last block and write the metadata (extra keys are added to it)"""
+        self.flush()
+        self.file.close()
+        self.meta.update(extra, ended=time.strftime("%Y-%m-%dT%H:%M:%S"))
+        self._write_meta()
+
+
+def load_session(path, mmap=True):
+    """returns (records, meta); records is a RECORD_DTYPE array (memory-mapped by default)"""
+    with open(os.path.splitext(path)[0] + ".json") as f:
+        meta = json.load(f)
+    if meta.get("format", 1) > FORMAT_VERSION:
+        raise ValueError(f"{path}: session format {meta['format']} is newer than this reader")
+    n = os.path.getsize(path) // RECORD_DTYPE.itemsize
+    if mmap and n:
+        records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", shape=(n,))
+    else:
+        records = np.fromfile(path, dtype=RECORD_DTYPE, count=n)
+    return records, meta
+
+
+def session_to_csv(path, out_dir):
+    """writes <label>_data.csv (F1..Z,Gesture, appended like the old collector) per label"""
+    records, meta = load_session(path)
+    written = {}
+    for i, name in enumerate(meta["labels"]):
+        rows = records[records["label"] == i]
+        if not len(rows):
+            continue
+        out = os.path.join(out_dir, f"{name}_data.csv")
+        exists = os.path.exists(out)
+        with open(out, "a", newline="") as f:
+            w = csv.writer(f)
+            if not exists:
+                w.writerow(CHANNELS + ["Gesture"])
+            for v in rows["values"].tolist():
+                # same formatting as the firmware (ints for flex, 2 decimals for accel)
+                w.writerow([int(x) for x in v[:5]] + [round(x, 2) for x in v[5:]] + [name])
+        written[out] = len(rows)
+    return written
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Inspect / export recording sessions")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    inf = sub.add_parser("info", help="print a session's metadata and label counts")
+    inf.add_argument("session", nargs="+")
+    ex = sub.add_parser("export-csv", help="append each label's rows to <label>_data.csv")
+    ex.add_argument("session", nargs="+")
+    ex.add_argument("--out", default=".", help="folder for the CSVs")
+    args = ap.parse_args()
+
+    for path in args.session:
+        if args.cmd == "info":
+            records, meta = load_session(path)
+            labels = records["label"]
+            print(f"📼 {path}: {len(records)} rows, glove {meta.get('glove')!r}, "
+                  f"{meta.get('started')} .. {meta.get('ended')}")
+            for i, name in enumerate(meta["labels"]):
+                n = int(np.count_nonzero(labels == i))
+                if n:
+                    print(f"   {name:<16} {n}")
+            print(f"   drops: {meta.get('drops')}")
+        else:
+            for out, n in session_to_csv(path, args.out).items():
+                print(f"💾 {n:>6} rows -> {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
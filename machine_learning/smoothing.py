@@ -0,0 +1,316 @@
+# streaming smoothing of per-frame predictions
+
+# every interpreter had its own smoothing:
+#   GUIs / MLP Interpret.py      Counter(deque(maxlen=5)).most_common(1), freq >= 3 and not "Unknown"
+#   New_Interpreter*.py          list + pop(0), majority of the valid labels once the
+#                                window is full, accepted if it appears more than once
+# both rebuild a Counter on every frame. the smoothers here keep their state
+# incrementally so a frame costs the same no matter how long the window is:
+#
+#   "none"      pass the raw prediction through
+#   "vote"      GUI rule (min_count of window, Unknown never wins)
+#   "majority"  New_Interpreter rule
+#   "prob"      windowed average of the full predict_proba vectors (running sum)
+#   "ema"       exponential average of the predict_proba vectors
+#
+# any of them can be wrapped in Hysteresis (separate enter / exit levels).
+# usage:
+#   smoother = make_smoother("vote", classes=encoder.classes_)
+#   label, score = smoother.update(gesture, probs)
+
+from collections import deque
+
+import numpy as np
+
+UNKNOWN = "Unknown"
+INVALID = ("Unknown", "Error")
+
+
+class WindowCounts:
+    """
+    label counts over the last `window` predictions, updated in O(1)
+    most_common() breaks ties like collections.Counter over the window does:
+    the label whose oldest occurrence in the window comes first wins
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.labels = deque()
+        self.positions = {}    # label -> deque of frame numbers still in the window
+        self.frame = 0
+
+    def __len__(self):
+        return len(self.labels)
+
+    def push(self, label):
+        self.labels.append(label)
+        self.positions.setdefault(label, deque()).append(self.frame)
+        self.frame += 1
+        if len(self.labels) > self.window:
+            old = self.labels.popleft()
+            pos = self.positions[old]
+            pos.popleft()
+            if not pos:
+                del self.positions[old]
+
+    def count(self, label):
+        pos = self.positions.get(label)
+        return len(pos) if pos else 0
+
+    def most_common(self, exclude=()):
+        """(label, count) of the most frequent label not in exclude, or (None, 0)
+        (looks at the distinct labels in the window, never at the window itself)"""
+        best, best_count, best_first = None, 0, None
+        for label, pos in self.positions.items():
+            if label in exclude:
+                continue
+            n = len(pos)
+            if n > best_count or (n == best_count and pos[0] < best_first):
+                best, best_count, best_first = label, n, pos[0]
+        return best, best_count
+
+    def clear(self):
+        self.labels.clear()
+        self.positions.clear()
+
+
+class PassThrough:
+    name = "none"
+
+    def __init__(self, **_):
+        self.last = (UNKNOWN, 0.0)
+
+    def update(self, gesture, probs=None):
+        score = float(np.max(probs)) if probs is not None else 1.0
+        self.last = (gesture, score)
+        return self.last
+
+    def describe(self):
+        return ""
+
+    def reset(self):
+        self.last = (UNKNOWN, 0.0)
+
+
+class VoteSmoother:
+    """GUI rule: most common label in the window if it has min_count votes and isn't Unknown"""
+    name = "vote"
+
+    def __init__(self, window=5, min_count=3, **_):
+        self.counts = WindowCounts(window)
+        self.min_count = min_count
+        self.last = (UNKNOWN, 0.0)
+
+    def update(self, gesture, probs=None):
+        self.counts.push(gesture)
+        top, freq = self.counts.most_common()
+        label = top if (freq >= self.min_count and top != UNKNOWN) else UNKNOWN
+        self.last = (label, freq / self.counts.window)
+        return self.last
+
+    def describe(self):
+        return f"(vote {self.last[1] * self.counts.window:.0f}/{self.counts.window})"
+
+    def reset(self):
+        self.counts.clear()
+        self.last = (UNKNOWN, 0.0)
+
+
+class MajoritySmoother:
+    """New_Interpreter rule: once the window is full, the majority of the valid
+    labels if it appears more than once, otherwise the raw prediction"""
+    name = "majority"
+
+    def __init__(self, window=5, **_):
+        self.counts = WindowCounts(window)
+        self.last = (UNKNOWN, 0.0)
+        self.reason = ""
+
+    def update(self, gesture, probs=None):
+        self.counts.push(gesture)
+        w = self.counts.window
+        if len(self.counts) < w:
+            self.reason = ""
+            self.last = (gesture, 0.0)
+            return self.last
+
+        top, count = self.counts.most_common(exclude=INVALID)
+        if top is None:
+            self.reason = "(no valid majority)"
+            self.last = (gesture, 0.0)
+        elif count > 1:
+            self.reason = f"(majority {count}/{w})"
+            self.last = (top, count / w)
+        else:
+            self.reason = "(single prediction)"
+            self.last = (gesture, count / w)
+        return self.last
+
+    def describe(self):
+        return self.reason
+
+    def reset(self):
+        self.counts.clear()
+        self.last = (UNKNOWN, 0.0)
+        self.reason = ""
+
+
+class ProbAverageSmoother:
+    """
+    average of the last `window` predict_proba vectors, kept as a running sum
+    in a preallocated ring; label = argmax if the average reaches threshold
+    """
+    name = "prob"
+
+    def __init__(self, classes, window=5, threshold=0.75, **_):
+        self.classes = np.asarray(classes)
+        self.window = window
+        self.threshold = threshold
+        self.ring = np.zeros((window, len(self.classes)))
+        self.total = np.zeros(len(self.classes))
+        self.n = 0
+        self.last = (UNKNOWN, 0.0)
+
+    def update(self, gesture, probs=None):
+        if probs is None:               # prediction error: keep the current state
+            return self.last
+        i = self.n % self.window
+        self.total -= self.ring[i]
+        self.ring[i] = np.ravel(probs)
+        self.total += self.ring[i]
+        self.n += 1
+        if i == self.window - 1:
+            # re-sum once per lap so rounding in the running sum can't build up
+            np.sum(self.ring, axis=0, out=self.total)
+
+        avg = self.total / min(self.n, self.window)
+        idx = int(np.argmax(avg))
+        conf = float(avg[idx])
+        self.last = (self.classes[idx] if conf >= self.threshold else UNKNOWN, conf)
+        return self.last
+
+    def describe(self):
+        return f"(avg {self.last[1]:.0%} over {min(self.n, self.window)})"
+
+    def reset(self):
+        self.ring[:] = 0.0
+        self.total[:] = 0.0
+        self.n = 0
+        self.last = (UNKNOWN, 0.0)
+
+
+class EmaSmoother:
+    """exponential moving average of the predict_proba vectors (alpha = weight of the new frame)"""
+    name = "ema"
+
+    def __init__(self, classes, alpha=0.3, threshold=0.75, **_):
+        self.classes = np.asarray(classes)
+        self.alpha = alpha
+        self.threshold = threshold
+        self.avg = None
+        self.last = (UNKNOWN, 0.0)
+
+    def update(self, gesture, probs=None):
+        if probs is None:
+            return self.last
+        p = np.ravel(probs)
+        if self.avg is None:
+            self.avg = p.astype(np.float64)
+        else:
+            self.avg *= 1.0 - self.alpha
+            self.avg += self.alpha * p
+        idx = int(np.argmax(self.avg))
+        conf = float(self.avg[idx])
+        self.last = (self.classes[idx] if conf >= self.threshold else UNKNOWN, conf)
+        return self.last
+
+    def describe(self):
+        return f"(ema {self.last[1]:.0%})"
+
+    def reset(self):
+        self.avg = None
+        self.last = (UNKNOWN, 0.0)
+
+
+class Hysteresis:
+    """
+    wraps another smoother: a new label has to score >= enter for enter_frames
+    frames in a row before it is shown, and the shown label is only dropped
+    (back to Unknown or to a new label) after scoring < exit for exit_frames
+    """
+
+    def __init__(self, inner, enter=0.6, exit=0.4, enter_frames=2, exit_frames=2):
+        self.inner = inner
+        self.name = inner.name + "+hysteresis"
+        self.enter, self.exit = enter, exit
+        self.enter_frames, self.exit_frames = enter_frames, exit_frames
+        self.current = UNKNOWN
+        self.candidate, self.candidate_run = None, 0
+        self.weak_run = 0
+        self.last = (UNKNOWN, 0.0)
+
+    def update(self, gesture, probs=None):
+        label, score = self.inner.update(gesture, probs)
+
+        if label == self.current and label != UNKNOWN:
+            self.candidate, self.candidate_run = None, 0
+            self.weak_run = self.weak_run + 1 if score < self.exit else 0
+        else:
+            self.weak_run += 1
+            if label != UNKNOWN and score >= self.enter:
+                if label == self.candidate:
+                    self.candidate_run += 1
+                else:
+                    self.candidate, self.candidate_run = label, 1
+            else:
+                self.candidate, self.candidate_run = None, 0
+
+        if self.candidate is not None and self.candidate_run >= self.enter_frames:
+            self.current = self.candidate
+            self.candidate, self.candidate_run, self.weak_run = None, 0, 0
+        elif self.current != UNKNOWN and self.weak_run >= self.exit_frames:
+            self.current = UNKNOWN
+            self.weak_run = 0
+
+        self.last = (self.current, score if label == self.current else 0.0)
+        return self.last
+
+    def describe(self):
+        return f"{self.inner.describe()} +hysteresis".strip()
+
+    def reset(self):
+        self.inner.reset()
+        self.current = UNKNOWN
+        self.candidate, self.candidate_run, self.weak_run = None, 0, 0
+        self.last = (UNKNOWN, 0.0)
+
+
+SMOOTHERS = {
+    "none": PassThrough,
+    "vote": VoteSmoother,
+    "majority": MajoritySmoother,
+    "prob": ProbAverageSmoother,
+    "ema": EmaSmoother,
+}
+
+
+def make_smoother(name="vote", classes=None, hysteresis=None, **kwargs):
+    """
+    name      : "none", "vote", "majority", "prob" or "ema"
+                (append "+hysteresis" to wrap it, e.g. "prob+hysteresis")
+    classes   : encoder.classes_ (needed by "prob" / "ema")
+    hysteresis: dict of Hysteresis arguments (enter, exit, enter_frames, exit_frames)
+    other keyword arguments go to the smoother (window, min_count, threshold, alpha)
+    """
+    if name.endswith("+hysteresis"):
+        name = name[:-len("+hysteresis")]
+        hysteresis = hysteresis or {}
+    if name not in SMOOTHERS:
+        raise ValueError(f"unknown smoothing {name!r}; choose from {sorted(SMOOTHERS)}")
+    if name in ("prob", "ema") and classes is None:
+        raise ValueError(f"{name!r} smoothing needs the class list")
+
+    smoother = SMOOTHERS[name](classes=classes, **kwargs)
+    if hysteresis is not None:
+        smoother = Hysteresis(smoother, **hysteresis)
+    return smoother
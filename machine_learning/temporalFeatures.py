@@ -0,0 +1,263 @@
+# sliding-window temporal features, the same live and offline
+
+# every model so far sees one 8-value frame, so a sign that is a motion looks
+# like whichever pose it passes through, and X/Y/Z only tell the static tilt.
+# TemporalFeatures keeps a window of the last `window` frames and gives, per
+# frame, for every channel:
+#   value, rolling mean, rolling variance, rolling min, rolling max,
+#   delta (change since the previous frame)
+# plus the accel magnitude |(X, Y, Z)| and its rolling RMS: 50 features.
+#
+# live: update() works on all channels at once. running sums give the mean
+#       and variance (add the new frame, subtract the one leaving the window);
+#       min / max are kept per channel and only re-scanned from the ring for
+#       the channels whose extreme just left the window, so a held sign
+#       costs the same at any window, and a full re-scan is one small
+#       numpy reduction.
+# offline: extract() computes the same thing for a whole recording with
+#       cumulative sums and sliding windows (dataset_features() for the cache).
+#
+# both paths work on the values quantized to QUANTUM (0.01, the resolution
+# the firmware sends accel in; flex values are integers) held as int64, so the
+# sums are exact and the two paths give bit-identical features, whatever order
+# the additions happen in. before the window fills up, the stats cover the
+# frames seen so far.
+#
+# usage:
+#   python machine_learning/trainModels.py --variant rf_raw --temporal 10
+#   (the model bundle records the window; interpreters loading it stream every
+#   frame through a TemporalPreprocessor automatically)
+
+import math
+
+import numpy as np
+
+CHANNELS = ["F1", "F2", "F3", "F4", "F5", "X", "Y", "Z"]
+ACCEL = slice(5, 8)
+QUANTUM = 0.01
+STATS = ["", "_mean", "_var", "_min", "_max", "_delta"]
+FEATURES = [ch + s for s in STATS for ch in CHANNELS] + ["acc_mag", "acc_mag_rms"]
+N_FEATURES = len(FEATURES)
+
+
+def quantize(X):
+    """values -> int64 multiples of QUANTUM (what both paths compute with)"""
+    return np.rint(np.asarray(X, dtype=np.float64) / QUANTUM).astype(np.int64)
+
+
+def _finish(q, s, ss, lo, hi, prev, mag2_sum, n, out):
+    """
+    shared float step: exact int64 window sums -> features
+    n: frames in the window, a number (one frame) or (rows,) (offline)
+    """
+    nc = len(CHANNELS)
+    n = np.asarray(n)
+    nn = n[..., None]
+    out[..., 0:nc] = q * QUANTUM
+    out[..., nc:2 * nc] = s / nn * QUANTUM
+    out[..., 2 * nc:3 * nc] = (nn * ss - s * s) / (nn * nn) * (QUANTUM * QUANTUM)
+    out[..., 3 * nc:4 * nc] = lo * QUANTUM
+    out[..., 4 * nc:5 * nc] = hi * QUANTUM
+    out[..., 5 * nc:6 * nc] = (q - prev) * QUANTUM
+    mag2 = (q[..., ACCEL] * q[..., ACCEL]).sum(axis=-1)
+    out[..., 6 * nc] = np.sqrt(mag2) * QUANTUM
+    out[..., 6 * nc + 1] = np.sqrt(mag2_sum / n) * QUANTUM
+    return out
+
+
+class TemporalFeatures:
+    """
+    window: frames in the rolling window (1 = the frame alone)
+    update(frame) -> (N_FEATURES,) float64 (a reused buffer, copy to keep it)
+    """
+
+    def __init__(self, window=10):
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        nc = len(CHANNELS)
+        self.window = int(window)
+        self.ring = np.zeros((self.window, nc), dtype=np.int64)
+        self.mag2 = np.zeros(self.window, dtype=np.int64)
+        # the six per-channel stats as exact integers, turned into features
+        # by one divide and one multiply: value, sum, n*ss - s*s, min, max, delta
+        self.num = np.zeros(6 * nc, dtype=np.int64)
+        self.s, self.lo, self.hi = self.num[nc:2 * nc], self.num[3 * nc:4 * nc], self.num[4 * nc:5 * nc]
+        self.scale = np.full(6 * nc, QUANTUM)
+        self.scale[2 * nc:3 * nc] = QUANTUM * QUANTUM
+        self.dividers = {}
+        self.out = np.empty(N_FEATURES, dtype=np.float64)
+        self.reset()
+
+    def reset(self):
+        self.t = 0                                   # frames seen
+        self.s[:] = 0
+        self.ss = np.zeros(len(CHANNELS), dtype=np.int64)
+        self.mag2_sum = 0
+        self.prev = None
+        big = np.iinfo(np.int64).max
+        self.lo[:] = big
+        self.hi[:] = -big
+
+    def _divider(self, n):
+        """what _finish divides the stats by for a window of n frames: 1, n, n*n, 1, 1, 1"""
+        d = self.dividers.get(n)
+        if d is None:
+            nc = len(CHANNELS)
+            d = self.dividers[n] = np.ones(6 * nc)
+            d[nc:2 * nc], d[2 * nc:3 * nc] = n, n * n
+        return d
+
+    def update(self, frame):
+        q = quantize(frame).reshape(-1)
+        t, w = self.t, self.window
+        slot = t % w
+        full = t >= w
+        if full:
+            old = self.ring[slot]
+            self.s -= old
+            self.ss -= old * old
+            self.mag2_sum -= int(self.mag2[slot])
+            # the leaving frame held the extreme and the new one doesn't replace it
+            lost_lo = (old == self.lo) & (q > old)
+            lost_hi = (old == self.hi) & (q < old)
+        m2 = int((q[ACCEL] * q[ACCEL]).sum())
+        self.ring[slot] = q
+        self.mag2[slot] = m2
+        self.s += q
+        self.ss += q * q
+        self.mag2_sum += m2
+
+        lo, hi = self.lo, self.hi
+        np.minimum(lo, q, out=lo)
+        np.maximum(hi, q, out=hi)
+        if full:
+            if lost_lo.any():
+                lo[lost_lo] = self.ring[:, lost_lo].min(axis=0)
+            if lost_hi.any():
+                hi[lost_hi] = self.ring[:, lost_hi].max(axis=0)
+
+        prev = q if self.prev is None else self.prev
+        self.prev = q
+        self.t = t + 1
+        n = min(self.t, w)
+
+        # the same float operations as _finish, on all 48 stats at once
+        nc, num, out = len(CHANNELS), self.num, self.out
+        num[:nc] = q
+        np.multiply(self.ss, n, out=num[2 * nc:3 * nc])
+        num[2 * nc:3 * nc] -= self.s * self.s
+        np.subtract(q, prev, out=num[5 * nc:])
+        stats = out[:6 * nc]
+        np.divide(num, self._divider(n), out=stats)
+        np.multiply(stats, self.scale, out=stats)
+        out[6 * nc] = math.sqrt(m2) * QUANTUM
+        out[6 * nc + 1] = math.sqrt(self.mag2_sum / n) * QUANTUM
+        return out
+
+    def update_many(self, X):
+        """consecutive frames (n, 8) -> (n, N_FEATURES), continuing the stream"""
+        X = np.asarray(X).reshape(-1, len(CHANNELS))
+        out = np.empty((len(X), N_FEATURES), dtype=np.float64)
+        for i, frame in enumerate(X):
+            out[i] = self.update(frame)
+        return out
+
+
+def extract(X, window=10):
+    """
+    offline features of ONE contiguous recording (n, 8) -> (n, N_FEATURES),
+    identical to feeding the frames one by one to a fresh TemporalFeatures
+    """
+    q = quantize(X).reshape(-1, len(CHANNELS))
+    n = len(q)
+    out = np.empty((n, N_FEATURES), dtype=np.float64)
+    if not n:
+        return out
+    w = int(window)
+    counts = np.minimum(np.arange(1, n + 1), w)
+
+    def rolling_sum(v):
+        c = np.cumsum(v, axis=0)
+        c[w:] -= c[:-w].copy()
+        return c
+
+    mag2 = (q[:, ACCEL] * q[:, ACCEL]).sum(axis=1)
+    # the first w - 1 windows are shorter: pad with values that never win
+    big = np.iinfo(np.int64).max
+    lo = np.lib.stride_tricks.sliding_window_view(
+        np.vstack([np.full((w - 1, q.shape[1]), big), q]), w, axis=0).min(axis=-1)
+    hi = np.lib.stride_tricks.sliding_window_view(
+        np.vstack([np.full((w - 1, q.shape[1]), -big), q]), w, axis=0).max(axis=-1)
+    prev = np.vstack([q[:1], q[:-1]])
+    return _finish(q, rolling_sum(q), rolling_sum(q * q), lo, hi, prev,
+                   rolling_sum(mag2), counts, out)
+
+
+def runs(keys):
+    """(start, stop) of every run of equal consecutive keys, e.g. file / label per row"""
+    keys = np.asarray(keys)
+    if not len(keys):
+        return []
+    cut = np.flatnonzero(np.any(keys[1:] != keys[:-1], axis=-1) if keys.ndim > 1
+                         else keys[1:] != keys[:-1]) + 1
+    bounds = [0] + cut.tolist() + [len(keys)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def dataset_features(ds, window=10):
+    """
+    features for every row of a datasetCache.Dataset, restarting the window at
+    every file and every label change (a window never mixes two recordings)
+    """
+    X = np.asarray(ds.X)
+    out = np.empty((len(X), N_FEATURES), dtype=np.float64)
+    for start, stop in runs(np.stack([np.asarray(ds.row_file), np.asarray(ds.y)], axis=1)):
+        out[start:stop] = extract(X[start:stop], window)
+    return out
+
+
+class TemporalPreprocessor:
+    """
+    drop-in for FusedPreprocessor when a model was trained on temporal features:
+    raw frames -> (optional calibration remap) -> TemporalFeatures -> fused
+    scale / offset (or None). stateful: frames must arrive in order.
+    """
+
+    def __init__(self, window, fused=None, remap=None):
+        self.features = TemporalFeatures(window)
+        self.window = self.features.window
+        self.fused = fused
+        self.remap = remap          # (scale, offset) on the raw 8 values
+        self.n_features = N_FEATURES
+        self._frame = np.empty((1, N_FEATURES), dtype=np.float32)
+
+    def compose_input(self, scale, offset):
+        """x * scale + offset on the raw frame first (calibration.apply_calibration)"""
+        scale, offset = np.asarray(scale, dtype=np.float64), np.asarray(offset, dtype=np.float64)
+        if self.remap is not None:
+            s0, o0 = self.remap
+            scale, offset = scale * s0, offset * s0 + o0
+        return TemporalPreprocessor(self.window, self.fused, (scale, offset))
+
+    def _raw(self, X):
+        X = np.asarray(X, dtype=np.float64).reshape(-1, len(CHANNELS))
+        if self.remap is not None:
+            X = X * self.remap[0] + self.remap[1]
+        return X
+
+    def transform(self, X):
+        """consecutive raw frames (n, 8) -> (n, N_FEATURES) float32 model input"""
+        feats = self.features.update_many(self._raw(X)).astype(np.float32)
+        return self.fused.transform(feats) if self.fused is not None else feats
+
+    def transform_frame(self, raw_values):
+        """one raw frame -> (1, N_FEATURES) float32 view of a reused buffer"""
+        self._frame[0] = self.features.update(self._raw(raw_values)[0])
+        return self.fused.transform(self._frame) if self.fused is not None else self._frame
+
+    def copy(self):
+        """same settings, a fresh window (one per glove when several share a model)"""
+        return TemporalPreprocessor(self.window, self.fused, self.remap)
+
+    def reset(self):
+        self.features.reset()
@@ -0,0 +1,158 @@
+# coalesced, diff-based rendering for the Tk interpreter GUIs
+
+# the GUIs used to push every frame into Tk: read_loop scheduled a
+# root.after(0, ...) per frame (or set Tk variables straight from the worker
+# thread, which Tk doesn't allow), and every update re-applied the text and
+# the image even when the gesture hadn't changed. TkRenderer sits in between:
+#
+#   worker thread   renderer.submit(raw="Dale", conf=93, gesture="Dale")
+#                   only stores the newest value per key under a lock, never
+#                   touches Tk, never blocks on the GUI
+#   Tk thread       a root.after() tick, at most `fps` times a second, takes
+#                   everything submitted since the last tick and calls a key's
+#                   render function only if its value differs from what is on
+#                   screen; when nothing changed the tick does no Tk calls
+#
+# it also measures the Tk event loop: every tick knows when it should have
+# run, so `lag` is how late Tk got to it (a busy / blocked mainloop shows up
+# here first), and `age` is how old the newest submitted state was when it was
+# drawn (submit -> screen).
+#
+# usage:
+#   renderer = TkRenderer(root, fps=30)
+#   renderer.bind_var("raw", raw_var)                 # tk.Variable.set on change
+#   renderer.bind("gesture", show_image)              # any callable(value)
+#   renderer.start()
+#   ...  renderer.submit(raw=pred, gesture=smooth)    # from any thread
+#   renderer.stats() -> {"lag_ms_p95": ..., "applied": ..., "skipped": ...}
+#   renderer.errors  -> {"gesture": 3}   render calls that raised, per key
+#                       (the other keys still draw, and ticks keep coming)
+# measure on a headless box: xvfb-run -a python machine_learning/benchmarks/guiRenderBenchmark.py
+
+import time
+import threading
+from collections import deque
+
+import numpy as np
+
+
+class TkRenderer:
+    """
+    root: the Tk root (only root.after / after_cancel are used)
+    fps : most ticks per second
+    keep: lag / age samples kept for stats()
+    """
+
+    def __init__(self, root, fps=30, keep=2000):
+        self.root = root
+        self.interval = 1.0 / fps
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._since = None              # perf_counter of the newest pending submit
+        self._shown = {}
+        self._renderers = {}
+        self._job = None
+        self._due = None
+        self.lag = deque(maxlen=keep)   # seconds each tick ran after it was due
+        self.age = deque(maxlen=keep)   # seconds from the newest submit to drawing it
+        # counters
+        self.submitted = 0              # values submitted (any thread)
+        self.coalesced = 0              # overwritten before a tick drew them
+        self.applied = 0                # render calls (value changed)
+        self.skipped = 0                # values equal to what was on screen
+        self.ticks = 0
+        self.busy_ticks = 0             # ticks that made at least one Tk call
+        self.render_s = 0.0             # time spent in render functions
+        self.errors = {}                # key -> render calls that raised
+
+    # ── setup (Tk thread) ────────────────────────────────────────────────────
+    def bind(self, key, render):
+        """render(value) runs on the Tk thread when `key` changes"""
+        self._renderers[key] = render
+        return self
+
+    def bind_var(self, key, var):
+        """key -> tk.StringVar / DoubleVar / ..."""
+        return self.bind(key, var.set)
+
+    def start(self):
+        if self._job is None:
+            self._due = time.perf_counter() + self.interval
+            self._job = self.root.after(int(self.interval * 1000), self._tick)
+        return self
+
+    def stop(self):
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+    # ── worker side (any thread) ─────────────────────────────────────────────
+    def submit(self, **state):
+        with self._lock:
+            self.coalesced += sum(1 for k in state if k in self._pending)
+            self._pending.update(state)
+            self._since = time.perf_counter()
+            self.submitted += len(state)
+
+    # ── Tk thread ────────────────────────────────────────────────────────────
+    def flush(self):
+        """applies pending state now (also what every tick does)"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            since, self._since = self._since, None
+        if not pending:
+            return 0
+        t0 = time.perf_counter()
+        drawn = 0
+        for key, value in pending.items():
+            if key in self._shown and self._shown[key] == value:
+                self.skipped += 1
+                continue
+            render = self._renderers.get(key)
+            if render is not None:
+                try:
+                    render(value)
+                except Exception as e:
+                    # left off _shown: the next submit of the value tries again
+                    if key not in self.errors:
+                        print(f"❌ render {key!r} failed: {type(e).__name__}: {e}")
+                    self.errors[key] = self.errors.get(key, 0) + 1
+                    continue
+                drawn += 1
+            self._shown[key] = value
+        t1 = time.perf_counter()
+        self.applied += drawn
+        self.render_s += t1 - t0
+        self.age.append(t1 - since)
+        return drawn
+
+    def _tick(self):
+        now = time.perf_counter()
+        self.lag.append(max(0.0, now - self._due))
+        self.ticks += 1
+        try:
+            if self.flush():
+                self.busy_ticks += 1
+        finally:
+            # next tick on the original grid, so one late tick doesn't shift the rest
+            self._due += self.interval * max(1, int((now - self._due) / self.interval) + 1)
+            delay = max(0.0, self._due - time.perf_counter())
+            self._job = self.root.after(int(delay * 1000), self._tick)
+
+    def stats(self):
+        lag = np.asarray(self.lag) * 1000.0
+        age = np.asarray(self.age) * 1000.0
+
+        def pct(a, q):
+            return float(np.percentile(a, q)) if len(a) else 0.0
+
+        return {
+            "lag_ms_p50": pct(lag, 50), "lag_ms_p95": pct(lag, 95),
+            "lag_ms_max": float(lag.max()) if len(lag) else 0.0,
+            "age_ms_p50": pct(age, 50), "age_ms_p95": pct(age, 95),
+            "submitted": self.submitted, "coalesced": self.coalesced,
+            "applied": self.applied, "skipped": self.skipped,
+            "ticks": self.ticks, "busy_ticks": self.busy_ticks,
+            "render_ms": self.render_s * 1000.0,
+            "render_errors": sum(self.errors.values()),
+        }
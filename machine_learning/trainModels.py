@@ -0,0 +1,386 @@
+# headless training: model / hyperparameter grid over a process pool
+
+# the notebooks fit RandomForest, SVC and MLPClassifier one after the other
+# with StratifiedKFold (partly in Colab). this script does the same from the
+# command line:
+#   1. loads the gestures from the dataset cache (datasetCache.py)
+#   2. builds the cross-validation folds once, preprocessed exactly like the
+#      interpreter variant will preprocess at runtime, and saves them as .npy
+#      under dataset_cache/folds/<hash>/; every worker memory-maps them
+#   3. runs every (candidate, fold) pair on a ProcessPoolExecutor
+#   4. refits the best candidate on all rows and writes the artifacts the
+#      interpreters load: gesture_model.pkl, label_encoder.pkl, scaler.pkl
+#      (scaler variants), model.bundle, calibration_reference.json, plus
+#      train_report.json with every candidate's scores and timings
+#
+# the variant picks the preprocessing and the defaults (data, classes, models):
+#   rf_scaler  machine_learning/data, the 9 classes of Interpreter/, MinMaxScaler
+#   rf_raw     New_Data, raw values
+#   mlp        Dale / ILoveYou / Paws_Up, normalize() + MinMaxScaler
+#
+# usage:
+#   python machine_learning/trainModels.py --variant rf_scaler --jobs 4
+#   python machine_learning/trainModels.py --variant mlp --models mlp,svc --install
+#       (--install writes into the interpreter folder instead of models/<variant>/)
+#   python machine_learning/trainModels.py --variant rf_raw --temporal 10
+#       (sliding-window features from temporalFeatures.py instead of single frames;
+#        normalize() is skipped, the scaler alone covers the 50 features)
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import importlib
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from datasetCache import CACHE_DIR, load_dataset
+from fusedPreprocess import FusedPreprocessor, FLEX_MIN, FLEX_RANGE, IMU_MIN, IMU_RANGE
+from gesturePipeline import VARIANTS, variant_dir
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(ML_DIR, "models")
+FOLDS_DIR = os.path.join(CACHE_DIR, "folds")
+
+# name: (module, class, grid, fixed params)
+GRIDS = {
+    "rf": ("sklearn.ensemble", "RandomForestClassifier",
+           {"n_estimators": [50, 100, 200], "max_depth": [None, 12], "min_samples_leaf": [1, 3]},
+           {"random_state": 42, "n_jobs": 1}),
+    "extra_trees": ("sklearn.ensemble", "ExtraTreesClassifier",
+                    {"n_estimators": [100, 200], "max_depth": [None, 12]},
+                    {"random_state": 42, "n_jobs": 1}),
+    "svc": ("sklearn.svm", "SVC",
+            {"C": [1.0, 10.0], "gamma": ["scale"]},
+            {"kernel": "rbf", "random_state": 42}),
+    "mlp": ("sklearn.neural_network", "MLPClassifier",
+            {"hidden_layer_sizes": [(64,), (128, 64)], "alpha": [1e-4, 1e-3]},
+            {"activation": "relu", "solver": "adam", "max_iter": 500, "early_stopping": True,
+             "n_iter_no_change": 20, "random_state": 42}),
+}
+
+TRAIN_DEFAULTS = {
+    "rf_scaler": {"models": "rf,extra_trees", "sources": "data",
+                  "classes": "Dale,F,I,ILoveYou,Mom,Paws_Up,Sorry,U,Water"},
+    "rf_raw":    {"models": "rf,extra_trees", "sources": "new", "classes": None},
+    "mlp":       {"models": "mlp", "sources": "data", "classes": "Dale,ILoveYou,Paws_Up"},
+}
+
+# models an interpreter folder can run: the RandomForest scripts compile the
+# forest (forestEngine) on the pickle path too, so an SVC / MLP installed
+# there would fail at startup; None means any model with predict_proba
+INSTALLABLE = {"rf_scaler": ("rf", "extra_trees"), "rf_raw": ("rf", "extra_trees"), "mlp": None}
+
+LEGACY_MIN   = [FLEX_MIN] * 5 + [IMU_MIN] * 3
+LEGACY_RANGE = [FLEX_RANGE] * 5 + [IMU_RANGE] * 3
+
+
+def candidates(models, grids=None):
+    """
+    [(model name, params)] for every point of the chosen grids
+    grids: {model name: param grid} to use instead of GRIDS' own
+    """
+    out = []
+    for name in models:
+        grid = (grids or {}).get(name, GRIDS[name][2])
+        keys = sorted(grid)
+        for values in itertools.product(*(grid[k] for k in keys)):
+            out.append((name, dict(zip(keys, values))))
+    return out
+
+
+def describe(name, params):
+    return name + " " + " ".join(f"{k}={v}" for k, v in sorted(params.items()))
+
+
+def make_estimator(name, params):
+    module, cls, _, fixed = GRIDS[name]
+    model = getattr(importlib.import_module(module), cls)(**dict(fixed, **params))
+    if name == "svc":
+        # interpreters need predict_proba; SVC(probability=True) is deprecated
+        from sklearn.calibration import CalibratedClassifierCV
+        model = CalibratedClassifierCV(model, ensemble=False)
+    return model
+
+
+# ── preprocessing / folds ────────────────────────────────────────────────────
+def fit_preprocessing(variant, X, temporal=None):
+    """
+    fits the variant's preprocessing on training rows X (raw frames, or
+    temporal features when `temporal` is the window)
+    returns (sklearn scaler or None, FusedPreprocessor or None)
+    """
+    cfg = VARIANTS[variant]
+    if not cfg["scaler"]:
+        return None, None
+    from sklearn.preprocessing import MinMaxScaler
+    normalize = cfg["normalize"] and not temporal
+    norm_min, norm_range = (LEGACY_MIN, LEGACY_RANGE) if normalize else (None, None)
+    Z = np.asarray(X, dtype=np.float64)
+    if norm_min is not None:
+        Z = (Z - norm_min) / norm_range
+    scaler = MinMaxScaler().fit(Z)
+    return scaler, FusedPreprocessor.from_scaler(scaler, norm_min, norm_range, Z.shape[1])
+
+
+def model_input(ds, temporal=None):
+    """the rows a model trains on: raw frames, or temporalFeatures.dataset_features()"""
+    if not temporal:
+        return np.asarray(ds.X)
+    from temporalFeatures import dataset_features
+    return dataset_features(ds, temporal)
+
+
+def preprocess_rows(pre, X):
+    """the same float32 x * scale + offset the interpreters run"""
+    X = np.array(X, dtype=np.float32)
+    return pre.transform(X) if pre is not None else X
+
+
+def build_folds(ds, variant, n_splits=5, seed=42, root=FOLDS_DIR, temporal=None):
+    """
+    writes fold<i>_{Xtr,ytr,Xte,yte}.npy (preprocessed per fold, fitted on the
+    training part only) unless a folder for the same data and settings exists
+    temporal: window for sliding-window features (None = single frames)
+    returns (folder, built) with built False when it was reused
+    """
+    from sklearn.model_selection import StratifiedKFold
+    h = hashlib.sha1()
+    for part in (np.ascontiguousarray(ds.X), np.ascontiguousarray(ds.y),
+                 np.ascontiguousarray(ds.row_file)):
+        h.update(part.tobytes())
+    h.update(json.dumps([variant, VARIANTS[variant], n_splits, seed, temporal]).encode())
+    folder = os.path.join(root, h.hexdigest()[:16])
+    if os.path.exists(os.path.join(folder, "folds.json")):
+        return folder, False
+
+    os.makedirs(folder, exist_ok=True)
+    X, y = model_input(ds, temporal), np.asarray(ds.y)
+    skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    for i, (tr, te) in enumerate(skf.split(X, y)):
+        _, pre = fit_preprocessing(variant, X[tr], temporal)
+        np.save(os.path.join(folder, f"fold{i}_Xtr.npy"), preprocess_rows(pre, X[tr]))
+        np.save(os.path.join(folder, f"fold{i}_ytr.npy"), y[tr])
+        np.save(os.path.join(folder, f"fold{i}_Xte.npy"), preprocess_rows(pre, X[te]))
+        np.save(os.path.join(folder, f"fold{i}_yte.npy"), y[te])
+    # written last: marks the folder as complete
+    with open(os.path.join(folder, "folds.json"), "w") as f:
+        json.dump({"variant": variant, "n_splits": n_splits, "seed": seed, "rows": len(y),
+                   "temporal": temporal}, f)
+    return folder, True
+
+
+def fit_fold(folder, fold, name, params, keep=False):
+    """
+    worker: fits one candidate on one cached fold, returns its score and timings
+    keep  : also return the fitted model (as "fitted")
+    """
+    load = lambda part: np.load(os.path.join(folder, f"fold{fold}_{part}.npy"), mmap_mode="r")
+    started = time.time()
+    model = make_estimator(name, params)
+    t0 = time.perf_counter()
+    model.fit(load("Xtr"), load("ytr"))
+    t1 = time.perf_counter()
+    acc = float(np.mean(model.predict(load("Xte")) == load("yte")))
+    t2 = time.perf_counter()
+    out = {"fold": fold, "accuracy": acc, "fit": t1 - t0, "predict": t2 - t1,
+           "started": started, "ended": time.time(), "pid": os.getpid()}
+    if keep:
+        out["fitted"] = model
+    return out
+
+
+# ── grid ─────────────────────────────────────────────────────────────────────
+def run_grid(folder, cands, n_splits, jobs=1, progress=None, keep_fold=None):
+    """
+    every (candidate, fold) on `jobs` processes (in this process when jobs=1)
+    keep_fold: fold whose fitted models are returned too (results[i]["fitted"])
+    returns (results, wall seconds); results[i] matches cands[i]
+    """
+    tasks = [(i, fold) for i in range(len(cands)) for fold in range(n_splits)]
+    per = [[] for _ in cands]
+    t0 = time.perf_counter()
+    if jobs == 1:
+        for i, fold in tasks:
+            per[i].append(fit_fold(folder, fold, *cands[i], keep=fold == keep_fold))
+            if progress and len(per[i]) == n_splits:
+                progress(i, per[i])
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(fit_fold, folder, fold, *cands[i], keep=fold == keep_fold): i
+                       for i, fold in tasks}
+            for fut in as_completed(futures):
+                i = futures[fut]
+                per[i].append(fut.result())
+                if progress and len(per[i]) == n_splits:
+                    progress(i, per[i])
+    wall = time.perf_counter() - t0
+
+    results = []
+    for (name, params), runs in zip(cands, per):
+        acc = [r["accuracy"] for r in sorted(runs, key=lambda r: r["fold"])]
+        results.append({
+            "model": name,
+            "params": params,
+            "accuracy": float(np.mean(acc)),
+            "std": float(np.std(acc)),
+            "folds": acc,
+            "fit_seconds": float(sum(r["fit"] for r in runs)),
+            "wall_seconds": max(r["ended"] for r in runs) - min(r["started"] for r in runs),
+        })
+        if keep_fold is not None:
+            results[-1]["fitted"] = next(r["fitted"] for r in runs if r["fold"] == keep_fold)
+    return results, wall
+
+
+def best_candidate(results, among=None):
+    """highest mean accuracy; ties go to the cheaper fit (among: only these indices)"""
+    return max(among if among is not None else range(len(results)),
+               key=lambda i: (round(results[i]["accuracy"], 6), -results[i]["fit_seconds"]))
+
+
+def installable(variant, name):
+    """True if the variant's interpreter scripts can run model `name` (see INSTALLABLE)"""
+    allowed = INSTALLABLE[variant]
+    return allowed is None or name in allowed
+
+
+# ── artifacts ────────────────────────────────────────────────────────────────
+def write_artifacts(out_dir, variant, ds, name, params, temporal=None):
+    """refits on every row and writes what the interpreters load; returns the files written"""
+    import joblib
+    from sklearn.preprocessing import LabelEncoder
+    from calibration import REFERENCE_NAME, make_profile, profile_from_frames, save_profile
+    from modelBundle import BUNDLE_NAME, export
+
+    cfg = VARIANTS[variant]
+    os.makedirs(out_dir, exist_ok=True)
+    X, y = np.asarray(ds.X), np.asarray(ds.y)
+    scaler, pre = fit_preprocessing(variant, model_input(ds, temporal), temporal)
+    model = make_estimator(name, params).fit(preprocess_rows(pre, model_input(ds, temporal)), y)
+    encoder = LabelEncoder().fit(ds.classes)
+
+    written = []
+    for fname, obj in (("gesture_model.pkl", model), ("label_encoder.pkl", encoder),
+                       ("scaler.pkl", scaler)):
+        if obj is not None:
+            joblib.dump(obj, os.path.join(out_dir, fname))
+            written.append(fname)
+
+    # ranges this model was trained on, for GLOVE_ID calibration
+    if cfg["normalize"] and not temporal:
+        lo = np.asarray(LEGACY_MIN, dtype=np.float64)
+        ref = make_profile(f"{variant}_training", lo, lo + LEGACY_RANGE, "legacy normalize() constants")
+    else:
+        ref = profile_from_frames(f"{variant}_training", X, source="trainModels.py")
+    save_profile(ref, os.path.join(out_dir, REFERENCE_NAME))
+    written.append(REFERENCE_NAME)
+
+    bundle = os.path.join(out_dir, BUNDLE_NAME)
+    try:
+        if temporal:
+            from temporalFeatures import FEATURES, QUANTUM
+            # the bundle is the only place the window is recorded, the pickles can't run this model
+            export(out_dir, bundle, scaler=cfg["scaler"], normalize=False, features=FEATURES,
+                   extra={"temporal": {"window": int(temporal), "quantum": QUANTUM}})
+        else:
+            export(out_dir, bundle, scaler=cfg["scaler"], normalize=cfg["normalize"])
+        written.append(BUNDLE_NAME)
+    except TypeError as e:
+        # interpreters prefer model.bundle, so an old one would shadow the new pickles
+        if os.path.exists(bundle):
+            os.remove(bundle)
+        print(f"⚠️  {e}; interpreters will load the pickles")
+    return written
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Train an interpreter model over a process pool")
+    ap.add_argument("--variant", default="rf_scaler", choices=list(VARIANTS))
+    ap.add_argument("--models", help=f"comma separated from {', '.join(GRIDS)} (default per variant)")
+    ap.add_argument("--sources", help="dataset sources: data, new, session (default per variant)")
+    ap.add_argument("--sessions", action="append", help="folder of .glv sessions (repeatable)")
+    ap.add_argument("--classes", help="comma separated labels (default per variant, 'all' for all)")
+    ap.add_argument("--folds", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="worker processes")
+    ap.add_argument("--temporal", type=int, help="sliding-window features over N frames")
+    ap.add_argument("--out", help="artifact folder (default models/<variant>/)")
+    ap.add_argument("--install", action="store_true", help="write into the interpreter folder")
+    ap.add_argument("--dry-run", action="store_true", help="cross-validate only, write nothing")
+    args = ap.parse_args()
+
+    defaults = TRAIN_DEFAULTS[args.variant]
+    models = (args.models or defaults["models"]).split(",")
+    sources = (args.sources or defaults["sources"]).split(",")
+    classes = args.classes or defaults["classes"]
+    if args.install and not any(installable(args.variant, m) for m in models):
+        print(f"❌ not installing: the {args.variant} interpreters only run "
+              f"{', '.join(INSTALLABLE[args.variant])} models, use --out for {', '.join(models)}")
+        return 1
+
+    t0 = time.perf_counter()
+    # the cache always covers every folder (so it isn't rebuilt per run); select afterwards
+    ds = load_dataset(sessions=args.sessions)
+    ds = ds.select(sources=sources, classes=None if classes in (None, "all") else classes.split(","))
+    print(f"📦 {len(ds)} rows, {len(ds.classes)} classes {list(ds.classes)} "
+          f"({(time.perf_counter() - t0) * 1e3:.0f} ms)")
+
+    t0 = time.perf_counter()
+    folder, built = build_folds(ds, args.variant, args.folds, args.seed, temporal=args.temporal)
+    print(f"🗂  {args.folds} folds {'built' if built else 'reused'} in "
+          f"{(time.perf_counter() - t0) * 1e3:.0f} ms: {folder}")
+
+    cands = candidates(models)
+    print(f"\n{len(cands)} candidates x {args.folds} folds on {args.jobs} process(es)\n")
+    print(f"{'candidate':<58} {'accuracy':>14} {'fit s':>7} {'wall s':>7}")
+
+    def progress(i, runs):
+        acc = [r["accuracy"] for r in runs]
+        print(f"{describe(*cands[i]):<58} {np.mean(acc):>7.4f} ±{np.std(acc):.3f} "
+              f"{sum(r['fit'] for r in runs):>7.2f} "
+              f"{max(r['ended'] for r in runs) - min(r['started'] for r in runs):>7.2f}", flush=True)
+
+    results, wall = run_grid(folder, cands, args.folds, args.jobs, progress)
+    busy = sum(r["fit_seconds"] for r in results)
+    best = best_candidate(results)
+    print(f"\n⏱  grid wall {wall:.2f} s on {args.jobs} process(es), "
+          f"fit time summed over workers {busy:.2f} s")
+    print(f"🏆 {describe(*cands[best])}: {results[best]['accuracy']:.4f}")
+
+    if args.dry_run:
+        return 0
+    if args.install and not installable(args.variant, cands[best][0]):
+        best = best_candidate(results, [i for i, (name, _) in enumerate(cands)
+                                        if installable(args.variant, name)])
+        print(f"⚠️  the {args.variant} interpreters only run {', '.join(INSTALLABLE[args.variant])} "
+              f"models, installing {describe(*cands[best])}: {results[best]['accuracy']:.4f}")
+    out_dir = variant_dir(args.variant) if args.install else \
+        (args.out or os.path.join(MODELS_DIR, args.variant))
+    written = write_artifacts(out_dir, args.variant, ds, *cands[best], temporal=args.temporal)
+    report = {
+        "variant": args.variant,
+        "trained": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "rows": len(ds),
+        "classes": ds.classes.tolist(),
+        "sources": sources,
+        "folds": args.folds,
+        "seed": args.seed,
+        "jobs": args.jobs,
+        "temporal": args.temporal,
+        "grid_wall_seconds": wall,
+        "best": best,
+        "candidates": results,
+    }
+    with open(os.path.join(out_dir, "train_report.json"), "w") as f:
+        json.dump(report, f, indent=1, default=str)
+    print(f"💾 {out_dir}: {', '.join(written + ['train_report.json'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
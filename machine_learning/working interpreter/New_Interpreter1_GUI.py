@@ -1,35 +1,102 @@
 import os
+import sys
 import threading
 import time
 import serial
-import joblib
 import numpy as np
 import colorsys
 import tkinter as tk
 from tkinter import ttk
-from collections import deque, Counter
 from PIL import Image, ImageTk
 
 # ─── 1) Model & Encoder ───────────────────────────────────────────────────────
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-model    = joblib.load(os.path.join(BASE_DIR, "gesture_model.pkl"))
-encoder  = joblib.load(os.path.join(BASE_DIR, "label_encoder.pkl"))
+# shared helpers (forestEngine, ...) live one level up in machine_learning/
+sys.path.insert(0, os.path.dirname(BASE_DIR))
+from forestEngine import load_compiled_forest
+from serialReader import FrameRing, SerialReader
+from smoothing import make_smoother
+from modelBundle import BUNDLE_NAME, load_current_bundle
+from calibration import apply_calibration, load_reference
+from predictionCache import cache_from_env
+from cascade import cascade_from_env
+from hotReload import reloader_from_env
+from tkRender import TkRenderer
+# counters / histograms on http://127.0.0.1:9108/metrics (see metrics.py),
+# GLOVE_VERBOSE=2 prints every smoothed label to the console
+from metrics import InterpreterMetrics, VERBOSE
+
+bundle_path = os.path.join(BASE_DIR, BUNDLE_NAME)
+# None without a bundle, or when the pickles were retrained after it was
+# exported (modelBundle.stale_sources): then the pickles below are used
+bundle = load_current_bundle(bundle_path)
+if bundle is not None:
+    # one memory-mapped file from `modelBundle.py export`, no sklearn needed
+    model    = bundle.model
+    encoder  = bundle.encoder
+    # None, unless the bundle holds a --temporal model (TemporalPreprocessor)
+    preprocess = bundle.preprocess
+else:
+    import joblib
+    # sklearn forest + compiled copy used per frame (same probabilities)
+    sk_model, model = load_compiled_forest(os.path.join(BASE_DIR, "gesture_model.pkl"))
+    encoder  = joblib.load(os.path.join(BASE_DIR, "label_encoder.pkl"))
+    preprocess = None
+
+# per-glove calibration (calibration.py): GLOVE_ID=<profile> maps this glove's
+# sensor ranges onto the ranges the model was trained with
+preprocess = apply_calibration(preprocess, os.environ.get("GLOVE_ID"), load_reference(BASE_DIR))
+# optional LRU cache of the predictions for repeated frames (predictionCache.py),
+# GLOVE_CACHE=<frames> turns it on
+cache = cache_from_env(BASE_DIR, preprocess)
+# optional cheap first stage (cascade.py fit) that answers the easy frames,
+# the full model only runs on the rest; GLOVE_CASCADE=1 turns it on
+model = cascade_from_env(BASE_DIR, model, preprocess)
+# retrained files in this folder are loaded, checked and swapped in between
+# frames without a restart (hotReload.py); GLOVE_RELOAD=0 turns it off
+reloader = reloader_from_env(BASE_DIR, "rf_raw", (model, preprocess, encoder), cache)
 
 # ─── 2) Serial Setup ─────────────────────────────────────────────────────────
-ser = serial.Serial("COM4", 9600, timeout=1)  # adjust your COM port
+# adjust your COM port (or set GLOVE_PORT, e.g. for the virtual glove in gloveSimulator.py)
+ser = serial.Serial(os.environ.get("GLOVE_PORT", "COM4"), 9600, timeout=1)
 time.sleep(2)
 
+# a reader thread drains the port into a fixed ring of frames; the inference
+# loop always scores the newest one, so it never falls behind the glove
+RING_SIZE       = 256
+OVERFLOW_POLICY = "drop-oldest"   # or "block"
+reader = SerialReader(ser, FrameRing(RING_SIZE, policy=OVERFLOW_POLICY)).start()
+
+# banners / malformed lines are counted by the reader's decoder
+metrics = InterpreterMetrics()
+metrics.registry.collect("reader", reader.counters)
+if cache is not None:
+    metrics.registry.collect("cache", cache.stats)
+# the cascade in use, also after a reload
+metrics.registry.collect("cascade", reloader.cascade_stats)
+metrics.registry.collect("reload", reloader.stats)
+
 # ─── 3) Prediction w/ smoothing ──────────────────────────────────────────────
-WINDOW = 5
-buffer = deque(maxlen=WINDOW)
+# "vote" = most common of the last WINDOW, needs 3 votes and Unknown never wins.
+# Others (smoothing.py): "none", "majority", "prob", "ema", + "+hysteresis"
+SMOOTHING = "vote"
+WINDOW    = 5
+smoother  = make_smoother(SMOOTHING, classes=encoder.classes_, window=WINDOW)
 
 def predict_confident_gesture(raw_values, threshold):
-    arr   = np.array(raw_values, dtype=np.float32).reshape(1, -1)
-    probs = model.predict_proba(arr)[0]
+    key, probs = cache.lookup(raw_values) if cache is not None else (None, None)
+    if probs is None:
+        if preprocess is not None:    # GLOVE_ID calibration / temporal features
+            arr = preprocess.transform_frame(raw_values)
+        else:
+            arr = np.array(raw_values, dtype=np.float32).reshape(1, -1)
+        probs = model.predict_proba(arr)[0]
+        if cache is not None:
+            probs = cache.store(key, probs)
     idx   = np.argmax(probs)
     conf  = probs[idx]
-    gest  = encoder.inverse_transform([idx])[0]
-    return (gest if conf >= threshold else "Unknown"), conf
+    gest  = encoder.classes_[idx]
+    return (gest if conf >= threshold else "Unknown"), conf, probs
 
 # ─── 4) Build GUI ────────────────────────────────────────────────────────────
 root = tk.Tk()
@@ -113,7 +180,11 @@ gesture_images = {
     "Water_New":    "water.png",
     "Mom1_New":      "mom.png",
     "Sorry_New":    "sorry.png",
-    " Dale_New":     "dale.png"
+    " Dale_New":     "dale.png",
+    # models from trainModels.py use the cleaned-up labels (datasetCache.normalize_label)
+    "ILoveYou": "iloveyou.png", "Paws_Up": "pawsup.png", "F": "F.png", "I": "I.png",
+    "U": "U.png", "Water": "water.png", "Mom": "mom.png", "Sorry": "sorry.png",
+    "Dale": "dale.png",
 }
 loaded_images = {}
 for g, fname in gesture_images.items():
@@ -124,29 +195,20 @@ for g, fname in gesture_images.items():
     else:
         loaded_images[g] = None
 
-# ─── 10) Animate Pastel Background ──────────────────────────────────────────
-hue = 0.0
-def animate_bg():
-    global hue, bg_color
-    hue = (hue + 0.003) % 1.0
-    r,g,b = colorsys.hsv_to_rgb(hue, 0.4, 0.9)
-    bg_color = f"#{int(r*255):02x}{int(g*255):02x}{int(b*255):02x}"
-    root.configure(bg=bg_color)
-    style.configure("TFrame", background=bg_color)
-    style.configure("TLabel", background=bg_color)
-    bottom.configure(bg=bg_color)
-    logo_lbl.config(bg=bg_color)
-    root.after(50, animate_bg)
+# ─── 10) Renderer ───────────────────────────────────────────────────────────
+# the read loop only submits values; Tk redraws at most RENDER_FPS times a
+# second, and only the widgets whose value changed (tkRender.py)
+RENDER_FPS = 30
+renderer   = TkRenderer(root, fps=RENDER_FPS)
+metrics.registry.collect("render", renderer.stats)
+metrics.start()
 
-animate_bg()
+def show_conf(pct):
+    conf_var.set(pct)
+    conf_lbl.config(text=f"{pct}%")
 
-# ─── 11) GUI updater ─────────────────────────────────────────────────────────
-def gui_update(raw_pred, smooth, conf):
-    raw_var.set(raw_pred)
+def show_gesture(smooth):
     smooth_var.set(smooth)
-    pct = conf * 100
-    conf_var.set(pct)
-    conf_lbl.config(text=f"{pct:.0f}%")
     img = loaded_images.get(smooth)
     if img:
         image_label.config(image=img, text="")
@@ -154,40 +216,75 @@ def gui_update(raw_pred, smooth, conf):
     else:
         image_label.config(image="", text="No Image")
 
+def paint_bg(color):
+    # restyles the whole ttk theme, so it only runs when the color changes
+    global bg_color
+    bg_color = color
+    root.configure(bg=bg_color)
+    style.configure("TFrame", background=bg_color)
+    style.configure("TLabel", background=bg_color)
+    bottom.configure(bg=bg_color)
+    logo_lbl.config(bg=bg_color)
+
+renderer.bind_var("raw", raw_var).bind("conf", show_conf).bind("gesture", show_gesture)
+renderer.bind("bg", paint_bg).start()
+
+# the worker thread reads this float instead of calling threshold_var.get()
+threshold = threshold_var.get() / 100.0
+def on_threshold(*_):
+    global threshold
+    threshold = threshold_var.get() / 100.0
+threshold_var.trace_add("write", on_threshold)
+
+# ─── 11) Animate Pastel Background ──────────────────────────────────────────
+BG_FPS = 10    # background steps per second (0 = static), same speed as before
+hue = 0.0
+def animate_bg():
+    global hue
+    hue = (hue + 0.06 / BG_FPS) % 1.0
+    r,g,b = colorsys.hsv_to_rgb(hue, 0.4, 0.9)
+    renderer.submit(bg=f"#{int(r*255):02x}{int(g*255):02x}{int(b*255):02x}")
+    root.after(1000 // BG_FPS, animate_bg)
+
+if BG_FPS:
+    animate_bg()
+
 # ─── 12) Safe Inference Loop ────────────────────────────────────────────────
 running = False
 
 def read_loop():
+    global model, preprocess, encoder, smoother
     try:
-        buffer.clear()
+        smoother.reset()
         while running:
-            line = ser.readline().decode("utf-8", errors="ignore").strip()
-            if not line or "Initializing" in line:
-                time.sleep(0.05)
-                continue
-
-            parts = line.split(",")
-            if len(parts) != 8:
-                time.sleep(0.05)
+            # newest complete frame (banners / malformed lines already dropped)
+            frames, _ = reader.ring.latest(1, timeout=0.5)
+            if not len(frames):
                 continue
-
+            vals = frames[-1]
+            metrics.frames.inc()
+            # a reloaded model goes in between frames; the old votes go with the old model
+            state = reloader.poll()
+            if state is not None:
+                model, preprocess, encoder = state
+                smoother = make_smoother(SMOOTHING, classes=encoder.classes_, window=WINDOW)
+
+            t = time.perf_counter()
             try:
-                vals = [float(x) for x in parts]
-            except:
-                time.sleep(0.05)
-                continue
-
-            thresh = threshold_var.get()/100.0
-            raw_pred, conf = predict_confident_gesture(vals, thresh)
+                raw_pred, conf, probs = predict_confident_gesture(vals, threshold)
+            except Exception:
+                metrics.errors.inc()
+                raise
+            t = metrics.stage("predict", t)
+            metrics.prediction(raw_pred, conf)
 
-            buffer.append(raw_pred)
-            top, cnt = Counter(buffer).most_common(1)[0]
-            smooth = top if (cnt>=3 and top!="Unknown") else "Unknown"
-            print("🔍 Smoothed label is:", repr(smooth))
+            smooth, _ = smoother.update(raw_pred, probs)
+            metrics.stage("smooth", t)
+            if VERBOSE >= 2:
+                print("🔍 Smoothed label is:", repr(smooth))
 
-            # schedule UI update on main thread
-            root.after(0, lambda rp=raw_pred, sm=smooth, c=conf: gui_update(rp, sm, c))
-            time.sleep(0.1)
+            # hand the values to the renderer (coalesced, drawn on the Tk thread)
+            renderer.submit(raw=raw_pred, conf=int(round(conf * 100)), gesture=smooth)
 
     except Exception as e:
         print("❌ Read loop crashed:", e)
@@ -206,6 +303,8 @@ def stop_reading():
     running = False
     start_btn.state(["!disabled"])
     stop_btn.state(["disabled"])
+    print("📊 Reader:", reader.counters())
+    print("🖥  Render:", renderer.stats())
 
 start_btn.config(command=start_reading)
 stop_btn.config(command=stop_reading)